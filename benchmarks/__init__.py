@@ -0,0 +1 @@
+"""Benchmarks for OpenAI Conversation Plus."""
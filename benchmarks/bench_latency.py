@@ -0,0 +1,236 @@
+"""End-to-end latency benchmark of the conversation agent and services.
+
+Runs conversation turns and service calls against the local mock server and
+reports p50/p95/p99 latency, event loop lag and memory allocated per call.
+Results can be saved as a baseline and later runs compared against it:
+
+    python -m benchmarks.bench_latency --save-baseline
+    python -m benchmarks.bench_latency --compare
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+import json
+import logging
+from pathlib import Path
+import sys
+import tracemalloc
+from typing import Any
+
+from custom_components.openai_conversation_plus.const import (
+    CONF_CHAT_MODEL,
+    CONF_REALTIME,
+    CONF_RECOMMENDED,
+)
+
+from .harness import BenchHarness, LoopLagMonitor, async_bench_harness, summarize
+from .mock_server import (
+    TOOL_CALLS_FIRST,
+    TOOL_CALLS_NEVER,
+    MockScenario,
+    async_run_mock_server,
+    scenario_arguments,
+    scenario_from_arguments,
+)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+# Metrics compared against the baseline, higher is worse
+REGRESSION_METRICS = ("p95", "p99", "alloc_peak_kib")
+
+type BenchCall = Callable[[BenchHarness, int], Awaitable[Any]]
+
+
+async def _voice_turn(harness: BenchHarness, index: int) -> Any:
+    return await harness.async_process(f"What is the state of device {index}?")
+
+
+async def _conversation(harness: BenchHarness, index: int) -> Any:
+    # Follow up turns on the same conversation grow the history
+    conversation_id = f"bench_{index // 5}"
+    return await harness.async_process(
+        f"And what about device {index}?", conversation_id=conversation_id
+    )
+
+
+async def _generate_content(harness: BenchHarness, index: int) -> Any:
+    return await harness.async_generate_content(f"Summarize the weather {index}")
+
+
+async def _generate_image(harness: BenchHarness, index: int) -> Any:
+    return await harness.async_generate_image(f"A lighthouse number {index}")
+
+
+REALTIME_OPTIONS = {
+    CONF_RECOMMENDED: False,
+    CONF_CHAT_MODEL: "gpt-4o-mini-realtime-preview",
+    CONF_REALTIME: True,
+}
+
+# Call, tool call behaviour of the server and options of the config entry
+SCENARIOS: dict[str, tuple[BenchCall, str, dict[str, Any]]] = {
+    "voice_turn": (_voice_turn, TOOL_CALLS_NEVER, {}),
+    "tool_turn": (_voice_turn, TOOL_CALLS_FIRST, {}),
+    "conversation": (_conversation, TOOL_CALLS_NEVER, {}),
+    "realtime_conversation": (_conversation, TOOL_CALLS_NEVER, REALTIME_OPTIONS),
+    "realtime_tool_turn": (_voice_turn, TOOL_CALLS_FIRST, REALTIME_OPTIONS),
+    "generate_content": (_generate_content, TOOL_CALLS_NEVER, {}),
+    "generate_image": (_generate_image, TOOL_CALLS_NEVER, {}),
+}
+
+
+async def _async_measure_allocations(
+    harness: BenchHarness, call: BenchCall, iterations: int
+) -> dict[str, float]:
+    """Return the memory allocated per call."""
+    peaks = []
+    retained = []
+    tracemalloc.start()
+    try:
+        for index in range(iterations):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await call(harness, index)
+            after, peak = tracemalloc.get_traced_memory()
+            peaks.append((peak - before) / 1024)
+            retained.append((after - before) / 1024)
+    finally:
+        tracemalloc.stop()
+    return {
+        "alloc_peak_kib": summarize(peaks)["p50"],
+        "alloc_retained_kib": summarize(retained)["p50"],
+    }
+
+
+async def async_run_scenario(
+    name: str,
+    scenario: MockScenario,
+    iterations: int,
+    concurrency: int,
+    alloc_iterations: int,
+) -> dict[str, Any]:
+    """Run a benchmark scenario and return its results."""
+    call, tool_calls, options = SCENARIOS[name]
+    scenario.tool_calls = tool_calls
+    async with (
+        async_run_mock_server(scenario) as (server, base_url),
+        async_bench_harness(base_url, options) as harness,
+    ):
+        # Warm up connections and caches
+        await call(harness, -1)
+
+        latencies: list[float] = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def run(index: int) -> None:
+            async with semaphore:
+                start = asyncio.get_running_loop().time()
+                await call(harness, index)
+                latencies.append(asyncio.get_running_loop().time() - start)
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        await asyncio.gather(*(run(index) for index in range(iterations)))
+        loop_lag = await monitor.async_stop()
+
+        allocations = await _async_measure_allocations(harness, call, alloc_iterations)
+
+    return {
+        **summarize(latencies),
+        "loop_lag_p99": loop_lag["p99"],
+        "loop_lag_max": loop_lag["max"],
+        **allocations,
+        "server_requests": server.stats.responses
+        + server.stats.realtime_responses
+        + server.stats.images,
+        "server_errors": server.stats.errors,
+    }
+
+
+def compare(
+    results: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+    tolerance: float,
+) -> list[str]:
+    """Return the regressions of the results compared to the baseline."""
+    regressions = []
+    for name, result in results.items():
+        if (expected := baseline.get(name)) is None:
+            continue
+        for metric in REGRESSION_METRICS:
+            if metric not in expected:
+                continue
+            if result[metric] > expected[metric] * (1 + tolerance):
+                regressions.append(
+                    f"{name} {metric}: {result[metric]:.4f} > "
+                    f"{expected[metric]:.4f} (+{tolerance:.0%})"
+                )
+    return regressions
+
+
+def _print_results(results: dict[str, dict[str, Any]]) -> None:
+    header = (
+        f"{'scenario':<18}{'p50':>9}{'p95':>9}{'p99':>9}"
+        f"{'lag p99':>10}{'alloc KiB':>11}"
+    )
+    print(header)  # noqa: T201
+    for name, result in results.items():
+        print(  # noqa: T201
+            f"{name:<18}{result['p50']:>9.4f}{result['p95']:>9.4f}"
+            f"{result['p99']:>9.4f}{result['loop_lag_p99']:>10.4f}"
+            f"{result['alloc_peak_kib']:>11.1f}"
+        )
+
+
+async def async_main(args: argparse.Namespace) -> int:
+    """Run the benchmark."""
+    results = {}
+    for name in args.scenarios:
+        results[name] = await async_run_scenario(
+            name,
+            scenario_from_arguments(args),
+            args.iterations,
+            args.concurrency,
+            args.alloc_iterations,
+        )
+    _print_results(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+    if args.compare:
+        baseline = json.loads(args.baseline.read_text())
+        if regressions := compare(results, baseline, args.tolerance):
+            print("Regressions:", *regressions, sep="\n  ")  # noqa: T201
+            return 1
+    return 0
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--alloc-iterations", type=int, default=10)
+    parser.add_argument("--output", type=Path)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--compare", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    scenario_arguments(parser)
+    parser.set_defaults(ttft=0.05, inter_token_delay=0.002, image_delay=0.05)
+    args = parser.parse_args()
+    if args.compare and not args.save_baseline and not args.baseline.exists():
+        parser.error(f"no baseline at {args.baseline}, run with --save-baseline first")
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(asyncio.run(async_main(args)))
+
+
+if __name__ == "__main__":
+    main()
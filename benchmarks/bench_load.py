@@ -0,0 +1,229 @@
+"""Concurrent load benchmark of the conversation agent and services.
+
+Runs an increasing number of simultaneous conversation turns and service
+calls against the local mock server, reporting throughput and latency per
+concurrency level. A watchdog thread detects event loop stalls longer than a
+threshold and samples the stack of the event loop thread while it is stalled,
+attributing the blocking to call sites:
+
+    python -m benchmarks.bench_load --concurrency 1 4 16 64 --stall-threshold 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter
+from dataclasses import dataclass, field
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any
+
+from .harness import BenchHarness, async_bench_harness, summarize
+from .mock_server import (
+    TOOL_CALLS_FIRST,
+    async_run_mock_server,
+    scenario_arguments,
+    scenario_from_arguments,
+)
+
+# Frames of these modules are skipped when attributing a stall
+_IGNORED_FILES = ("/asyncio/", "/selectors.py", "/threading.py")
+# Frames kept per stack sample
+STACK_DEPTH = 4
+
+
+@dataclass
+class Stall:
+    """A period during which the event loop did not run callbacks."""
+
+    duration: float
+    samples: Counter[tuple[str, ...]] = field(default_factory=Counter)
+
+
+class StallDetector:
+    """Detect event loop stalls and sample the stack while they last.
+
+    The event loop updates a heartbeat every interval. A watchdog thread
+    considers the loop stalled when the heartbeat is older than the threshold
+    and samples the stack of the loop thread until the heartbeat resumes.
+    """
+
+    def __init__(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        threshold: float = 0.05,
+        interval: float = 0.005,
+    ) -> None:
+        """Initialize the detector."""
+        self.loop = loop
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls: list[Stall] = []
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = threading.get_ident()
+        self._handle: asyncio.TimerHandle | None = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+
+    def _beat(self) -> None:
+        self._heartbeat = time.monotonic()
+        self._handle = self.loop.call_later(self.interval, self._beat)
+
+    def _sample(self) -> tuple[str, ...] | None:
+        if (frame := sys._current_frames().get(self._loop_thread_id)) is None:  # noqa: SLF001
+            return None
+        frames = [
+            f"{summary.filename}:{summary.lineno} {summary.name}"
+            for summary in reversed(traceback.extract_stack(frame))
+            if not any(ignored in summary.filename for ignored in _IGNORED_FILES)
+        ]
+        return tuple(frames[:STACK_DEPTH])
+
+    def _watch(self) -> None:
+        stall: Stall | None = None
+        stall_start = 0.0
+        while not self._stop.wait(self.interval / 2):
+            heartbeat = self._heartbeat
+            now = time.monotonic()
+            if now - heartbeat < self.threshold:
+                if stall is not None:
+                    stall.duration = heartbeat - stall_start
+                    self.stalls.append(stall)
+                    stall = None
+                continue
+            if stall is None:
+                stall = Stall(0.0)
+                stall_start = heartbeat
+            if (sample := self._sample()) is not None:
+                stall.samples[sample] += 1
+
+    def start(self) -> None:
+        """Start watching the event loop, must be called from the loop."""
+        self._loop_thread_id = threading.get_ident()
+        self._beat()
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the event loop."""
+        self._stop.set()
+        self._thread.join()
+        if self._handle is not None:
+            self._handle.cancel()
+
+    def call_sites(self) -> Counter[tuple[str, ...]]:
+        """Return the stack samples of all stalls."""
+        samples: Counter[tuple[str, ...]] = Counter()
+        for stall in self.stalls:
+            samples.update(stall.samples)
+        return samples
+
+
+async def _async_job(harness: BenchHarness, index: int, service_share: float) -> None:
+    """Run a conversation turn or, for a share of the jobs, a service call."""
+    if service_share and index % round(1 / service_share) == 0:
+        await harness.async_generate_content(f"Summarize the weather {index}")
+        return
+    await harness.async_process(
+        f"What is the state of device {index}?", conversation_id=f"load_{index}"
+    )
+
+
+async def async_run_level(
+    harness: BenchHarness, concurrency: int, jobs: int, args: argparse.Namespace
+) -> dict[str, Any]:
+    """Run the jobs with the given number of them in flight at once."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    errors = 0
+
+    async def run(index: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.monotonic()
+            try:
+                await _async_job(harness, index, args.service_share)
+            except Exception:  # noqa: BLE001
+                errors += 1
+            else:
+                latencies.append(time.monotonic() - start)
+
+    detector = StallDetector(asyncio.get_running_loop(), args.stall_threshold)
+    detector.start()
+    start = time.monotonic()
+    try:
+        await asyncio.gather(*(run(index) for index in range(jobs)))
+    finally:
+        elapsed = time.monotonic() - start
+        detector.stop()
+
+    return {
+        "concurrency": concurrency,
+        "throughput": len(latencies) / elapsed,
+        "errors": errors,
+        "latency": summarize(latencies),
+        "stalls": len(detector.stalls),
+        "stall_max": max((stall.duration for stall in detector.stalls), default=0.0),
+        "stall_total": sum(stall.duration for stall in detector.stalls),
+        "call_sites": detector.call_sites(),
+    }
+
+
+def _print_result(result: dict[str, Any], top: int) -> None:
+    latency = result["latency"]
+    print(  # noqa: T201
+        f"{result['concurrency']:>11}{result['throughput']:>12.2f}"
+        f"{latency['p50']:>9.3f}{latency['p95']:>9.3f}{result['errors']:>8}"
+        f"{result['stalls']:>8}{result['stall_max']:>11.3f}"
+    )
+    for stack, count in result["call_sites"].most_common(top):
+        print(f"{'':>11}{count:>5} samples  {' <- '.join(stack)}")  # noqa: T201
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the benchmark."""
+    scenario = scenario_from_arguments(args)
+    scenario.tool_calls = TOOL_CALLS_FIRST
+    async with (
+        async_run_mock_server(scenario) as (_, base_url),
+        async_bench_harness(base_url) as harness,
+    ):
+        await _async_job(harness, -1, 0)
+        print(  # noqa: T201
+            f"{'concurrency':>11}{'turns/s':>12}{'p50':>9}{'p95':>9}{'errors':>8}"
+            f"{'stalls':>8}{'stall max':>11}"
+        )
+        for concurrency in args.concurrency:
+            result = await async_run_level(
+                harness, concurrency, max(args.jobs, concurrency), args
+            )
+            _print_result(result, args.top)
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--concurrency", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32]
+    )
+    parser.add_argument("--jobs", type=int, default=64, help="Jobs per level")
+    parser.add_argument(
+        "--service-share",
+        type=float,
+        default=0.25,
+        help="Share of the jobs calling generate_content instead of a turn",
+    )
+    parser.add_argument("--stall-threshold", type=float, default=0.05)
+    parser.add_argument("--top", type=int, default=5, help="Call sites per level")
+    scenario_arguments(parser)
+    parser.set_defaults(ttft=0.2, inter_token_delay=0.01)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Startup benchmark of the integration modules.
+
+Imports the modules Home Assistant loads at startup, each run in a fresh
+interpreter, and reports the import time and resident memory growth per
+module. The OpenAI SDK is imported last, its cost is paid when the first
+config entry is set up instead of when the integration is loaded:
+
+    python -m benchmarks.bench_startup --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+from pathlib import Path
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = Path(__file__).parent.parent
+
+# Loaded by Home Assistant before the integration, not part of its cost
+PRELOAD = (
+    "homeassistant.core",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.llm",
+    "homeassistant.components.conversation",
+)
+MODULES = (
+    "custom_components.openai_conversation_plus",
+    "custom_components.openai_conversation_plus.config_flow",
+    "custom_components.openai_conversation_plus.conversation",
+    "openai",
+)
+
+
+def rss() -> int:
+    """Return the resident memory of this process in bytes."""
+    try:
+        pages = int(Path("/proc/self/statm").read_text().split()[1])
+    except OSError:
+        # Peak rather than current memory, close enough while only importing
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == "darwin" else maxrss * 1024
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def measure(preload: list[str], modules: list[str]) -> list[dict[str, object]]:
+    """Import the modules one after the other and measure each of them."""
+    for module in preload:
+        importlib.import_module(module)
+    results = []
+    for module in modules:
+        before = rss()
+        start = time.perf_counter()
+        importlib.import_module(module)
+        results.append(
+            {
+                "module": module,
+                "time": time.perf_counter() - start,
+                "rss": rss() - before,
+                "openai_loaded": "openai" in sys.modules,
+            }
+        )
+    return results
+
+
+def run_child(preload: list[str], modules: list[str]) -> list[dict[str, object]]:
+    """Measure the imports in a fresh interpreter."""
+    output = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.bench_startup",
+            "--child",
+            "--preload",
+            *preload,
+            "--modules",
+            *modules,
+        ],
+        cwd=ROOT,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--preload", nargs="*", default=list(PRELOAD))
+    parser.add_argument("--modules", nargs="+", default=list(MODULES))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.preload, args.modules)))  # noqa: T201
+        return
+
+    runs = [run_child(args.preload, args.modules) for _ in range(args.runs)]
+    print(  # noqa: T201
+        f"{'module':<56}{'p50 ms':>9}{'p95 ms':>9}{'rss MiB':>9}{'openai':>8}"
+    )
+    for index, module in enumerate(args.modules):
+        samples = [run[index] for run in runs]
+        times = sorted(float(sample["time"]) * 1000 for sample in samples)
+        memory = statistics.median(float(sample["rss"]) for sample in samples)
+        print(  # noqa: T201
+            f"{module:<56}{statistics.median(times):>9.1f}"
+            f"{times[min(len(times) - 1, round(len(times) * 0.95))]:>9.1f}"
+            f"{memory / 2**20:>9.1f}"
+            f"{'yes' if samples[0]['openai_loaded'] else 'no':>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Micro-benchmark of the handling of streamed response events.
+
+Replays recorded event streams through the conversation agent's stream
+transformation and reports the time spent per event, with and without debug
+logging enabled:
+
+    python -m benchmarks.bench_transform_stream
+    python -m benchmarks.bench_transform_stream --debug
+
+Streams are recorded as one JSON event per line, from the mock server or any
+OpenAI compatible server:
+
+    python -m benchmarks.bench_transform_stream --record out.jsonl --base-url URL
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+import json
+import logging
+import os
+from pathlib import Path
+import time
+
+import openai
+from openai._models import construct_type
+from openai.types.responses import ResponseStreamEvent
+
+from custom_components.openai_conversation_plus.const import LOGGER
+from custom_components.openai_conversation_plus.conversation import (
+    TurnUsage,
+    _transform_stream,
+)
+
+from .harness import summarize
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+class ReplayStream:
+    """Stand-in for a primed response stream replaying recorded events."""
+
+    def __init__(self, events: list[ResponseStreamEvent]) -> None:
+        """Initialize the stream."""
+        self._events = events
+
+    async def __aiter__(self) -> AsyncIterator[ResponseStreamEvent]:
+        """Iterate over the recorded events."""
+        for event in self._events:
+            yield event
+
+    async def close(self) -> None:
+        """Close the stream."""
+
+
+def load_events(path: Path) -> list[ResponseStreamEvent]:
+    """Load a recorded event stream."""
+    return [
+        construct_type(type_=ResponseStreamEvent, value=json.loads(line))
+        for line in path.read_text().splitlines()
+        if line
+    ]
+
+
+async def async_replay(events: list[ResponseStreamEvent]) -> int:
+    """Transform the events once, returning the number of deltas produced."""
+    deltas = 0
+    async for _ in _transform_stream(
+        None,  # type: ignore[arg-type]
+        ReplayStream(events),  # type: ignore[arg-type]
+        TurnUsage(),
+    ):
+        deltas += 1
+    return deltas
+
+
+async def async_bench(
+    events: list[ResponseStreamEvent], iterations: int
+) -> dict[str, float]:
+    """Return the time spent per event in microseconds."""
+    # Tool calls complete the recorded event in place, start from a copy
+    streams = [
+        [event.model_copy(deep=True) for event in events] for _ in range(iterations)
+    ]
+    timings = []
+    for stream in streams:
+        start = time.perf_counter()
+        await async_replay(stream)
+        timings.append((time.perf_counter() - start) / len(stream) * 1e6)
+    return summarize(timings)
+
+
+async def async_record(args: argparse.Namespace) -> None:
+    """Record the event stream of a response."""
+    client = openai.AsyncOpenAI(
+        api_key=os.environ.get("OPENAI_API_KEY", "benchmark"), base_url=args.base_url
+    )
+    stream = await client.responses.create(
+        model=args.model, input=args.prompt, stream=True
+    )
+    with args.record.open("w") as file:
+        async for event in stream:
+            file.write(json.dumps(event.to_dict()) + "\n")
+
+
+async def async_main(args: argparse.Namespace) -> None:
+    """Run the benchmark."""
+    if args.debug:
+        # Measure the cost of building the records, not of writing them
+        LOGGER.setLevel(logging.DEBUG)
+        LOGGER.addHandler(logging.NullHandler())
+        LOGGER.propagate = False
+
+    print(f"{'stream':<16}{'events':>8}{'p50 us':>10}{'p95 us':>10}")  # noqa: T201
+    for path in args.streams:
+        events = load_events(path)
+        result = await async_bench(events, args.iterations)
+        print(  # noqa: T201
+            f"{path.stem:<16}{len(events):>8}{result['p50']:>10.2f}"
+            f"{result['p95']:>10.2f}"
+        )
+
+
+def main() -> None:
+    """Parse the arguments and run the benchmark or record a stream."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "streams", nargs="*", type=Path, default=sorted(FIXTURES.glob("*.jsonl"))
+    )
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--debug", action="store_true", help="Enable debug logging")
+    parser.add_argument("--record", type=Path, help="Record a stream to this file")
+    parser.add_argument("--base-url")
+    parser.add_argument("--model", default="gpt-4o-mini")
+    parser.add_argument("--prompt", default="Tell me a short story.")
+    args = parser.parse_args()
+    if args.record:
+        asyncio.run(async_record(args))
+    else:
+        asyncio.run(async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""Minimal Home Assistant harness driving the integration in benchmarks."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+import contextlib
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import statistics
+import time
+from typing import Any
+from unittest.mock import AsyncMock, patch
+
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_mock_service,
+    async_test_home_assistant,
+)
+
+from custom_components.openai_conversation_plus import (
+    SERVICE_GENERATE_CONTENT,
+    SERVICE_GENERATE_IMAGE,
+    async_setup,
+    async_setup_entry,
+)
+from custom_components.openai_conversation_plus.const import (
+    CONF_BASE_URL,
+    CONF_PROMPT,
+    DOMAIN,
+)
+from custom_components.openai_conversation_plus.conversation import (
+    OpenAIConversationEntity,
+)
+from homeassistant.components import conversation
+from homeassistant.components.homeassistant.exposed_entities import async_expose_entity
+from homeassistant.const import CONF_API_KEY, CONF_LLM_HASS_API
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.helpers import llm
+from homeassistant.setup import async_setup_component
+
+BENCH_PROMPT = "You are a voice assistant for a benchmark. Answer briefly."
+BENCH_DEVICES = 50
+
+
+async def _async_setup_home(hass: HomeAssistant) -> None:
+    """Expose lights, rendered by the Assist API as on a real installation."""
+    assert await async_setup_component(hass, "homeassistant", {})
+    assert await async_setup_component(hass, "intent", {})
+    # Lets the intents turning devices on and off succeed
+    async_mock_service(hass, "light", "turn_on")
+    async_mock_service(hass, "light", "turn_off")
+    for index in range(BENCH_DEVICES):
+        entity_id = f"light.device_{index}"
+        hass.states.async_set(
+            entity_id,
+            "on" if index % 2 else "off",
+            {"friendly_name": f"Device {index}", "brightness": 128},
+        )
+        async_expose_entity(hass, conversation.DOMAIN, entity_id, True)
+
+
+@dataclass
+class BenchHarness:
+    """Home Assistant with the integration set up against a mock server."""
+
+    hass: HomeAssistant
+    entry: MockConfigEntry
+    entity: OpenAIConversationEntity
+
+    async def async_process(
+        self,
+        text: str,
+        conversation_id: str | None = None,
+        device_id: str | None = "bench_satellite",
+    ) -> conversation.ConversationResult:
+        """Run a conversation turn."""
+        return await self.entity.async_process(
+            conversation.ConversationInput(
+                text=text,
+                context=Context(),
+                conversation_id=conversation_id,
+                device_id=device_id,
+                language="en",
+                agent_id=self.entity.entity_id,
+            )
+        )
+
+    async def async_generate_content(self, prompt: str, **data: Any) -> Any:
+        """Call the generate_content service."""
+        return await self.hass.services.async_call(
+            DOMAIN,
+            SERVICE_GENERATE_CONTENT,
+            {"config_entry": self.entry.entry_id, CONF_PROMPT: prompt, **data},
+            blocking=True,
+            return_response=True,
+        )
+
+    async def async_generate_image(self, prompt: str, **data: Any) -> Any:
+        """Call the generate_image service."""
+        return await self.hass.services.async_call(
+            DOMAIN,
+            SERVICE_GENERATE_IMAGE,
+            {"config_entry": self.entry.entry_id, CONF_PROMPT: prompt, **data},
+            blocking=True,
+            return_response=True,
+        )
+
+
+@asynccontextmanager
+async def async_bench_harness(
+    base_url: str, options: dict[str, Any] | None = None
+) -> AsyncIterator[BenchHarness]:
+    """Set up Home Assistant and the integration against the given server.
+
+    Only the parts of the integration under benchmark are set up, the
+    conversation entity is created directly instead of through its platform.
+    """
+    async with async_test_home_assistant() as hass:
+        await _async_setup_home(hass)
+        entry = MockConfigEntry(
+            domain=DOMAIN,
+            title="Benchmark",
+            data={CONF_API_KEY: "benchmark", CONF_BASE_URL: base_url},
+            options={
+                CONF_LLM_HASS_API: llm.LLM_API_ASSIST,
+                CONF_PROMPT: BENCH_PROMPT,
+                **(options or {}),
+            },
+        )
+        entry.add_to_hass(hass)
+        assert await async_setup(hass, {})
+        with patch.object(
+            hass.config_entries, "async_forward_entry_setups", AsyncMock()
+        ):
+            assert await async_setup_entry(hass, entry)
+
+        entity = OpenAIConversationEntity(entry)
+        entity.hass = hass
+        entity.entity_id = "conversation.openai_conversation_plus_benchmark"
+        yield BenchHarness(hass, entry, entity)
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """Return the percentile of the values, interpolating between samples."""
+    if not values:
+        return 0.0
+    if len(values) == 1:
+        return values[0]
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    """Return the latency percentiles of the values."""
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) if values else 0.0,
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": max(values, default=0.0),
+    }
+
+
+@dataclass
+class LoopLagMonitor:
+    """Measure how late the event loop wakes up a sleeping task."""
+
+    interval: float = 0.005
+    lags: list[float] = field(default_factory=list)
+    _task: asyncio.Task[None] | None = None
+
+    async def _async_run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(loop.time() - start - self.interval, 0.0))
+
+    def start(self) -> None:
+        """Start measuring."""
+        self._task = asyncio.create_task(self._async_run())
+
+    async def async_stop(self) -> dict[str, float]:
+        """Stop measuring and return the lag percentiles."""
+        assert self._task is not None
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        return summarize(self.lags)
+
+
+async def async_timed(coro: Any) -> float:
+    """Await the coroutine and return how long it took."""
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
@@ -0,0 +1,516 @@
+"""Local stand-in for the OpenAI endpoints used by the integration.
+
+Serves the Responses API (streaming and not), the Realtime API over a
+WebSocket, image generation and the model list with configurable latency, tool calls and injected errors, so the
+integration can be benchmarked without network access or API costs.
+
+Run standalone to point a Home Assistant instance at it:
+
+    python -m benchmarks.mock_server --port 8765 --ttft 0.4 --tool-calls first
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+import itertools
+import json
+import random
+import time
+from typing import Any
+
+from aiohttp import WSMsgType, web
+
+TOOL_CALLS_NEVER = "never"
+# Call a tool on the first request of a turn, answer once the result is in
+TOOL_CALLS_FIRST = "first"
+# Keep calling tools until the integration gives up
+TOOL_CALLS_ALWAYS = "always"
+
+
+@dataclass
+class MockScenario:
+    """Behaviour of the mock server."""
+
+    ttft: float = 0.3
+    inter_token_delay: float = 0.02
+    output_tokens: int = 30
+    tool_calls: str = TOOL_CALLS_NEVER
+    # An intent of the Assist API acting on one of the benchmark devices
+    tool_name: str = "HassTurnOn"
+    tool_arguments: dict[str, Any] = field(default_factory=lambda: {"name": "Device 1"})
+    # Fraction of requests answered with an error
+    error_rate: float = 0.0
+    error_status: int = 500
+    image_delay: float = 1.0
+    seed: int | None = None
+
+
+@dataclass
+class MockStats:
+    """Requests handled by the mock server."""
+
+    responses: int = 0
+    images: int = 0
+    errors: int = 0
+    cancelled: int = 0
+    realtime_sessions: int = 0
+    realtime_responses: int = 0
+
+
+def _count_tokens(value: Any) -> int:
+    """Return a rough token count of a request input."""
+    return len(json.dumps(value)) // 4
+
+
+class MockOpenAIServer:
+    """aiohttp application mimicking the OpenAI API."""
+
+    def __init__(self, scenario: MockScenario | None = None) -> None:
+        """Initialize the server."""
+        self.scenario = scenario or MockScenario()
+        self.stats = MockStats()
+        self._ids = itertools.count(1)
+        self._random = random.Random(self.scenario.seed)
+        self.app = web.Application()
+        self.app.router.add_get("/v1/models", self._handle_models)
+        self.app.router.add_post("/v1/responses", self._handle_responses)
+        self.app.router.add_post("/v1/images/generations", self._handle_images)
+        self.app.router.add_get("/v1/realtime", self._handle_realtime)
+
+    def _next_id(self, prefix: str) -> str:
+        return f"{prefix}_{next(self._ids):08d}"
+
+    def _should_fail(self) -> bool:
+        if self._random.random() >= self.scenario.error_rate:
+            return False
+        self.stats.errors += 1
+        return True
+
+    def _error_response(self) -> web.Response:
+        return web.json_response(
+            {
+                "error": {
+                    "message": "Injected error",
+                    "type": "server_error",
+                    "code": None,
+                    "param": None,
+                }
+            },
+            status=self.scenario.error_status,
+        )
+
+    def _wants_tool_call(self, request_input: str | list[dict[str, Any]]) -> bool:
+        if self.scenario.tool_calls == TOOL_CALLS_ALWAYS:
+            return True
+        if self.scenario.tool_calls != TOOL_CALLS_FIRST:
+            return False
+        if isinstance(request_input, str):
+            return True
+        # Answer once the last user message got a tool result
+        for item in reversed(request_input):
+            if item.get("type") == "function_call_output":
+                return False
+            if item.get("role") == "user":
+                return True
+        return True
+
+    def _response(
+        self, body: dict[str, Any], status: str, output: list[dict[str, Any]]
+    ) -> dict[str, Any]:
+        input_tokens = _count_tokens(body.get("input"))
+        output_tokens = self.scenario.output_tokens
+        return {
+            "id": self._next_id("resp"),
+            "object": "response",
+            "created_at": int(time.time()),
+            "model": body.get("model", "gpt-4o-mini"),
+            "status": status,
+            "output": output,
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": body.get("tools", []),
+            "usage": {
+                "input_tokens": input_tokens,
+                # Everything but the last message is a repeated prefix
+                "input_tokens_details": {"cached_tokens": input_tokens // 2},
+                "output_tokens": output_tokens,
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+
+    def _words(self) -> list[str]:
+        return [f"word{index} " for index in range(self.scenario.output_tokens)]
+
+    async def _handle_models(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "object": "list",
+                "data": [
+                    {
+                        "id": "gpt-4o-mini",
+                        "object": "model",
+                        "created": 0,
+                        "owned_by": "benchmark",
+                    }
+                ],
+            }
+        )
+
+    async def _handle_images(self, request: web.Request) -> web.Response:
+        self.stats.images += 1
+        if self._should_fail():
+            return self._error_response()
+        body = await request.json()
+        await asyncio.sleep(self.scenario.image_delay)
+        return web.json_response(
+            {
+                "created": int(time.time()),
+                "data": [
+                    {
+                        "url": f"http://{request.host}/images/{self._next_id('img')}.png",
+                        "revised_prompt": body.get("prompt"),
+                    }
+                ],
+            }
+        )
+
+    async def _handle_responses(self, request: web.Request) -> web.StreamResponse:
+        self.stats.responses += 1
+        body = await request.json()
+        if self._should_fail():
+            return self._error_response()
+
+        tool_call = self._wants_tool_call(body.get("input", []))
+        if not body.get("stream"):
+            await asyncio.sleep(
+                self.scenario.ttft
+                + self.scenario.inter_token_delay * self.scenario.output_tokens
+            )
+            message = {
+                "type": "message",
+                "id": self._next_id("msg"),
+                "role": "assistant",
+                "status": "completed",
+                "content": [
+                    {
+                        "type": "output_text",
+                        "text": "".join(self._words()),
+                        "annotations": [],
+                    }
+                ],
+            }
+            return web.json_response(self._response(body, "completed", [message]))
+
+        response = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        try:
+            await self._stream(response, body, tool_call)
+        except (ConnectionResetError, asyncio.CancelledError):
+            # The client closed the stream
+            self.stats.cancelled += 1
+            raise
+        return response
+
+    async def _stream(
+        self, response: web.StreamResponse, body: dict[str, Any], tool_call: bool
+    ) -> None:
+        async def send(event: dict[str, Any]) -> None:
+            await response.write(
+                f"event: {event['type']}\ndata: {json.dumps(event)}\n\n".encode()
+            )
+
+        await asyncio.sleep(self.scenario.ttft)
+        await send(
+            {
+                "type": "response.created",
+                "response": self._response(body, "in_progress", []),
+            }
+        )
+
+        item_id = self._next_id("fc" if tool_call else "msg")
+        if tool_call:
+            arguments = json.dumps(self.scenario.tool_arguments)
+            item = {
+                "type": "function_call",
+                "id": item_id,
+                "call_id": self._next_id("call"),
+                "name": self.scenario.tool_name,
+                "arguments": "",
+                "status": "in_progress",
+            }
+            await send(
+                {"type": "response.output_item.added", "output_index": 0, "item": item}
+            )
+            for index in range(0, len(arguments), 4):
+                await asyncio.sleep(self.scenario.inter_token_delay)
+                await send(
+                    {
+                        "type": "response.function_call_arguments.delta",
+                        "item_id": item_id,
+                        "output_index": 0,
+                        "delta": arguments[index : index + 4],
+                    }
+                )
+            await send(
+                {
+                    "type": "response.function_call_arguments.done",
+                    "item_id": item_id,
+                    "output_index": 0,
+                    "arguments": arguments,
+                }
+            )
+            item = {**item, "arguments": arguments, "status": "completed"}
+        else:
+            item = {
+                "type": "message",
+                "id": item_id,
+                "role": "assistant",
+                "status": "in_progress",
+                "content": [],
+            }
+            await send(
+                {"type": "response.output_item.added", "output_index": 0, "item": item}
+            )
+            words = self._words()
+            for word in words:
+                await asyncio.sleep(self.scenario.inter_token_delay)
+                await send(
+                    {
+                        "type": "response.output_text.delta",
+                        "item_id": item_id,
+                        "output_index": 0,
+                        "content_index": 0,
+                        "delta": word,
+                    }
+                )
+            item = {
+                **item,
+                "status": "completed",
+                "content": [
+                    {"type": "output_text", "text": "".join(words), "annotations": []}
+                ],
+            }
+
+        await send(
+            {"type": "response.output_item.done", "output_index": 0, "item": item}
+        )
+        await send(
+            {
+                "type": "response.completed",
+                "response": self._response(body, "completed", [item]),
+            }
+        )
+
+    async def _handle_realtime(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.stats.realtime_sessions += 1
+        session: dict[str, Any] = {"id": self._next_id("sess"), "modalities": ["text"]}
+        items: list[dict[str, Any]] = []
+
+        async def send(event: dict[str, Any]) -> None:
+            await ws.send_json({"event_id": self._next_id("event"), **event})
+
+        await send({"type": "session.created", "session": session})
+        async for message in ws:
+            if message.type is not WSMsgType.TEXT:
+                break
+            event = json.loads(message.data)
+            if event["type"] == "session.update":
+                session.update(event["session"])
+                await send({"type": "session.updated", "session": session})
+            elif event["type"] == "conversation.item.create":
+                item = {"id": self._next_id("item"), **event["item"]}
+                items.append(item)
+                await send({"type": "conversation.item.created", "item": item})
+            elif event["type"] == "response.create":
+                self.stats.realtime_responses += 1
+                if self._should_fail():
+                    await send(
+                        {
+                            "type": "error",
+                            "error": {"type": "server_error", "message": "Injected"},
+                        }
+                    )
+                    continue
+                await self._realtime_response(send, items)
+        return ws
+
+    async def _realtime_response(self, send: Any, items: list[dict[str, Any]]) -> None:
+        response_id = self._next_id("resp")
+        tool_call = self._wants_tool_call(items)
+        await asyncio.sleep(self.scenario.ttft)
+        await send(
+            {
+                "type": "response.created",
+                "response": {"id": response_id, "status": "in_progress", "output": []},
+            }
+        )
+        item_id = self._next_id("item")
+        if tool_call:
+            arguments = json.dumps(self.scenario.tool_arguments)
+            item = {
+                "id": item_id,
+                "type": "function_call",
+                "call_id": self._next_id("call"),
+                "name": self.scenario.tool_name,
+                "arguments": "",
+                "status": "in_progress",
+            }
+            await send(
+                {
+                    "type": "response.output_item.added",
+                    "response_id": response_id,
+                    "output_index": 0,
+                    "item": item,
+                }
+            )
+            for index in range(0, len(arguments), 4):
+                await asyncio.sleep(self.scenario.inter_token_delay)
+                await send(
+                    {
+                        "type": "response.function_call_arguments.delta",
+                        "response_id": response_id,
+                        "item_id": item_id,
+                        "call_id": item["call_id"],
+                        "delta": arguments[index : index + 4],
+                    }
+                )
+            await send(
+                {
+                    "type": "response.function_call_arguments.done",
+                    "response_id": response_id,
+                    "item_id": item_id,
+                    "call_id": item["call_id"],
+                    "arguments": arguments,
+                }
+            )
+            item = {**item, "arguments": arguments, "status": "completed"}
+        else:
+            item = {
+                "id": item_id,
+                "type": "message",
+                "role": "assistant",
+                "status": "in_progress",
+                "content": [],
+            }
+            await send(
+                {
+                    "type": "response.output_item.added",
+                    "response_id": response_id,
+                    "output_index": 0,
+                    "item": item,
+                }
+            )
+            words = self._words()
+            for word in words:
+                await asyncio.sleep(self.scenario.inter_token_delay)
+                await send(
+                    {
+                        "type": "response.text.delta",
+                        "response_id": response_id,
+                        "item_id": item_id,
+                        "delta": word,
+                    }
+                )
+            item = {
+                **item,
+                "status": "completed",
+                "content": [{"type": "text", "text": "".join(words)}],
+            }
+
+        items.append(item)
+        # Only the new items are processed, the rest is cached server side
+        input_tokens = _count_tokens(items)
+        await send(
+            {
+                "type": "response.done",
+                "response": {
+                    "id": response_id,
+                    "status": "completed",
+                    "output": [item],
+                    "usage": {
+                        "input_tokens": input_tokens,
+                        "input_token_details": {"cached_tokens": input_tokens // 2},
+                        "output_tokens": self.scenario.output_tokens,
+                        "total_tokens": input_tokens + self.scenario.output_tokens,
+                    },
+                },
+            }
+        )
+
+
+@asynccontextmanager
+async def async_run_mock_server(
+    scenario: MockScenario | None = None, host: str = "127.0.0.1", port: int = 0
+) -> AsyncIterator[tuple[MockOpenAIServer, str]]:
+    """Run the mock server, yielding it with its base URL."""
+    server = MockOpenAIServer(scenario)
+    runner = web.AppRunner(server.app)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    sockets = site._server.sockets  # noqa: SLF001
+    bound_port = sockets[0].getsockname()[1]
+    try:
+        yield server, f"http://{host}:{bound_port}/v1"
+    finally:
+        await runner.cleanup()
+
+
+def scenario_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the scenario options to an argument parser."""
+    defaults = MockScenario()
+    parser.add_argument("--ttft", type=float, default=defaults.ttft)
+    parser.add_argument(
+        "--inter-token-delay", type=float, default=defaults.inter_token_delay
+    )
+    parser.add_argument("--output-tokens", type=int, default=defaults.output_tokens)
+    parser.add_argument(
+        "--tool-calls",
+        choices=(TOOL_CALLS_NEVER, TOOL_CALLS_FIRST, TOOL_CALLS_ALWAYS),
+        default=defaults.tool_calls,
+    )
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    parser.add_argument("--error-status", type=int, default=defaults.error_status)
+    parser.add_argument("--image-delay", type=float, default=defaults.image_delay)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def scenario_from_arguments(args: argparse.Namespace) -> MockScenario:
+    """Return the scenario described by parsed arguments."""
+    return MockScenario(
+        ttft=args.ttft,
+        inter_token_delay=args.inter_token_delay,
+        output_tokens=args.output_tokens,
+        tool_calls=args.tool_calls,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        image_delay=args.image_delay,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    """Run the mock server until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    scenario_arguments(parser)
+    args = parser.parse_args()
+    web.run_app(
+        MockOpenAIServer(scenario_from_arguments(args)).app,
+        host=args.host,
+        port=args.port,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,22 +2,17 @@
 
 from __future__ import annotations
 
+import asyncio
 import base64
+from dataclasses import dataclass
 from mimetypes import guess_file_type
 from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Any
 
-import openai
-from openai.types.images_response import ImagesResponse
-from openai.types.responses import (
-    EasyInputMessageParam,
-    Response,
-    ResponseInputImageParam,
-    ResponseInputMessageContentListParam,
-    ResponseInputParam,
-    ResponseInputTextParam,
-)
 import voluptuous as vol
 
+from homeassistant.components import conversation
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_API_KEY, Platform
 from homeassistant.core import (
@@ -33,32 +28,102 @@ from homeassistant.exceptions import (
 )
 from homeassistant.helpers import config_validation as cv, selector
 from homeassistant.helpers.httpx_client import get_async_client
+from homeassistant.helpers.importlib import async_import_module
 from homeassistant.helpers.typing import ConfigType
 
 from .const import (
     CONF_BASE_URL,
+    CONF_CACHE_TTL,
     CONF_CHAT_MODEL,
+    CONF_ENDPOINT_WEIGHT,
+    CONF_ENDPOINTS,
     CONF_FILENAMES,
+    CONF_HEDGING,
+    CONF_JOBS,
+    CONF_LATENCY_TARGET,
+    CONF_LOCAL_CACHE,
+    CONF_MAX_IN_FLIGHT,
+    CONF_MAX_PARALLEL,
     CONF_MAX_TOKENS,
+    CONF_NO_USER_TOKEN_QUOTA,
+    CONF_PROFILE_DURATION,
+    CONF_PROFILE_TURNS,
     CONF_PROMPT,
     CONF_REASONING_EFFORT,
+    CONF_SESSION_MAX_MESSAGES,
+    CONF_SESSION_MAX_SIZE,
+    CONF_SPECULATIVE_REQUESTS,
+    CONF_STALE_TTL,
     CONF_TEMPERATURE,
     CONF_TOP_P,
+    CONF_USER_TOKEN_QUOTA,
+    CONF_WEB_SEARCH,
+    CONF_WEB_SEARCH_CONTEXT_SIZE,
     DOMAIN,
     LOGGER,
     RECOMMENDED_CHAT_MODEL,
+    RECOMMENDED_HEDGING,
+    RECOMMENDED_LATENCY_TARGET,
+    RECOMMENDED_MAX_IN_FLIGHT,
     RECOMMENDED_MAX_TOKENS,
+    RECOMMENDED_NO_USER_TOKEN_QUOTA,
     RECOMMENDED_REASONING_EFFORT,
+    RECOMMENDED_SESSION_MAX_MESSAGES,
+    RECOMMENDED_SESSION_MAX_SIZE,
+    RECOMMENDED_SPECULATIVE_REQUESTS,
     RECOMMENDED_TEMPERATURE,
     RECOMMENDED_TOP_P,
+    RECOMMENDED_USER_TOKEN_QUOTA,
+    RECOMMENDED_WEB_SEARCH_CONTEXT_SIZE,
 )
+from .endpoints import Endpoint, EndpointPool
+from .image_cache import DATA_IMAGE_CACHE, ImageCache
+from .latency import LatencyController
+from .live_context import LiveContextEncoder
+from .profiler import async_profile
+from .prompt_cache import PromptCache, cache_key
+from .realtime import RealtimeSessions
+from .scheduler import Priority, RequestScheduler
+from .session_budget import SessionBudget
+from .speculation import Speculator
+from .usage import UsageLedger
+
+if TYPE_CHECKING:
+    from openai.types.images_response import ImagesResponse
+    from openai.types.responses import (
+        Response,
+        ResponseInputImageParam,
+        ResponseInputMessageContentListParam,
+        ResponseInputParam,
+    )
 
 SERVICE_GENERATE_IMAGE = "generate_image"
 SERVICE_GENERATE_CONTENT = "generate_content"
-PLATFORMS = (Platform.CONVERSATION,)
+SERVICE_PROFILE = "profile"
+SERVICE_SPECULATE = "speculate"
+
+# Jobs of a single generate_content call
+MAX_JOBS = 20
+PLATFORMS = (Platform.CONVERSATION, Platform.SENSOR)
 CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
-type OpenAIPlusConfigEntry = ConfigEntry[openai.AsyncClient]
+
+@dataclass
+class OpenAIPlusData:
+    """Runtime data of an OpenAI Conversation Plus config entry."""
+
+    endpoints: EndpointPool
+    realtime: RealtimeSessions
+    prompt_cache: PromptCache
+    sessions: SessionBudget
+    usage: UsageLedger
+    live_context: LiveContextEncoder
+    speculator: Speculator
+    scheduler: RequestScheduler
+    latency: LatencyController | None = None
+
+
+type OpenAIPlusConfigEntry = ConfigEntry[OpenAIPlusData]
 
 
 def encode_file(file_path: str) -> tuple[str, str]:
@@ -70,9 +135,42 @@ def encode_file(file_path: str) -> tuple[str, str]:
         return mime_type, base64.b64encode(image_file.read()).decode("utf-8")
 
 
+def encode_image(hass: HomeAssistant, filename: str) -> ResponseInputImageParam:
+    """Return an image file as input of a request."""
+    if not hass.config.is_allowed_path(filename):
+        raise HomeAssistantError(
+            f"Cannot read `{filename}`, no access to path; "
+            "`allowlist_external_dirs` may need to be adjusted in "
+            "`configuration.yaml`"
+        )
+    if not Path(filename).exists():
+        raise HomeAssistantError(f"`{filename}` does not exist")
+    mime_type, base64_file = encode_file(filename)
+    if "image/" not in mime_type:
+        raise HomeAssistantError(
+            "Only images are supported by the OpenAI API,"
+            f"`{filename}` is not an image file"
+        )
+    return {
+        "type": "input_image",
+        "file_id": filename,
+        "image_url": f"data:{mime_type};base64,{base64_file}",
+        "detail": "auto",
+    }
+
+
+def _service_priority(call: ServiceCall) -> Priority:
+    """Return the scheduling priority of a service call."""
+    if call.context.user_id is not None:
+        return Priority.CHAT
+    return Priority.AUTOMATION
+
+
 # noinspection PyUnusedLocal
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa: C901
     """Set up OpenAI Conversation Plus."""
+    image_cache = hass.data[DATA_IMAGE_CACHE] = ImageCache(hass)
+    await image_cache.async_load()
 
     async def render_image(call: ServiceCall) -> ServiceResponse:
         """Render an image with dall-e."""
@@ -86,24 +184,130 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa:
                 translation_placeholders={"config_entry": entry_id},
             )
 
-        client: openai.AsyncClient = entry.runtime_data
+        # Loaded in the executor when the config entry was set up
+        import openai  # noqa: PLC0415
+
+        runtime_data: OpenAIPlusData = entry.runtime_data
+        image_args = {
+            "model": "dall-e-3",
+            "prompt": call.data[CONF_PROMPT],
+            "size": call.data["size"],
+            "quality": call.data["quality"],
+            "style": call.data["style"],
+        }
+        local_cache = call.data[CONF_LOCAL_CACHE]
+        if local_cache:
+            key = cache_key(image_args)
+            if (cached := image_cache.async_get(key)) is not None:
+                return {
+                    "url": image_cache.url(cached),
+                    "revised_prompt": cached["revised_prompt"],
+                }
 
+        runtime_data.usage.async_check(call.context.user_id)
         try:
-            response: ImagesResponse = await client.images.generate(
-                model="dall-e-3",
-                prompt=call.data[CONF_PROMPT],
-                size=call.data["size"],
-                quality=call.data["quality"],
-                style=call.data["style"],
-                response_format="url",
-                n=1,
-            )
+            async with runtime_data.scheduler.slot(_service_priority(call)):
+                response: ImagesResponse = await runtime_data.endpoints.async_call(
+                    lambda client: client.images.generate(
+                        **image_args,
+                        response_format="b64_json" if local_cache else "url",
+                        n=1,
+                    )
+                )
         except openai.OpenAIError as err:
             raise HomeAssistantError(f"Error generating image: {err}") from err
+        runtime_data.usage.async_record(
+            SERVICE_GENERATE_IMAGE,
+            call.context.user_id,
+            requests=1,
+            images=len(response.data),
+        )
+
+        image = response.data[0]
+        if not local_cache or image.b64_json is None:
+            return image.model_dump(exclude={"b64_json"})
+
+        cached = await image_cache.async_add(key, image.b64_json, image.revised_prompt)
+        return {"url": image_cache.url(cached), "revised_prompt": image.revised_prompt}
+
+    async def generate_content(
+        entry: OpenAIPlusConfigEntry,
+        call: ServiceCall,
+        prompt: str,
+        filenames: list[str],
+    ) -> dict[str, Any]:
+        """Generate content for a prompt and the images attached to it."""
+        # Loaded in the executor when the config entry was set up
+        import openai  # noqa: PLC0415
+
+        model: str = entry.options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+        runtime_data: OpenAIPlusData = entry.runtime_data
+
+        content: ResponseInputMessageContentListParam = [
+            {"type": "input_text", "text": prompt}
+        ]
+        # Each file is read and encoded in its own executor job
+        content.extend(
+            await asyncio.gather(
+                *(
+                    hass.async_add_executor_job(encode_image, hass, filename)
+                    for filename in filenames
+                )
+            )
+        )
+
+        messages: ResponseInputParam = [
+            {"type": "message", "role": "user", "content": content}
+        ]
 
-        return response.data[0].model_dump(exclude={"b64_json"})
+        model_args = {
+            "model": model,
+            "input": messages,
+            "max_output_tokens": entry.options.get(
+                CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS
+            ),
+            "top_p": entry.options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
+            "temperature": entry.options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
+            "user": call.context.user_id,
+            "store": False,
+        }
+
+        if model.startswith("o"):
+            model_args["reasoning"] = {
+                "effort": entry.options.get(
+                    CONF_REASONING_EFFORT, RECOMMENDED_REASONING_EFFORT
+                )
+            }
+
+        async def generate() -> dict[str, Any]:
+            runtime_data.usage.async_check(call.context.user_id)
+            try:
+                async with runtime_data.scheduler.slot(_service_priority(call)):
+                    response: Response = await runtime_data.endpoints.async_call(
+                        lambda client: client.responses.create(**model_args)
+                    )
+            except openai.OpenAIError as err:
+                raise HomeAssistantError(f"Error generating content: {err}") from err
+            if response.usage is not None:
+                runtime_data.usage.async_record(
+                    SERVICE_GENERATE_CONTENT,
+                    call.context.user_id,
+                    input_tokens=response.usage.input_tokens,
+                    output_tokens=response.usage.output_tokens,
+                    requests=1,
+                )
+            return {"text": response.output_text}
+
+        if not (cache_ttl := call.data[CONF_CACHE_TTL]):
+            return await generate()
 
-    async def send_prompt(call: ServiceCall) -> ServiceResponse:  # noqa: C901
+        # Identical requests share the cached response, whoever asked
+        key = cache_key({k: v for k, v in model_args.items() if k != "user"})
+        return await runtime_data.prompt_cache.async_get(
+            key, cache_ttl, call.data[CONF_STALE_TTL], generate
+        )
+
+    async def send_prompt(call: ServiceCall) -> ServiceResponse:
         """Send a prompt to ChatGPT and return the response."""
         entry_id = call.data["config_entry"]
         entry = hass.config_entries.async_get_entry(entry_id)
@@ -115,75 +319,56 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa:
                 translation_placeholders={"config_entry": entry_id},
             )
 
-        model: str = entry.options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
-        client: openai.AsyncClient = entry.runtime_data
-
-        content: ResponseInputMessageContentListParam = [
-            ResponseInputTextParam(type="input_text", text=call.data[CONF_PROMPT])
-        ]
+        if CONF_JOBS not in call.data:
+            return await generate_content(
+                entry, call, call.data[CONF_PROMPT], call.data[CONF_FILENAMES]
+            )
 
-        def append_files_to_content() -> None:
-            for filename in call.data[CONF_FILENAMES]:
-                if not hass.config.is_allowed_path(filename):
-                    raise HomeAssistantError(
-                        f"Cannot read `{filename}`, no access to path; "
-                        "`allowlist_external_dirs` may need to be adjusted in "
-                        "`configuration.yaml`"
-                    )
-                if not Path(filename).exists():
-                    raise HomeAssistantError(f"`{filename}` does not exist")
-                mime_type, base64_file = encode_file(filename)
-                if "image/" not in mime_type:
-                    raise HomeAssistantError(
-                        "Only images are supported by the OpenAI API,"
-                        f"`{filename}` is not an image file"
-                    )
-                content.append(
-                    ResponseInputImageParam(
-                        type="input_image",
-                        file_id=filename,
-                        image_url=f"data:{mime_type};base64,{base64_file}",
-                        detail="auto",
+        # More jobs would only wait for a request slot, with their files
+        # already encoded and held in memory
+        max_parallel = min(
+            call.data[CONF_MAX_PARALLEL], entry.runtime_data.scheduler.max_in_flight
+        )
+        if max_parallel < call.data[CONF_MAX_PARALLEL]:
+            LOGGER.debug(
+                "Running %d jobs at a time, the maximum concurrent requests",
+                max_parallel,
+            )
+        semaphore = asyncio.Semaphore(max_parallel)
+
+        async def run(job: dict[str, Any]) -> dict[str, Any]:
+            queued = time.monotonic()
+            async with semaphore:
+                started = time.monotonic()
+                try:
+                    result = await generate_content(
+                        entry, call, job[CONF_PROMPT], job[CONF_FILENAMES]
                     )
-                )
-
-        if CONF_FILENAMES in call.data:
-            await hass.async_add_executor_job(append_files_to_content)
-
-        messages: ResponseInputParam = [
-            EasyInputMessageParam(type="message", role="user", content=content)
-        ]
-
-        try:
-            model_args = {
-                "model": model,
-                "input": messages,
-                "max_output_tokens": entry.options.get(
-                    CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS
-                ),
-                "top_p": entry.options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
-                "temperature": entry.options.get(
-                    CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE
-                ),
-                "user": call.context.user_id,
-                "store": False,
+                except HomeAssistantError as err:
+                    result = {"error": str(err)}
+                except Exception as err:  # noqa: BLE001
+                    # One broken job must not fail the others, such as a
+                    # directory passed as a file
+                    LOGGER.exception("Unexpected error in generate_content job")
+                    result = {"error": str(err) or type(err).__name__}
+            return {
+                **result,
+                "wait": round(started - queued, 3),
+                "duration": round(time.monotonic() - started, 3),
             }
 
-            if model.startswith("o"):
-                model_args["reasoning"] = {
-                    "effort": entry.options.get(
-                        CONF_REASONING_EFFORT, RECOMMENDED_REASONING_EFFORT
-                    )
-                }
-
-            response: Response = await client.responses.create(**model_args)
-
-        except openai.OpenAIError as err:
-            raise HomeAssistantError(f"Error generating content: {err}") from err
-        except FileNotFoundError as err:
-            raise HomeAssistantError(f"Error generating content: {err}") from err
+        started = time.monotonic()
+        results = await asyncio.gather(*(run(job) for job in call.data[CONF_JOBS]))
+        return {
+            "results": results,
+            "duration": round(time.monotonic() - started, 3),
+        }
 
-        return {"text": response.output_text}
+    async def profile(call: ServiceCall) -> ServiceResponse:
+        """Profile the next conversation turns."""
+        return await async_profile(
+            hass, call.data[CONF_PROFILE_TURNS], call.data[CONF_PROFILE_DURATION]
+        )
 
     hass.services.async_register(
         DOMAIN,
@@ -202,6 +387,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa:
                 ),
                 vol.Optional("quality", default="standard"): vol.In(("standard", "hd")),
                 vol.Optional("style", default="vivid"): vol.In(("vivid", "natural")),
+                vol.Optional(CONF_LOCAL_CACHE, default=False): cv.boolean,
             }
         ),
         supports_response=SupportsResponse.ONLY,
@@ -211,6 +397,76 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa:
         DOMAIN,
         SERVICE_GENERATE_CONTENT,
         send_prompt,
+        schema=vol.All(
+            vol.Schema(
+                {
+                    vol.Required("config_entry"): selector.ConfigEntrySelector(
+                        {
+                            "integration": DOMAIN,
+                        }
+                    ),
+                    vol.Exclusive(CONF_PROMPT, "prompt"): cv.string,
+                    vol.Optional(CONF_FILENAMES, default=[]): vol.All(
+                        cv.ensure_list, [cv.string]
+                    ),
+                    vol.Exclusive(CONF_JOBS, "prompt"): vol.All(
+                        cv.ensure_list,
+                        [
+                            vol.Schema(
+                                {
+                                    vol.Required(CONF_PROMPT): cv.string,
+                                    vol.Optional(CONF_FILENAMES, default=[]): vol.All(
+                                        cv.ensure_list, [cv.string]
+                                    ),
+                                }
+                            )
+                        ],
+                        vol.Length(min=1, max=MAX_JOBS),
+                    ),
+                    vol.Optional(CONF_MAX_PARALLEL, default=4): vol.All(
+                        vol.Coerce(int), vol.Range(min=1, max=MAX_JOBS)
+                    ),
+                    vol.Optional(CONF_CACHE_TTL, default=0): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
+                    vol.Optional(CONF_STALE_TTL, default=0): vol.All(
+                        vol.Coerce(float), vol.Range(min=0)
+                    ),
+                }
+            ),
+            cv.has_at_least_one_key(CONF_PROMPT, CONF_JOBS),
+        ),
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def speculate(call: ServiceCall) -> None:
+        """Prepare a conversation turn for a partial speech transcript."""
+        entry_id = call.data["config_entry"]
+        entry = hass.config_entries.async_get_entry(entry_id)
+
+        if entry is None or entry.domain != DOMAIN:
+            raise ServiceValidationError(
+                translation_domain=DOMAIN,
+                translation_key="invalid_config_entry",
+                translation_placeholders={"config_entry": entry_id},
+            )
+
+        runtime_data: OpenAIPlusData = entry.runtime_data
+        runtime_data.speculator.async_partial(
+            conversation.ConversationInput(
+                text=call.data["text"],
+                context=call.context,
+                conversation_id=call.data.get("conversation_id"),
+                device_id=call.data.get("device_id"),
+                language=call.data.get("language", hass.config.language),
+                agent_id=entry.entry_id,
+            )
+        )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SPECULATE,
+        speculate,
         schema=vol.Schema(
             {
                 vol.Required("config_entry"): selector.ConfigEntrySelector(
@@ -218,9 +474,25 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa:
                         "integration": DOMAIN,
                     }
                 ),
-                vol.Required(CONF_PROMPT): cv.string,
-                vol.Optional(CONF_FILENAMES, default=[]): vol.All(
-                    cv.ensure_list, [cv.string]
+                vol.Required("text"): cv.string,
+                vol.Optional("conversation_id"): cv.string,
+                vol.Optional("device_id"): cv.string,
+                vol.Optional("language"): cv.string,
+            }
+        ),
+    )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        profile,
+        schema=vol.Schema(
+            {
+                vol.Optional(CONF_PROFILE_TURNS, default=5): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=100)
+                ),
+                vol.Optional(CONF_PROFILE_DURATION, default=60): vol.All(
+                    vol.Coerce(float), vol.Range(min=1, max=3600)
                 ),
             }
         ),
@@ -233,6 +505,8 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:  # noqa:
 # noinspection PyTypeChecker
 async def async_setup_entry(hass: HomeAssistant, entry: OpenAIPlusConfigEntry) -> bool:
     """Set up OpenAI Conversation Plus from a config entry."""
+    # The SDK is large, import it only once an entry is set up and off the loop
+    openai = await async_import_module(hass, "openai")
     client = openai.AsyncOpenAI(
         api_key=entry.data[CONF_API_KEY],
         base_url=entry.data.get(CONF_BASE_URL),
@@ -250,7 +524,82 @@ async def async_setup_entry(hass: HomeAssistant, entry: OpenAIPlusConfigEntry) -
     except openai.OpenAIError as err:
         raise ConfigEntryNotReady(err) from err
 
-    entry.runtime_data = client
+    endpoints = [Endpoint(entry.data.get(CONF_BASE_URL), 1.0, client)]
+    endpoints.extend(
+        Endpoint(
+            endpoint[CONF_BASE_URL],
+            float(endpoint.get(CONF_ENDPOINT_WEIGHT, 1.0)),
+            openai.AsyncOpenAI(
+                api_key=endpoint.get(CONF_API_KEY, entry.data[CONF_API_KEY]),
+                base_url=endpoint[CONF_BASE_URL],
+                http_client=get_async_client(hass),
+            ),
+        )
+        for endpoint in entry.options.get(CONF_ENDPOINTS) or []
+    )
+    entry.runtime_data = OpenAIPlusData(
+        endpoints=EndpointPool(
+            endpoints, entry.options.get(CONF_HEDGING, RECOMMENDED_HEDGING)
+        ),
+        realtime=RealtimeSessions(
+            hass, entry.data.get(CONF_BASE_URL), entry.data[CONF_API_KEY]
+        ),
+        prompt_cache=PromptCache(hass, entry.entry_id),
+        sessions=SessionBudget(
+            int(
+                entry.options.get(
+                    CONF_SESSION_MAX_MESSAGES, RECOMMENDED_SESSION_MAX_MESSAGES
+                )
+            ),
+            # Configured in kB
+            int(entry.options.get(CONF_SESSION_MAX_SIZE, RECOMMENDED_SESSION_MAX_SIZE))
+            * 1000,
+        ),
+        live_context=LiveContextEncoder(),
+        speculator=Speculator(
+            hass,
+            entry.options.get(
+                CONF_SPECULATIVE_REQUESTS, RECOMMENDED_SPECULATIVE_REQUESTS
+            ),
+        ),
+        scheduler=RequestScheduler(
+            int(entry.options.get(CONF_MAX_IN_FLIGHT, RECOMMENDED_MAX_IN_FLIGHT))
+        ),
+        usage=UsageLedger(
+            hass,
+            entry.entry_id,
+            int(entry.options.get(CONF_USER_TOKEN_QUOTA, RECOMMENDED_USER_TOKEN_QUOTA)),
+            int(
+                entry.options.get(
+                    CONF_NO_USER_TOKEN_QUOTA, RECOMMENDED_NO_USER_TOKEN_QUOTA
+                )
+            ),
+        ),
+    )
+    await entry.runtime_data.prompt_cache.async_load()
+    await entry.runtime_data.usage.async_load()
+    entry.async_on_unload(entry.runtime_data.usage.async_setup())
+    entry.async_on_unload(entry.runtime_data.realtime.async_close)
+
+    if latency_target := entry.options.get(
+        CONF_LATENCY_TARGET, RECOMMENDED_LATENCY_TARGET
+    ):
+        model = entry.options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+        entry.runtime_data.latency = LatencyController(
+            float(latency_target),
+            # Reasoning effort only applies to reasoning models
+            entry.options.get(CONF_REASONING_EFFORT, RECOMMENDED_REASONING_EFFORT)
+            if model.startswith("o")
+            else None,
+            entry.options.get(
+                CONF_WEB_SEARCH_CONTEXT_SIZE, RECOMMENDED_WEB_SEARCH_CONTEXT_SIZE
+            )
+            if entry.options.get(CONF_WEB_SEARCH)
+            else None,
+            None
+            if model.startswith("o")
+            else entry.options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS),
+        )
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
@@ -6,7 +6,6 @@ import logging
 from types import MappingProxyType
 from typing import Any
 
-import openai
 import voluptuous as vol
 
 from homeassistant.config_entries import (
@@ -19,9 +18,11 @@ from homeassistant.const import CONF_API_KEY, CONF_LLM_HASS_API
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers import llm
 from homeassistant.helpers.httpx_client import get_async_client
+from homeassistant.helpers.importlib import async_import_module
 from homeassistant.helpers.selector import (
     NumberSelector,
     NumberSelectorConfig,
+    NumberSelectorMode,
     ObjectSelector,
     SelectOptionDict,
     SelectSelector,
@@ -34,16 +35,32 @@ from homeassistant.helpers.typing import VolDictType
 from .const import (
     CONF_BASE_URL,
     CONF_CHAT_MODEL,
+    CONF_ENDPOINT_WEIGHT,
+    CONF_ENDPOINTS,
+    CONF_HEDGING,
+    CONF_LATENCY_TARGET,
+    CONF_LIVE_CONTEXT_DELTA,
+    CONF_MAX_IN_FLIGHT,
     CONF_MAX_TOKENS,
     CONF_MEMORY_API_KEY,
     CONF_MEMORY_URL,
     CONF_MEMORY_USER_ID_MAP,
+    CONF_NO_USER_TOKEN_QUOTA,
     CONF_PROMPT,
+    CONF_PROMPT_CACHE_LAYOUT,
+    CONF_REALTIME,
     CONF_REASONING_EFFORT,
     CONF_RECOMMENDED,
+    CONF_SESSION_MAX_MESSAGES,
+    CONF_SESSION_MAX_SIZE,
     CONF_SMART_CHAT_MODEL,
+    CONF_SPECULATIVE_REQUESTS,
     CONF_TEMPERATURE,
+    CONF_TOOL_SELECTION,
+    CONF_TOOL_SELECTION_ALWAYS_INCLUDE,
+    CONF_TOOL_SELECTION_TOP_K,
     CONF_TOP_P,
+    CONF_USER_TOKEN_QUOTA,
     CONF_WEB_SEARCH,
     CONF_WEB_SEARCH_CITY,
     CONF_WEB_SEARCH_CONTEXT_SIZE,
@@ -53,16 +70,30 @@ from .const import (
     CONF_WEB_SEARCH_USER_LOCATION,
     DOMAIN,
     RECOMMENDED_CHAT_MODEL,
+    RECOMMENDED_HEDGING,
+    RECOMMENDED_LATENCY_TARGET,
+    RECOMMENDED_LIVE_CONTEXT_DELTA,
+    RECOMMENDED_MAX_IN_FLIGHT,
     RECOMMENDED_MAX_TOKENS,
+    RECOMMENDED_NO_USER_TOKEN_QUOTA,
+    RECOMMENDED_PROMPT_CACHE_LAYOUT,
+    RECOMMENDED_REALTIME,
     RECOMMENDED_REASONING_EFFORT,
+    RECOMMENDED_SESSION_MAX_MESSAGES,
+    RECOMMENDED_SESSION_MAX_SIZE,
     RECOMMENDED_SMART_CHAT_MODEL,
+    RECOMMENDED_SPECULATIVE_REQUESTS,
     RECOMMENDED_TEMPERATURE,
+    RECOMMENDED_TOOL_SELECTION,
+    RECOMMENDED_TOOL_SELECTION_TOP_K,
     RECOMMENDED_TOP_P,
+    RECOMMENDED_USER_TOKEN_QUOTA,
     RECOMMENDED_WEB_SEARCH,
     RECOMMENDED_WEB_SEARCH_CONTEXT_SIZE,
     RECOMMENDED_WEB_SEARCH_USER_LOCATION,
     UNSUPPORTED_MODELS,
 )
+from .realtime import is_realtime_model
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -85,6 +116,7 @@ async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> None:
 
     Data has the keys from STEP_USER_DATA_SCHEMA with values provided by the user.
     """
+    openai = await async_import_module(hass, "openai")
     client = openai.AsyncOpenAI(
         api_key=data[CONF_API_KEY],
         base_url=data.get(CONF_BASE_URL),
@@ -110,6 +142,7 @@ class OpenAIPlusConfigFlow(ConfigFlow, domain=DOMAIN):
             )
 
         errors: dict[str, str] = {}
+        openai = await async_import_module(self.hass, "openai")
 
         try:
             await validate_input(self.hass, user_input)
@@ -161,8 +194,10 @@ class OpenAIPlusOptionsFlow(OptionsFlow):
                 if user_input[CONF_LLM_HASS_API] == "none":
                     user_input.pop(CONF_LLM_HASS_API)
 
-                if user_input.get(CONF_CHAT_MODEL) in UNSUPPORTED_MODELS:
-                    errors[CONF_CHAT_MODEL] = "model_not_supported"
+                if not _valid_endpoints(user_input.get(CONF_ENDPOINTS)):
+                    errors[CONF_ENDPOINTS] = "invalid_endpoints"
+                elif (error := _chat_model_error(user_input)) is not None:
+                    errors[CONF_CHAT_MODEL] = error
                 elif user_input.get(CONF_SMART_CHAT_MODEL) in UNSUPPORTED_MODELS:
                     errors[CONF_SMART_CHAT_MODEL] = "model_not_supported"
                 else:
@@ -178,6 +213,8 @@ class OpenAIPlusOptionsFlow(OptionsFlow):
                     CONF_MEMORY_API_KEY: user_input[CONF_MEMORY_API_KEY],
                     CONF_MEMORY_URL: user_input[CONF_MEMORY_URL],
                     CONF_MEMORY_USER_ID_MAP: user_input[CONF_MEMORY_USER_ID_MAP],
+                    CONF_ENDPOINTS: user_input.get(CONF_ENDPOINTS),
+                    CONF_HEDGING: user_input[CONF_HEDGING],
                 }
 
         schema = await openai_config_option_schema(self.hass, options)
@@ -188,6 +225,35 @@ class OpenAIPlusOptionsFlow(OptionsFlow):
         )
 
 
+def _chat_model_error(user_input: dict[str, Any]) -> str | None:
+    """Return the error of the chat model for the selected transport, if any."""
+    model = user_input.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+    if user_input.get(CONF_REALTIME):
+        return None if is_realtime_model(model) else "realtime_model_required"
+    if model in UNSUPPORTED_MODELS or is_realtime_model(model):
+        return "model_not_supported"
+    return None
+
+
+def _valid_endpoints(endpoints: Any) -> bool:
+    """Return whether the additional endpoints are a list of base URLs and weights."""
+    if endpoints is None:
+        return True
+    if not isinstance(endpoints, list):
+        return False
+    for endpoint in endpoints:
+        if not isinstance(endpoint, dict) or not isinstance(
+            endpoint.get(CONF_BASE_URL), str
+        ):
+            return False
+        try:
+            if float(endpoint.get(CONF_ENDPOINT_WEIGHT, 1.0)) <= 0:
+                return False
+        except (TypeError, ValueError):
+            return False
+    return True
+
+
 async def openai_config_option_schema(
     hass: HomeAssistant,
     options: dict[str, Any] | MappingProxyType[str, Any],
@@ -243,6 +309,13 @@ async def openai_config_option_schema(
             CONF_MEMORY_USER_ID_MAP,
             description={"suggested_value": user_id_map},
         ): ObjectSelector(),
+        vol.Optional(
+            CONF_ENDPOINTS,
+            description={"suggested_value": options.get(CONF_ENDPOINTS)},
+        ): ObjectSelector(),
+        vol.Required(
+            CONF_HEDGING, default=options.get(CONF_HEDGING, RECOMMENDED_HEDGING)
+        ): bool,
     }
 
     if options.get(CONF_RECOMMENDED):
@@ -337,6 +410,83 @@ async def openai_config_option_schema(
                 },
                 default=RECOMMENDED_WEB_SEARCH_USER_LOCATION,
             ): bool,
+            vol.Optional(
+                CONF_TOOL_SELECTION,
+                description={"suggested_value": options.get(CONF_TOOL_SELECTION)},
+                default=RECOMMENDED_TOOL_SELECTION,
+            ): bool,
+            vol.Optional(
+                CONF_TOOL_SELECTION_TOP_K,
+                description={"suggested_value": options.get(CONF_TOOL_SELECTION_TOP_K)},
+                default=RECOMMENDED_TOOL_SELECTION_TOP_K,
+            ): NumberSelector(NumberSelectorConfig(min=1, max=64, step=1)),
+            vol.Optional(
+                CONF_TOOL_SELECTION_ALWAYS_INCLUDE,
+                description={
+                    "suggested_value": options.get(CONF_TOOL_SELECTION_ALWAYS_INCLUDE)
+                },
+                default=[],
+            ): SelectSelector(
+                SelectSelectorConfig(options=[], multiple=True, custom_value=True)
+            ),
+            vol.Optional(
+                CONF_PROMPT_CACHE_LAYOUT,
+                description={"suggested_value": options.get(CONF_PROMPT_CACHE_LAYOUT)},
+                default=RECOMMENDED_PROMPT_CACHE_LAYOUT,
+            ): bool,
+            vol.Optional(
+                CONF_LIVE_CONTEXT_DELTA,
+                description={"suggested_value": options.get(CONF_LIVE_CONTEXT_DELTA)},
+                default=RECOMMENDED_LIVE_CONTEXT_DELTA,
+            ): bool,
+            vol.Optional(
+                CONF_SPECULATIVE_REQUESTS,
+                description={"suggested_value": options.get(CONF_SPECULATIVE_REQUESTS)},
+                default=RECOMMENDED_SPECULATIVE_REQUESTS,
+            ): bool,
+            vol.Optional(
+                CONF_REALTIME,
+                description={"suggested_value": options.get(CONF_REALTIME)},
+                default=RECOMMENDED_REALTIME,
+            ): bool,
+            vol.Optional(
+                CONF_LATENCY_TARGET,
+                description={"suggested_value": options.get(CONF_LATENCY_TARGET)},
+                default=RECOMMENDED_LATENCY_TARGET,
+            ): NumberSelector(
+                NumberSelectorConfig(min=0, max=30, step=0.1, unit_of_measurement="s")
+            ),
+            vol.Optional(
+                CONF_MAX_IN_FLIGHT,
+                description={"suggested_value": options.get(CONF_MAX_IN_FLIGHT)},
+                default=RECOMMENDED_MAX_IN_FLIGHT,
+            ): NumberSelector(NumberSelectorConfig(min=1, max=32, step=1)),
+            vol.Optional(
+                CONF_SESSION_MAX_MESSAGES,
+                description={"suggested_value": options.get(CONF_SESSION_MAX_MESSAGES)},
+                default=RECOMMENDED_SESSION_MAX_MESSAGES,
+            ): NumberSelector(NumberSelectorConfig(min=0, max=1000, step=1)),
+            vol.Optional(
+                CONF_SESSION_MAX_SIZE,
+                description={"suggested_value": options.get(CONF_SESSION_MAX_SIZE)},
+                default=RECOMMENDED_SESSION_MAX_SIZE,
+            ): NumberSelector(
+                NumberSelectorConfig(min=0, max=10000, step=1, unit_of_measurement="kB")
+            ),
+            vol.Optional(
+                CONF_USER_TOKEN_QUOTA,
+                description={"suggested_value": options.get(CONF_USER_TOKEN_QUOTA)},
+                default=RECOMMENDED_USER_TOKEN_QUOTA,
+            ): NumberSelector(
+                NumberSelectorConfig(min=0, step=1000, mode=NumberSelectorMode.BOX)
+            ),
+            vol.Optional(
+                CONF_NO_USER_TOKEN_QUOTA,
+                description={"suggested_value": options.get(CONF_NO_USER_TOKEN_QUOTA)},
+                default=RECOMMENDED_NO_USER_TOKEN_QUOTA,
+            ): NumberSelector(
+                NumberSelectorConfig(min=0, step=1000, mode=NumberSelectorMode.BOX)
+            ),
         }
     )
     return schema
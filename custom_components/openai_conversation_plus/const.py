@@ -6,10 +6,20 @@ DOMAIN = "openai_conversation_plus"
 LOGGER = logging.getLogger(__package__)
 
 CONF_BASE_URL = "base_url"
+CONF_ENDPOINTS = "endpoints"
+CONF_ENDPOINT_WEIGHT = "weight"
+CONF_HEDGING = "hedging"
 CONF_RECOMMENDED = "recommended"
 CONF_PROMPT = "prompt"
 CONF_CHAT_MODEL = "chat_model"
 CONF_FILENAMES = "filenames"
+CONF_JOBS = "jobs"
+CONF_MAX_PARALLEL = "max_parallel"
+CONF_PROFILE_TURNS = "turns"
+CONF_PROFILE_DURATION = "duration"
+CONF_CACHE_TTL = "cache_ttl"
+CONF_STALE_TTL = "stale_ttl"
+CONF_LOCAL_CACHE = "local_cache"
 CONF_SMART_CHAT_MODEL = "smart_chat_model"
 CONF_MEMORY_API_KEY = "memory_api_key"
 CONF_MEMORY_URL = "memory_url"
@@ -34,6 +44,32 @@ CONF_TEMPERATURE = "temperature"
 RECOMMENDED_TEMPERATURE = 1.0
 CONF_REASONING_EFFORT = "reasoning_effort"
 RECOMMENDED_REASONING_EFFORT = "low"
+CONF_TOOL_SELECTION = "tool_selection"
+CONF_TOOL_SELECTION_TOP_K = "tool_selection_top_k"
+CONF_TOOL_SELECTION_ALWAYS_INCLUDE = "tool_selection_always_include"
+RECOMMENDED_TOOL_SELECTION = False
+RECOMMENDED_TOOL_SELECTION_TOP_K = 8
+CONF_PROMPT_CACHE_LAYOUT = "prompt_cache_layout"
+RECOMMENDED_PROMPT_CACHE_LAYOUT = False
+CONF_LIVE_CONTEXT_DELTA = "live_context_delta"
+RECOMMENDED_LIVE_CONTEXT_DELTA = False
+CONF_SPECULATIVE_REQUESTS = "speculative_requests"
+RECOMMENDED_SPECULATIVE_REQUESTS = False
+CONF_REALTIME = "realtime"
+RECOMMENDED_REALTIME = False
+CONF_LATENCY_TARGET = "latency_target"
+RECOMMENDED_LATENCY_TARGET = 0.0
+CONF_SESSION_MAX_MESSAGES = "session_max_messages"
+RECOMMENDED_SESSION_MAX_MESSAGES = 0
+CONF_SESSION_MAX_SIZE = "session_max_size"
+RECOMMENDED_SESSION_MAX_SIZE = 0
+CONF_USER_TOKEN_QUOTA = "user_token_quota"
+RECOMMENDED_USER_TOKEN_QUOTA = 0
+CONF_NO_USER_TOKEN_QUOTA = "no_user_token_quota"
+RECOMMENDED_NO_USER_TOKEN_QUOTA = 0
+RECOMMENDED_HEDGING = False
+CONF_MAX_IN_FLIGHT = "max_in_flight"
+RECOMMENDED_MAX_IN_FLIGHT = 4
 
 UNSUPPORTED_MODELS = [
     "o1-mini",
@@ -1,33 +1,20 @@
 """Conversation support for OpenAI."""
+
+from __future__ import annotations
+
 import asyncio
-from collections.abc import AsyncGenerator, Callable
+from collections.abc import AsyncGenerator, Awaitable, Callable, Coroutine
+import contextlib
+from dataclasses import dataclass, field
 from datetime import datetime
+from functools import partial
 import json
-from typing import Any, Literal
-
-import openai
-from openai._streaming import AsyncStream
-from openai.types.responses import (
-    EasyInputMessageParam,
-    FunctionToolParam,
-    ResponseCompletedEvent,
-    ResponseErrorEvent,
-    ResponseFailedEvent,
-    ResponseFunctionCallArgumentsDeltaEvent,
-    ResponseFunctionCallArgumentsDoneEvent,
-    ResponseFunctionToolCall,
-    ResponseFunctionToolCallParam,
-    ResponseIncompleteEvent,
-    ResponseInputParam,
-    ResponseOutputItemAddedEvent,
-    ResponseOutputMessage,
-    ResponseStreamEvent,
-    ResponseTextDeltaEvent,
-    ToolParam,
-    WebSearchToolParam,
-)
-from openai.types.responses.response_input_param import FunctionCallOutput
-from openai.types.responses.web_search_tool_param import UserLocation
+import logging
+import re
+import time
+from typing import TYPE_CHECKING, Any, Literal
+
+import voluptuous as vol
 from voluptuous_openapi import convert
 
 from homeassistant.components import assist_pipeline, conversation
@@ -42,10 +29,16 @@ from homeassistant.util import dt as dt_util
 from . import OpenAIPlusConfigEntry
 from .const import (
     CONF_CHAT_MODEL,
+    CONF_LIVE_CONTEXT_DELTA,
     CONF_MAX_TOKENS,
     CONF_PROMPT,
+    CONF_PROMPT_CACHE_LAYOUT,
+    CONF_REALTIME,
     CONF_REASONING_EFFORT,
     CONF_TEMPERATURE,
+    CONF_TOOL_SELECTION,
+    CONF_TOOL_SELECTION_ALWAYS_INCLUDE,
+    CONF_TOOL_SELECTION_TOP_K,
     CONF_TOP_P,
     CONF_WEB_SEARCH,
     CONF_WEB_SEARCH_CITY,
@@ -57,17 +50,72 @@ from .const import (
     DOMAIN,
     LOGGER as _LOGGER,
     RECOMMENDED_CHAT_MODEL,
+    RECOMMENDED_LIVE_CONTEXT_DELTA,
     RECOMMENDED_MAX_TOKENS,
+    RECOMMENDED_PROMPT_CACHE_LAYOUT,
+    RECOMMENDED_REALTIME,
     RECOMMENDED_REASONING_EFFORT,
     RECOMMENDED_TEMPERATURE,
+    RECOMMENDED_TOOL_SELECTION_TOP_K,
     RECOMMENDED_TOP_P,
     RECOMMENDED_WEB_SEARCH_CONTEXT_SIZE,
 )
+from .endpoints import PrimedStream
+from .latency import (
+    SETTING_MAX_OUTPUT_TOKENS,
+    SETTING_REASONING_EFFORT,
+    SETTING_SEARCH_CONTEXT_SIZE,
+)
+from .live_context import LiveContextEncoder
 from .memory import MemorySettings
+from .profiler import TurnTimings, async_get_profiler
+from .realtime import RealtimeSession, RealtimeTimeoutError, session_config
+from .scheduler import Priority, TurnSupersededError
+from .speculation import estimate_input_tokens
+from .tool_arguments import ToolArgumentsParser
+from .tool_selection import ToolIndex, needs_web_search, tool_signature
+from .usage import QuotaExceededError
+
+if TYPE_CHECKING:
+    from openai.types.responses import (
+        FunctionToolParam,
+        ResponseCompletedEvent,
+        ResponseErrorEvent,
+        ResponseFailedEvent,
+        ResponseFunctionCallArgumentsDeltaEvent,
+        ResponseFunctionCallArgumentsDoneEvent,
+        ResponseFunctionToolCall,
+        ResponseIncompleteEvent,
+        ResponseInputParam,
+        ResponseOutputItemAddedEvent,
+        ResponseTextDeltaEvent,
+        ResponseUsage,
+        ToolParam,
+        WebSearchToolParam,
+    )
 
 # Max number of back and forth with the LLM to generate a response
 MAX_TOOL_ITERATIONS = 10
 
+# Streamed deltas logged at debug level, one out of this many
+EVENT_TRACE_SAMPLE_RATE = 50
+
+# Sent when the latency target caps the output tokens
+BREVITY_INSTRUCTIONS = "Keep the reply short, it is cut off after about {words} words."
+WORDS_PER_TOKEN = 0.75
+
+# Number of recent user messages used to rank tools against
+TOOL_SELECTION_USER_MESSAGES = 2
+
+# System prompt lines that change from one request to the next
+_VOLATILE_PROMPT_LINE_RE = re.compile(r"^(Current time is|Today's date is)")
+# Header of the exposed entities listed with their state by Home Assistant
+# 2025.3. Later versions list them without state after "Static Context:",
+# which stays stable, and return the states from the GetLiveContext tool
+_STATEFUL_CONTEXT_HEADER = (
+    "An overview of the areas and the devices in this smart home:"
+)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -79,138 +127,432 @@ async def async_setup_entry(
     async_add_entities([agent])
 
 
+def _turn_priority(user_input: conversation.ConversationInput) -> Priority:
+    """Return the scheduling priority of a conversation turn."""
+    if user_input.device_id is not None:
+        # Someone is waiting on a satellite for the spoken reply
+        return Priority.VOICE
+    if user_input.context.user_id is not None:
+        return Priority.CHAT
+    return Priority.AUTOMATION
+
+
+def _tool_selection_query(chat_log: conversation.ChatLog) -> str:
+    """Return the recent user utterances to rank tools against."""
+    user_messages = [
+        content.content
+        for content in chat_log.content
+        if isinstance(content, conversation.UserContent)
+    ]
+    return "\n".join(user_messages[-TOOL_SELECTION_USER_MESSAGES:])
+
+
 def _format_tool(
     tool: llm.Tool, custom_serializer: Callable[[Any], Any] | None
 ) -> FunctionToolParam:
     """Format tool specification."""
-    return FunctionToolParam(
-        type="function",
-        name=tool.name,
-        parameters=convert(tool.parameters, custom_serializer=custom_serializer),
-        description=tool.description,
-        strict=False,
+    return {
+        "type": "function",
+        "name": tool.name,
+        "parameters": convert(tool.parameters, custom_serializer=custom_serializer),
+        "description": tool.description,
+        "strict": False,
+    }
+
+
+def _schema_key(schema: Any) -> str:
+    """Return a value changing with anything a schema is converted from."""
+    if isinstance(schema, vol.Schema):
+        schema = schema.schema
+    if isinstance(schema, list):
+        return repr([_schema_key(value) for value in schema])
+    if not isinstance(schema, dict):
+        return repr(schema)
+    fields = []
+    for key, value in schema.items():
+        default = getattr(key, "default", vol.UNDEFINED)
+        fields.append(
+            (
+                type(key).__name__,
+                key,
+                getattr(key, "description", None),
+                default() if callable(default) else None,
+                _schema_key(value),
+            )
+        )
+    return repr(fields)
+
+
+async def _async_release_after[_T](
+    stream: AsyncGenerator[_T], release: Callable[[], Awaitable[None]]
+) -> AsyncGenerator[_T]:
+    """Pass on a delta stream, releasing its request slot once it ends.
+
+    The chat log only waits for the tools called by the model after the
+    stream, so a tool sending a request of its own does not wait for the
+    slot of the turn that called it.
+    """
+    try:
+        async for item in stream:
+            yield item
+    finally:
+        await release()
+
+
+async def _async_discard_stream(stream: asyncio.Task[PrimedStream]) -> bool:
+    """Cancel a response stream being started, or close it when it was.
+
+    Returns whether the request may have been billed.
+    """
+    if not stream.done():
+        stream.cancel()
+        # The request may have reached the server already
+        return True
+    if stream.cancelled() or stream.exception() is not None:
+        return False
+    await stream.result().close()
+    return True
+
+
+def _split_system_prompt(prompt: str) -> tuple[str, str]:
+    """Split the system prompt into its stable and volatile parts.
+
+    The volatile part is the current time and date, and the entity states
+    listed after the stateful context header up to the end of its YAML list.
+    """
+    stable: list[str] = []
+    volatile: list[str] = []
+    in_states = False
+    for line in prompt.splitlines():
+        if in_states and (line.startswith(("- ", "  ")) or not line.strip()):
+            volatile.append(line)
+            continue
+        in_states = line.startswith(_STATEFUL_CONTEXT_HEADER)
+        if in_states or _VOLATILE_PROMPT_LINE_RE.match(line):
+            volatile.append(line)
+        else:
+            stable.append(line)
+    return "\n".join(stable).strip(), "\n".join(volatile).strip()
+
+
+def _convert_chat_log(
+    chat_log: conversation.ChatLog,
+    prompt_cache_layout: bool,
+    live_context: LiveContextEncoder | None = None,
+) -> ResponseInputParam:
+    """Convert the chat log to the native format.
+
+    With the prompt cache layout the system prompt is split so that the stable
+    instructions come first and the volatile context (time, entity states) is
+    sent right before the latest user message. The request prefix then stays
+    the same across turns and can be served from the OpenAI prompt cache.
+
+    With a live context encoder the home state is sent before each user
+    message it came with, in full once and then as the changes since the
+    previous turn. So are the results of the GetLiveContext tool.
+    """
+    tool_outputs = (
+        live_context.async_encode_tool_results(
+            chat_log.conversation_id, chat_log.content
+        )
+        if live_context is not None
+        else None
+    )
+    if (not prompt_cache_layout and live_context is None) or not isinstance(
+        chat_log.content[0], conversation.SystemContent
+    ):
+        return [
+            m
+            for content in chat_log.content
+            for m in _convert_content_to_param(content, tool_outputs)
+        ]
+
+    stable, volatile = _split_system_prompt(chat_log.content[0].content)
+    history = chat_log.content[1:]
+    last_user_index = max(
+        (
+            index
+            for index, content in enumerate(history)
+            if isinstance(content, conversation.UserContent)
+        ),
+        default=len(history),
     )
 
+    messages: ResponseInputParam = []
+    if stable:
+        messages.append({"type": "message", "role": "developer", "content": stable})
+    if live_context is not None and (
+        context := live_context.async_encode(
+            chat_log.conversation_id, volatile, history
+        )
+    ):
+        anchors = {id(anchor): text for anchor, text in context}
+        for content in history:
+            if (text := anchors.get(id(content))) is not None:
+                messages.append(
+                    {"type": "message", "role": "developer", "content": text}
+                )
+            messages.extend(_convert_content_to_param(content, tool_outputs))
+        return messages
+    for content in history[:last_user_index]:
+        messages.extend(_convert_content_to_param(content, tool_outputs))
+    if volatile:
+        messages.append({"type": "message", "role": "developer", "content": volatile})
+    for content in history[last_user_index:]:
+        messages.extend(_convert_content_to_param(content, tool_outputs))
+    return messages
+
 
 # noinspection PyTypeChecker
 def _convert_content_to_param(
     content: conversation.Content,
+    tool_outputs: dict[str, str] | None = None,
 ) -> ResponseInputParam:
-    """Convert any native chat message for this agent to the native format."""
+    """Convert any native chat message for this agent to the native format.
+
+    Tool results are sent with the output given for their call, if any.
+    """
     messages: ResponseInputParam = []
     if isinstance(content, conversation.ToolResultContent):
         return [
-            FunctionCallOutput(
-                type="function_call_output",
-                call_id=content.tool_call_id,
-                output=json.dumps(content.tool_result),
-            )
+            {
+                "type": "function_call_output",
+                "call_id": content.tool_call_id,
+                "output": (tool_outputs or {}).get(content.tool_call_id)
+                or json.dumps(content.tool_result),
+            }
         ]
 
     if content.content:
         role: Literal["user", "assistant", "system", "developer"] = content.role
         if role == "system":
             role = "developer"
-        messages.append(
-            EasyInputMessageParam(type="message", role=role, content=content.content)
-        )
+        messages.append({"type": "message", "role": role, "content": content.content})
 
     if isinstance(content, conversation.AssistantContent) and content.tool_calls:
         messages.extend(
-            ResponseFunctionToolCallParam(
-                type="function_call",
-                name=tool_call.tool_name,
-                arguments=json.dumps(tool_call.tool_args),
-                call_id=tool_call.id,
-            )
+            {
+                "type": "function_call",
+                "name": tool_call.tool_name,
+                "arguments": json.dumps(tool_call.tool_args),
+                "call_id": tool_call.id,
+            }
             for tool_call in content.tool_calls
         )
     return messages
 
 
-# noinspection PyUnboundLocalVariable
-async def _transform_stream(  # noqa: C901
+@dataclass(slots=True)
+class TurnUsage:
+    """Token usage and latency of a conversation turn."""
+
+    started: float = field(default_factory=time.monotonic)
+    time_to_first_token: float | None = None
+    requests: int = 0
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    # Deltas streamed by the response in progress, roughly one token each
+    partial_output_tokens: int = 0
+    tool_arguments_parse_time: float = 0.0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Return the share of input tokens served from the prompt cache."""
+        if not self.input_tokens:
+            return 0.0
+        return self.cached_tokens / self.input_tokens
+
+    def add(self, input_tokens: int, cached_tokens: int, output_tokens: int) -> None:
+        """Add the usage of a single request."""
+        self.requests += 1
+        self.input_tokens += input_tokens
+        self.cached_tokens += cached_tokens
+        self.output_tokens += output_tokens
+        self.partial_output_tokens = 0
+
+
+def _trace_usage(usage: ResponseUsage | None, turn_usage: TurnUsage | None) -> None:
+    """Log the token usage of a response and add it to the turn usage."""
+    if usage is None:
+        return
+    # Not every OpenAI compatible server reports cached tokens
+    cached_tokens = (
+        getattr(getattr(usage, "input_tokens_details", None), "cached_tokens", None)
+        or 0
+    )
+    _LOGGER.debug(
+        "chat_log.async_trace(%s)",
+        {
+            "stats": {
+                "input_tokens": usage.input_tokens,
+                "cached_tokens": cached_tokens,
+                "output_tokens": usage.output_tokens,
+            }
+        },
+    )
+    if turn_usage is not None:
+        turn_usage.add(usage.input_tokens, cached_tokens, usage.output_tokens)
+
+
+@dataclass(slots=True)
+class _StreamState:
+    """State of a response stream being transformed."""
+
+    turn_usage: TurnUsage | None
+    # Parameter schemas of the tools offered, by name
+    tool_schemas: dict[str, dict[str, Any]] | None = None
+    current_tool_call: ResponseFunctionToolCall | None = None
+    tool_arguments: ToolArgumentsParser | None = None
+    # The output tokens were capped to keep within the latency target
+    output_capped: bool = False
+
+
+type _EventHandler = Callable[
+    [_StreamState, Any], conversation.AssistantContentDeltaDict | None
+]
+
+
+def _on_output_item_added(
+    state: _StreamState, event: ResponseOutputItemAddedEvent
+) -> conversation.AssistantContentDeltaDict | None:
+    if event.item.type == "message":
+        return {"role": event.item.role}
+    if event.item.type == "function_call":
+        state.current_tool_call = event.item
+        state.tool_arguments = ToolArgumentsParser(
+            event.item.name, (state.tool_schemas or {}).get(event.item.name)
+        )
+    return None
+
+
+def _on_text_delta(
+    state: _StreamState, event: ResponseTextDeltaEvent
+) -> conversation.AssistantContentDeltaDict:
+    if (turn_usage := state.turn_usage) is not None:
+        turn_usage.partial_output_tokens += 1
+        if turn_usage.time_to_first_token is None:
+            turn_usage.time_to_first_token = time.monotonic() - turn_usage.started
+    return {"content": event.delta}
+
+
+def _on_arguments_delta(
+    state: _StreamState, event: ResponseFunctionCallArgumentsDeltaEvent
+) -> None:
+    if state.turn_usage is not None:
+        state.turn_usage.partial_output_tokens += 1
+    assert state.tool_arguments is not None
+    state.tool_arguments.feed(event.delta)
+
+
+def _on_arguments_done(
+    state: _StreamState, event: ResponseFunctionCallArgumentsDoneEvent
+) -> conversation.AssistantContentDeltaDict:
+    tool_call = state.current_tool_call
+    parser = state.tool_arguments
+    assert tool_call is not None
+    assert parser is not None
+    try:
+        tool_args = parser.finish()
+    finally:
+        if state.turn_usage is not None:
+            state.turn_usage.tool_arguments_parse_time += parser.parse_time
+    tool_call.arguments = parser.text
+    tool_call.status = "completed"
+    state.tool_arguments = None
+    return {
+        "tool_calls": [
+            llm.ToolInput(
+                id=tool_call.call_id, tool_name=tool_call.name, tool_args=tool_args
+            )
+        ]
+    }
+
+
+def _on_completed(state: _StreamState, event: ResponseCompletedEvent) -> None:
+    _trace_usage(event.response.usage, state.turn_usage)
+
+
+def _on_incomplete(state: _StreamState, event: ResponseIncompleteEvent) -> None:
+    _trace_usage(event.response.usage, state.turn_usage)
+
+    if event.response.incomplete_details and event.response.incomplete_details.reason:
+        reason = event.response.incomplete_details.reason
+    else:
+        reason = "unknown reason"
+
+    if reason == "max_output_tokens":
+        if state.output_capped:
+            # Shortened on purpose, the reply so far is what the user gets
+            _LOGGER.debug("Reply cut off at the output cap of the latency target")
+            return
+        reason = "max output tokens reached"
+    elif reason == "content_filter":
+        reason = "content filter triggered"
+
+    raise HomeAssistantError(f"OpenAI response incomplete: {reason}")
+
+
+def _on_failed(state: _StreamState, event: ResponseFailedEvent) -> None:
+    _trace_usage(event.response.usage, state.turn_usage)
+    reason = "unknown reason"
+    if event.response.error is not None:
+        reason = event.response.error.message
+    raise HomeAssistantError(f"OpenAI response failed: {reason}")
+
+
+def _on_error(state: _StreamState, event: ResponseErrorEvent) -> None:
+    raise HomeAssistantError(f"OpenAI response error: {event.message}")
+
+
+# Handlers of the stream events, looked up by the event type. Events without
+# a handler are skipped
+_EVENT_HANDLERS: dict[str, _EventHandler] = {
+    "response.output_item.added": _on_output_item_added,
+    "response.output_text.delta": _on_text_delta,
+    "response.function_call_arguments.delta": _on_arguments_delta,
+    "response.function_call_arguments.done": _on_arguments_done,
+    "response.completed": _on_completed,
+    "response.incomplete": _on_incomplete,
+    "response.failed": _on_failed,
+    "error": _on_error,
+}
+# Events sent for every token, only one out of EVENT_TRACE_SAMPLE_RATE of
+# them is logged
+_DELTA_EVENTS = frozenset(
+    {"response.output_text.delta", "response.function_call_arguments.delta"}
+)
+
+
+async def _transform_stream(
     chat_log: conversation.ChatLog,
-    result: AsyncStream[ResponseStreamEvent],
+    result: PrimedStream,
+    turn_usage: TurnUsage | None = None,
+    tool_schemas: dict[str, dict[str, Any]] | None = None,
+    output_capped: bool = False,
 ) -> AsyncGenerator[conversation.AssistantContentDeltaDict]:
     """Transform an OpenAI delta stream into HA format."""
-    async for event in result:
-        _LOGGER.debug("Received event: %s", event)
-
-        if isinstance(event, ResponseOutputItemAddedEvent):
-            if isinstance(event.item, ResponseOutputMessage):
-                yield {"role": event.item.role}
-            elif isinstance(event.item, ResponseFunctionToolCall):
-                current_tool_call = event.item
-        elif isinstance(event, ResponseTextDeltaEvent):
-            yield {"content": event.delta}
-        elif isinstance(event, ResponseFunctionCallArgumentsDeltaEvent):
-            current_tool_call.arguments += event.delta
-        elif isinstance(event, ResponseFunctionCallArgumentsDoneEvent):
-            current_tool_call.status = "completed"
-            yield {
-                "tool_calls": [
-                    llm.ToolInput(
-                        id=current_tool_call.call_id,
-                        tool_name=current_tool_call.name,
-                        tool_args=json.loads(current_tool_call.arguments),
-                    )
-                ]
-            }
-        elif isinstance(event, ResponseCompletedEvent):
-            if event.response.usage is not None:
-                _LOGGER.debug(
-                    "chat_log.async_trace(%s)",
-                    {
-                        "stats": {
-                            "input_tokens": event.response.usage.input_tokens,
-                            "output_tokens": event.response.usage.output_tokens,
-                        },
-                    },
-                )
-        elif isinstance(event, ResponseIncompleteEvent):
-            if event.response.usage is not None:
-                _LOGGER.debug(
-                    "chat_log.async_trace(%s)",
-                    {
-                        "stats": {
-                            "input_tokens": event.response.usage.input_tokens,
-                            "output_tokens": event.response.usage.output_tokens,
-                        }
-                    },
-                )
+    state = _StreamState(turn_usage, tool_schemas, output_capped=output_capped)
+    trace = _LOGGER.isEnabledFor(logging.DEBUG)
+    deltas = 0
+    try:
+        async for event in result:
+            event_type = event.type
+            if event_type in _DELTA_EVENTS:
+                if trace and not deltas % EVENT_TRACE_SAMPLE_RATE:
+                    _LOGGER.debug("Received event (delta %d): %s", deltas, event)
+                deltas += 1
+            elif trace:
+                _LOGGER.debug("Received event: %s", event)
 
-            if (
-                event.response.incomplete_details
-                and event.response.incomplete_details.reason
-            ):
-                reason = event.response.incomplete_details.reason
-            else:
-                reason = "unknown reason"
-
-            if reason == "max_output_tokens":
-                reason = "max output tokens reached"
-            elif reason == "content_filter":
-                reason = "content filter triggered"
-
-            raise HomeAssistantError(f"OpenAI response incomplete: {reason}")
-        elif isinstance(event, ResponseFailedEvent):
-            if event.response.usage is not None:
-                _LOGGER.debug(
-                    "chat_log.async_trace(%s)",
-                    {
-                        "stats": {
-                            "input_tokens": event.response.usage.input_tokens,
-                            "output_tokens": event.response.usage.output_tokens,
-                        }
-                    },
-                )
-            reason = "unknown reason"
-            if event.response.error is not None:
-                reason = event.response.error.message
-            raise HomeAssistantError(f"OpenAI response failed: {reason}")
-        elif isinstance(event, ResponseErrorEvent):
-            raise HomeAssistantError(f"OpenAI response error: {event.message}")
+            if (handler := _EVENT_HANDLERS.get(event_type)) is not None and (
+                delta := handler(state, event)
+            ) is not None:
+                yield delta
+
+    finally:
+        # Closes the connection right away when the turn is cancelled
+        await result.close()
 
 
 class OpenAIConversationEntity(
@@ -221,6 +563,11 @@ class OpenAIConversationEntity(
     _attr_has_entity_name = True
     _attr_name = None
 
+    _tool_index: ToolIndex | None = None
+    # Tools converted to OpenAI format by name, with the schema they were built from
+    _formatted_tools: dict[str, tuple[str, FunctionToolParam]]
+    _formatted_tools_signature: tuple[Any, ...] | None = None
+
     _memory_client = None
     _memory_min_score = 0.25
     _memory_update_task: asyncio.Task | None = None
@@ -255,6 +602,11 @@ class OpenAIConversationEntity(
             self.hass, "conversation", self.entry.entry_id, self.entity_id
         )
         conversation.async_set_agent(self.hass, self.entry, self)
+        self.async_on_remove(
+            self.entry.runtime_data.speculator.async_register(
+                self._async_warm, self._async_process_turn
+            )
+        )
         self.entry.async_on_unload(
             self.entry.add_update_listener(self._async_entry_update_listener)
         )
@@ -269,21 +621,159 @@ class OpenAIConversationEntity(
         user_input: conversation.ConversationInput,
     ) -> conversation.ConversationResult:
         """Process a sentence."""
+        speculator = self.entry.runtime_data.speculator
+        job: Callable[[], Coroutine[Any, Any, conversation.ConversationResult]]
+        if (speculative_turn := speculator.async_claim(user_input)) is not None:
+            turn = speculative_turn
+
+            async def job() -> conversation.ConversationResult:
+                return await turn
+
+        else:
+            job = partial(self._async_process_turn, user_input)
+        try:
+            return await self.entry.runtime_data.scheduler.async_run_turn(
+                user_input.conversation_id, job
+            )
+        except TurnSupersededError:
+            _LOGGER.debug("Turn of %s superseded", user_input.conversation_id)
+            intent_response = intent.IntentResponse(language=user_input.language)
+            intent_response.async_set_error(
+                intent.IntentResponseErrorCode.UNKNOWN,
+                "Replaced by a newer request",
+            )
+            return conversation.ConversationResult(
+                response=intent_response,
+                conversation_id=user_input.conversation_id,
+            )
+        finally:
+            if speculative_turn is not None:
+                # Done unless superseded or abandoned
+                speculative_turn.cancel()
+
+    async def _async_warm(self, user_input: conversation.ConversationInput) -> None:
+        """Prepare what a turn needs while the user is still speaking."""
+        # Loaded in the executor when the config entry was set up
+        import openai  # noqa: PLC0415
+
+        options = self.entry.options
+        # The chat log is thrown away, no assistant message is added to it
         with (
             chat_session.async_get_chat_session(
                 self.hass, user_input.conversation_id
             ) as session,
             conversation.async_get_chat_log(self.hass, session, user_input) as chat_log,
         ):
-            return await self._async_handle_message(user_input, chat_log)
+            try:
+                await chat_log.async_update_llm_data(
+                    DOMAIN,
+                    user_input,
+                    options.get(CONF_LLM_HASS_API),
+                    options.get(CONF_PROMPT),
+                )
+            except conversation.ConverseError:
+                return
+            if chat_log.llm_api:
+                self._format_tools(chat_log.llm_api, chat_log.llm_api.tools)
+
+        model = options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
+        try:
+            # Opens a connection the request of the turn can reuse
+            await self.entry.runtime_data.endpoints.async_call(
+                lambda client: client.models.retrieve(model)
+            )
+        except openai.OpenAIError as err:
+            _LOGGER.debug("Could not warm up the connection: %s", err)
+
+    async def _async_wait_for_commit(
+        self,
+        commit: asyncio.Future[conversation.ConversationInput],
+        model_args: dict[str, Any] | None,
+        priority: Priority,
+        turn_usage: TurnUsage,
+    ) -> tuple[conversation.ConversationInput, asyncio.Task[PrimedStream] | None]:
+        """Send the request of a speculative turn and wait for the final input."""
+        stream: asyncio.Task[PrimedStream] | None = None
+        if model_args is not None:
+            endpoints = self.entry.runtime_data.endpoints
+            scheduler = self.entry.runtime_data.scheduler
+
+            async def create_stream() -> PrimedStream:
+                async with scheduler.slot(priority):
+                    return await endpoints.async_create_stream(model_args)
+
+            stream = self.hass.async_create_task(create_stream())
+        try:
+            return await commit, stream
+        except asyncio.CancelledError:
+            if stream is not None and await _async_discard_stream(stream):
+                assert model_args is not None
+                turn_usage.add(estimate_input_tokens(model_args), 0, 0)
+            raise
+
+    async def _async_process_turn(
+        self,
+        user_input: conversation.ConversationInput,
+        commit: asyncio.Future[conversation.ConversationInput] | None = None,
+    ) -> conversation.ConversationResult:
+        """Process a sentence in its chat session.
+
+        A speculative turn is given a future resolved with the final input,
+        its response is only consumed once the future is done.
+        """
+        profiler = async_get_profiler(self.hass)
+        timings = TurnTimings() if profiler is not None else None
+        # Regular turns hold the conversation lock through async_run_turn, a
+        # speculative turn is started outside of it
+        lock = (
+            self.entry.runtime_data.scheduler.conversation(user_input.conversation_id)
+            if commit is not None
+            else contextlib.nullcontext()
+        )
+        try:
+            async with lock:
+                with (
+                    chat_session.async_get_chat_session(
+                        self.hass, user_input.conversation_id
+                    ) as session,
+                    conversation.async_get_chat_log(
+                        self.hass, session, user_input
+                    ) as chat_log,
+                ):
+                    self.entry.runtime_data.sessions.async_track(session)
+                    self.entry.runtime_data.live_context.async_track(session)
+                    return await self._async_handle_message(
+                        user_input, chat_log, timings, commit
+                    )
+        finally:
+            if profiler is not None and timings is not None:
+                profiler.async_finish_turn(timings)
 
     async def _async_handle_message(  # noqa: C901
         self,
         user_input: conversation.ConversationInput,
         chat_log: conversation.ChatLog,
+        timings: TurnTimings | None = None,
+        commit: asyncio.Future[conversation.ConversationInput] | None = None,
     ) -> conversation.ConversationResult:
         """Call the API."""
+        # Loaded in the executor when the config entry was set up
+        import openai  # noqa: PLC0415
+
         options = self.entry.options
+        usage = self.entry.runtime_data.usage
+        user_id = user_input.context.user_id
+
+        try:
+            usage.async_check(user_id)
+        except QuotaExceededError as err:
+            intent_response = intent.IntentResponse(language=user_input.language)
+            intent_response.async_set_error(
+                intent.IntentResponseErrorCode.UNKNOWN, str(err)
+            )
+            return conversation.ConversationResult(
+                response=intent_response, conversation_id=chat_log.conversation_id
+            )
 
         try:
             await chat_log.async_update_llm_data(
@@ -294,82 +784,300 @@ class OpenAIConversationEntity(
             )
         except conversation.ConverseError as err:
             return err.as_conversation_result()
+        sessions = self.entry.runtime_data.sessions
+        sessions.async_enforce(chat_log)
+        if timings is not None:
+            timings.mark("llm_data")
 
         tools: list[ToolParam] | None = None
+        query = _tool_selection_query(chat_log)
         if chat_log.llm_api:
-            tools = [
-                _format_tool(tool, chat_log.llm_api.custom_serializer)
-                for tool in chat_log.llm_api.tools
-            ]
-
-        if options.get(CONF_WEB_SEARCH):
-            web_search = WebSearchToolParam(
-                type="web_search_preview",
-                search_context_size=options.get(
-                    CONF_WEB_SEARCH_CONTEXT_SIZE, RECOMMENDED_WEB_SEARCH_CONTEXT_SIZE
+            llm_tools = chat_log.llm_api.tools
+            if options.get(CONF_TOOL_SELECTION):
+                if (selected := self._select_tools(chat_log, query)) is None:
+                    _LOGGER.debug("No tool matches the request, sending all tools")
+                else:
+                    llm_tools = selected
+                    _LOGGER.debug(
+                        "Selected %d of %d tools: %s",
+                        len(llm_tools),
+                        len(chat_log.llm_api.tools),
+                        ", ".join(tool.name for tool in llm_tools),
+                    )
+            tools = self._format_tools(chat_log.llm_api, llm_tools)
+
+        priority = _turn_priority(user_input)
+        # Settings lowered to keep voice turns within the latency target
+        latency = self.entry.runtime_data.latency
+        if priority is not Priority.VOICE:
+            latency = None
+        overrides = latency.overrides() if latency is not None else {}
+
+        web_search: WebSearchToolParam | None = None
+        if options.get(CONF_WEB_SEARCH) and (
+            not options.get(CONF_TOOL_SELECTION) or needs_web_search(query)
+        ):
+            web_search = {
+                "type": "web_search_preview",
+                "search_context_size": overrides.get(
+                    SETTING_SEARCH_CONTEXT_SIZE,
+                    options.get(
+                        CONF_WEB_SEARCH_CONTEXT_SIZE,
+                        RECOMMENDED_WEB_SEARCH_CONTEXT_SIZE,
+                    ),
                 ),
-            )
+            }
             if options.get(CONF_WEB_SEARCH_USER_LOCATION):
-                web_search["user_location"] = UserLocation(
-                    type="approximate",
-                    city=options.get(CONF_WEB_SEARCH_CITY, ""),
-                    region=options.get(CONF_WEB_SEARCH_REGION, ""),
-                    country=options.get(CONF_WEB_SEARCH_COUNTRY, ""),
-                    timezone=options.get(CONF_WEB_SEARCH_TIMEZONE, ""),
-                )
+                web_search["user_location"] = {
+                    "type": "approximate",
+                    "city": options.get(CONF_WEB_SEARCH_CITY, ""),
+                    "region": options.get(CONF_WEB_SEARCH_REGION, ""),
+                    "country": options.get(CONF_WEB_SEARCH_COUNTRY, ""),
+                    "timezone": options.get(CONF_WEB_SEARCH_TIMEZONE, ""),
+                }
             if tools is None:
                 tools = []
             tools.append(web_search)
 
         model = options.get(CONF_CHAT_MODEL, RECOMMENDED_CHAT_MODEL)
-        messages = [
-            m
-            for content in chat_log.content
-            for m in _convert_content_to_param(content)
-        ]
-
-        client = self.entry.runtime_data
-
-        # To prevent infinite loops, we limit the number of iterations
-        for _iteration in range(MAX_TOOL_ITERATIONS):
-            model_args = {
-                "model": model,
-                "input": messages,
-                "max_output_tokens": options.get(
-                    CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS
-                ),
-                "top_p": options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
-                "temperature": options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
-                "user": chat_log.conversation_id,
-                "store": False,
-                "stream": True,
-            }
-            if tools:
-                model_args["tools"] = tools
+        live_context = (
+            self.entry.runtime_data.live_context
+            if options.get(CONF_LIVE_CONTEXT_DELTA, RECOMMENDED_LIVE_CONTEXT_DELTA)
+            else None
+        )
+        messages = _convert_chat_log(
+            chat_log,
+            options.get(CONF_PROMPT_CACHE_LAYOUT, RECOMMENDED_PROMPT_CACHE_LAYOUT),
+            live_context,
+        )
+        turn_usage = TurnUsage()
+        if timings is not None:
+            timings.mark("prepare")
 
-            if model.startswith("o"):
-                model_args["reasoning"] = {
-                    "effort": options.get(
-                        CONF_REASONING_EFFORT, RECOMMENDED_REASONING_EFFORT
-                    )
+        max_output_tokens = overrides.get(
+            SETTING_MAX_OUTPUT_TOKENS,
+            options.get(CONF_MAX_TOKENS, RECOMMENDED_MAX_TOKENS),
+        )
+        output_capped = SETTING_MAX_OUTPUT_TOKENS in overrides
+        # Asks for a reply that fits the output cap instead of cutting it off
+        brevity: ResponseInputParam = []
+        if output_capped:
+            brevity.append(
+                {
+                    "type": "message",
+                    "role": "developer",
+                    "content": BREVITY_INSTRUCTIONS.format(
+                        words=int(max_output_tokens * WORDS_PER_TOKEN)
+                    ),
                 }
+            )
+
+        endpoints = self.entry.runtime_data.endpoints
+        realtime: RealtimeSession | None = None
+        if options.get(CONF_REALTIME, RECOMMENDED_REALTIME):
+            realtime = self.entry.runtime_data.realtime.async_get(
+                chat_log.conversation_id, model
+            )
+        scheduler = self.entry.runtime_data.scheduler
+        # Request sent by a speculative turn before the input was final
+        first_stream: asyncio.Task[PrimedStream] | None = None
 
+        async def async_stream(
+            model_args: dict[str, Any], stream: asyncio.Task[PrimedStream] | None
+        ) -> AsyncGenerator[conversation.AssistantContentDeltaDict]:
+            """Send a Responses API request, unless it was sent already."""
             try:
-                result = await client.responses.create(**model_args)
+                if stream is not None:
+                    result = await stream
+                else:
+                    result = await endpoints.async_create_stream(model_args)
             except openai.RateLimitError as err:
                 _LOGGER.error("Rate limited by OpenAI: %s", err)
                 raise HomeAssistantError("Rate limited or insufficient funds") from err
             except openai.OpenAIError as err:
                 _LOGGER.error("Error talking to OpenAI: %s", err)
                 raise HomeAssistantError("Error talking to OpenAI") from err
+            return _transform_stream(
+                chat_log,
+                result,
+                turn_usage,
+                {
+                    tool["name"]: tool["parameters"]
+                    for tool in tools or ()
+                    if tool["type"] == "function"
+                },
+                output_capped,
+            )
+
+        async def async_respond_realtime(
+            session: RealtimeSession, model_args: dict[str, Any]
+        ) -> AsyncGenerator[conversation.AssistantContentDeltaDict]:
+            """Stream a realtime response, falling back to the Responses API.
 
-            async for content in chat_log.async_add_delta_content_stream(
-                user_input.agent_id, _transform_stream(chat_log, result)
+            The fallback is only taken when the session hangs before sending
+            any content, afterwards the chat log holds a part of the response.
+            """
+            nonlocal realtime
+            produced = False
+            try:
+                async for delta in session.async_respond(
+                    chat_log,
+                    session_config(
+                        chat_log,
+                        tools,
+                        options.get(CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE),
+                        max_output_tokens,
+                    ),
+                    turn_usage,
+                ):
+                    produced = produced or delta.keys() != {"role"}
+                    yield delta
+            except RealtimeTimeoutError as err:
+                if produced:
+                    raise
+                _LOGGER.warning("%s, falling back to the Responses API", err)
+            else:
+                return
+            # Skip the hanging session for the rest of the turn
+            realtime = None
+            # The realtime models are not available through the Responses API
+            async for delta in await async_stream(
+                {**model_args, "model": RECOMMENDED_CHAT_MODEL}, None
             ):
-                messages.extend(_convert_content_to_param(content))
+                yield delta
+
+        try:
+            # To prevent infinite loops, we limit the number of iterations
+            for _iteration in range(MAX_TOOL_ITERATIONS):
+                model_args = {
+                    "model": model,
+                    "input": [*messages, *brevity] if brevity else messages,
+                    "max_output_tokens": max_output_tokens,
+                    "top_p": options.get(CONF_TOP_P, RECOMMENDED_TOP_P),
+                    "temperature": options.get(
+                        CONF_TEMPERATURE, RECOMMENDED_TEMPERATURE
+                    ),
+                    "user": chat_log.conversation_id,
+                    "store": False,
+                    "stream": True,
+                }
+                if tools:
+                    model_args["tools"] = tools
+
+                if model.startswith("o"):
+                    model_args["reasoning"] = {
+                        "effort": overrides.get(
+                            SETTING_REASONING_EFFORT,
+                            options.get(
+                                CONF_REASONING_EFFORT, RECOMMENDED_REASONING_EFFORT
+                            ),
+                        )
+                    }
 
-            if not chat_log.unresponded_tool_results:
-                break
+                if commit is not None:
+                    user_input, first_stream = await self._async_wait_for_commit(
+                        commit,
+                        model_args if realtime is None else None,
+                        priority,
+                        turn_usage,
+                    )
+                    commit = None
+                    if timings is not None:
+                        timings.mark("speculation")
+
+                async with contextlib.AsyncExitStack() as request_slot:
+                    await request_slot.enter_async_context(scheduler.slot(priority))
+                    if timings is not None:
+                        timings.mark("queue")
+                    if realtime is not None:
+                        deltas = async_respond_realtime(realtime, model_args)
+                    else:
+                        deltas = await async_stream(model_args, first_stream)
+                        first_stream = None
+                    if timings is not None:
+                        timings.mark("first_event")
+
+                    async for content in chat_log.async_add_delta_content_stream(
+                        user_input.agent_id,
+                        _async_release_after(deltas, request_slot.aclose),
+                    ):
+                        if realtime is not None:
+                            realtime.async_mark_produced(content)
+                        tool_outputs = None
+                        if live_context is not None and isinstance(
+                            content, conversation.ToolResultContent
+                        ):
+                            tool_outputs = live_context.async_encode_tool_results(
+                                chat_log.conversation_id, chat_log.content
+                            )
+                        messages.extend(
+                            _convert_content_to_param(content, tool_outputs)
+                        )
+                    if timings is not None:
+                        # Includes calling the tools requested by the model
+                        timings.mark("stream")
+
+                if not chat_log.unresponded_tool_results:
+                    break
+        except HomeAssistantError:
+            if latency is not None:
+                latency.record_turn(
+                    time.monotonic() - turn_usage.started,
+                    turn_usage.time_to_first_token,
+                    turn_usage.output_tokens,
+                    failed=True,
+                )
+            raise
+        except asyncio.CancelledError:
+            # Everything spent on this turn is thrown away
+            wasted_output_tokens = (
+                turn_usage.output_tokens + turn_usage.partial_output_tokens
+            )
+            _LOGGER.debug(
+                "Turn cancelled, wasted %d input and %d output tokens",
+                turn_usage.input_tokens,
+                wasted_output_tokens,
+            )
+            scheduler.async_record_wasted_tokens(
+                turn_usage.input_tokens, wasted_output_tokens
+            )
+            if commit is not None:
+                # Thrown away before the final transcript arrived
+                self.entry.runtime_data.speculator.async_record_wasted_tokens(
+                    turn_usage.input_tokens, wasted_output_tokens
+                )
+            raise
+        finally:
+            if first_stream is not None and await _async_discard_stream(first_stream):
+                turn_usage.add(estimate_input_tokens(model_args), 0, 0)
+            usage.async_record(
+                "conversation",
+                user_id,
+                chat_log.conversation_id,
+                input_tokens=turn_usage.input_tokens,
+                output_tokens=turn_usage.output_tokens,
+                requests=turn_usage.requests,
+            )
+
+        _LOGGER.debug(
+            "Turn finished after %d requests: %d input tokens (%d cached, %.0f%%), "
+            "%d output tokens, first token after %s seconds, "
+            "%.2f ms parsing tool arguments",
+            turn_usage.requests,
+            turn_usage.input_tokens,
+            turn_usage.cached_tokens,
+            turn_usage.cache_hit_rate * 100,
+            turn_usage.output_tokens,
+            turn_usage.time_to_first_token,
+            turn_usage.tool_arguments_parse_time * 1000,
+        )
+        if latency is not None:
+            latency.record_turn(
+                time.monotonic() - turn_usage.started,
+                turn_usage.time_to_first_token,
+                turn_usage.output_tokens,
+            )
+        sessions.async_account(chat_log)
 
         intent_response = intent.IntentResponse(language=user_input.language)
         assert type(chat_log.content[-1]) is conversation.AssistantContent
@@ -380,6 +1088,59 @@ class OpenAIConversationEntity(
             # continue_conversation=chat_log.continue_conversation,
         )
 
+    def _format_tools(
+        self, llm_api: llm.APIInstance, llm_tools: list[llm.Tool]
+    ) -> list[ToolParam]:
+        """Return the tools in OpenAI format, converting each schema only once.
+
+        Tools are created again for every request, with parameters that may
+        have changed, like the calendars a tool can read or the fields of a
+        script, so the schema is compared before reusing a converted tool.
+        """
+        signature = (tool_signature(llm_api.tools), llm_api.custom_serializer)
+        if self._formatted_tools_signature != signature:
+            self._formatted_tools = {}
+            self._formatted_tools_signature = signature
+
+        tools: list[ToolParam] = []
+        for tool in llm_tools:
+            schema = _schema_key(tool.parameters)
+            cached = self._formatted_tools.get(tool.name)
+            if cached is None or cached[0] != schema:
+                cached = self._formatted_tools[tool.name] = (
+                    schema,
+                    _format_tool(tool, llm_api.custom_serializer),
+                )
+            tools.append(cached[1])
+        return tools
+
+    def _select_tools(
+        self, chat_log: conversation.ChatLog, query: str
+    ) -> list[llm.Tool] | None:
+        """Return the tools relevant to the query, None if it names none."""
+        assert chat_log.llm_api is not None
+        options = self.entry.options
+        llm_tools = chat_log.llm_api.tools
+        signature = tool_signature(llm_tools)
+        if self._tool_index is None or self._tool_index.signature != signature:
+            self._tool_index = ToolIndex(llm_tools)
+
+        # Tools already used in this conversation are likely needed by follow-ups
+        always_include = set(options.get(CONF_TOOL_SELECTION_ALWAYS_INCLUDE, []))
+        always_include.update(
+            tool_call.tool_name
+            for content in chat_log.content
+            if isinstance(content, conversation.AssistantContent) and content.tool_calls
+            for tool_call in content.tool_calls
+        )
+        return self._tool_index.select(
+            query,
+            int(
+                options.get(CONF_TOOL_SELECTION_TOP_K, RECOMMENDED_TOOL_SELECTION_TOP_K)
+            ),
+            always_include,
+        )
+
     async def _async_entry_update_listener(
         self, hass: HomeAssistant, entry: ConfigEntry
     ) -> None:
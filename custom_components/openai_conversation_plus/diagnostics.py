@@ -0,0 +1,39 @@
+"""Diagnostics support for OpenAI Conversation Plus."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.const import CONF_API_KEY
+from homeassistant.core import HomeAssistant
+
+from . import OpenAIPlusConfigEntry
+from .const import CONF_MEMORY_API_KEY
+from .image_cache import DATA_IMAGE_CACHE
+
+TO_REDACT = {CONF_API_KEY, CONF_MEMORY_API_KEY}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: OpenAIPlusConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    return {
+        "data": async_redact_data(entry.data, TO_REDACT),
+        "options": async_redact_data(entry.options, TO_REDACT),
+        "scheduler": entry.runtime_data.scheduler.metrics(),
+        "endpoints": entry.runtime_data.endpoints.metrics(),
+        "realtime": entry.runtime_data.realtime.metrics(),
+        "prompt_cache": entry.runtime_data.prompt_cache.metrics(),
+        "sessions": entry.runtime_data.sessions.metrics(),
+        "usage": entry.runtime_data.usage.metrics(),
+        "live_context": entry.runtime_data.live_context.metrics(),
+        "speculation": entry.runtime_data.speculator.metrics(),
+        "image_cache": hass.data[DATA_IMAGE_CACHE].metrics(),
+        "latency": (
+            entry.runtime_data.latency.metrics()
+            if entry.runtime_data.latency is not None
+            else None
+        ),
+    }
@@ -0,0 +1,306 @@
+"""Load balancing and failover across OpenAI compatible endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+import random
+import statistics
+import time
+from typing import TYPE_CHECKING, Any
+
+from .const import LOGGER
+
+if TYPE_CHECKING:
+    import openai
+    from openai._streaming import AsyncStream
+    from openai.types.responses import ResponseStreamEvent
+
+# Number of first event latencies kept per endpoint
+LATENCY_SAMPLES = 50
+# Smoothing factor of the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+# Samples needed before the p95 is used as hedging deadline
+HEDGE_MIN_SAMPLES = 10
+HEDGE_DEFAULT_DEADLINE = 2.0
+HEDGE_MIN_DEADLINE = 0.25
+
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN = 30.0
+CIRCUIT_MAX_COOLDOWN = 300.0
+
+
+@dataclass
+class Endpoint:
+    """An OpenAI compatible endpoint with its health state."""
+
+    base_url: str | None
+    weight: float
+    client: openai.AsyncClient
+    latencies: deque[float] = field(
+        default_factory=lambda: deque(maxlen=LATENCY_SAMPLES)
+    )
+    latency_ewma: float | None = None
+    # Duration of non-streaming requests, which says nothing about the first event
+    duration_ewma: float | None = None
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    cooldown: float = CIRCUIT_COOLDOWN
+    open_until: float = 0.0
+
+    @property
+    def p95(self) -> float | None:
+        """Return the 95th percentile of the first event latency."""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        return statistics.quantiles(self.latencies, n=20)[-1]
+
+    @property
+    def hedge_deadline(self) -> float:
+        """Return how long to wait for the first event before hedging."""
+        if (p95 := self.p95) is None:
+            return HEDGE_DEFAULT_DEADLINE
+        return max(p95, HEDGE_MIN_DEADLINE)
+
+    def available(self, now: float) -> bool:
+        """Return whether the circuit breaker lets requests through."""
+        return now >= self.open_until
+
+    def record_success(self, latency: float, streaming: bool = True) -> None:
+        """Record a successful request and close the circuit breaker.
+
+        Only the first event latency of streams is used for hedging and picking
+        endpoints, a non-streaming request lasts as long as its whole response.
+        """
+        self.requests += 1
+        if streaming:
+            self.latencies.append(latency)
+            self.latency_ewma = _ewma(self.latency_ewma, latency)
+        else:
+            self.duration_ewma = _ewma(self.duration_ewma, latency)
+        self.consecutive_failures = 0
+        self.cooldown = CIRCUIT_COOLDOWN
+        self.open_until = 0.0
+
+    def record_failure(self) -> None:
+        """Record a failed request, opening the circuit breaker when needed."""
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures < CIRCUIT_FAILURE_THRESHOLD:
+            return
+        if self.open_until:
+            # Failed again after the cooldown, back off further
+            self.cooldown = min(self.cooldown * 2, CIRCUIT_MAX_COOLDOWN)
+        self.open_until = time.monotonic() + self.cooldown
+        LOGGER.warning(
+            "Taking %s out of rotation for %.0f seconds after %d failures",
+            self.base_url or "OpenAI",
+            self.cooldown,
+            self.consecutive_failures,
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the endpoint state for diagnostics."""
+        return {
+            "base_url": self.base_url,
+            "weight": self.weight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "latency_ewma": self.latency_ewma,
+            "latency_p95": self.p95,
+            "duration_ewma": self.duration_ewma,
+            "available": self.available(time.monotonic()),
+        }
+
+
+def _ewma(average: float | None, sample: float) -> float:
+    """Return the moving average updated with a sample."""
+    if average is None:
+        return sample
+    return average + LATENCY_EWMA_ALPHA * (sample - average)
+
+
+class PrimedStream:
+    """A response stream of which the first event was already received."""
+
+    def __init__(
+        self,
+        stream: AsyncStream[ResponseStreamEvent],
+        first_event: ResponseStreamEvent | None,
+    ) -> None:
+        """Initialize the stream."""
+        self._stream = stream
+        self._first_event = first_event
+
+    async def __aiter__(self) -> AsyncIterator[ResponseStreamEvent]:
+        """Iterate over all events of the stream."""
+        if self._first_event is not None:
+            yield self._first_event
+        async for event in self._stream:
+            yield event
+
+    async def close(self) -> None:
+        """Close the underlying connection."""
+        await self._stream.close()
+
+
+class EndpointPool:
+    """Pick the fastest healthy endpoint and fail over to the others."""
+
+    def __init__(self, endpoints: list[Endpoint], hedging: bool = False) -> None:
+        """Initialize the pool."""
+        import openai  # noqa: PLC0415
+
+        self.endpoints = endpoints
+        # Errors of a single endpoint, worth retrying on another one
+        self.failover_errors: tuple[type[Exception], ...] = (
+            openai.APIConnectionError,
+            openai.InternalServerError,
+            openai.RateLimitError,
+        )
+        self.hedging = hedging
+        self.hedges = 0
+        self.hedges_won = 0
+
+    def pick(self, exclude: list[Endpoint] | None = None) -> Endpoint | None:
+        """Return an endpoint, favouring high weights and low latencies."""
+        candidates = [
+            endpoint for endpoint in self.endpoints if endpoint not in (exclude or ())
+        ]
+        if not candidates:
+            return None
+        now = time.monotonic()
+        if not (healthy := [e for e in candidates if e.available(now)]):
+            # Everything is out of rotation, try the one recovering first
+            return min(candidates, key=lambda endpoint: endpoint.open_until)
+        if len(healthy) == 1:
+            return healthy[0]
+        known = [e.latency_ewma for e in healthy if e.latency_ewma is not None]
+        # Endpoints without samples are assumed to be as fast as the others
+        default_latency = statistics.median(known) if known else 1.0
+        weights = [
+            endpoint.weight
+            / max(endpoint.latency_ewma or default_latency, HEDGE_MIN_DEADLINE)
+            for endpoint in healthy
+        ]
+        return random.choices(healthy, weights=weights)[0]
+
+    async def async_call[_T](
+        self, request: Callable[[openai.AsyncClient], Awaitable[_T]]
+    ) -> _T:
+        """Run a request, failing over to other endpoints on endpoint errors."""
+        tried: list[Endpoint] = []
+        while (endpoint := self.pick(tried)) is not None:
+            tried.append(endpoint)
+            start = time.monotonic()
+            try:
+                result = await request(endpoint.client)
+            except self.failover_errors as err:
+                endpoint.record_failure()
+                if len(tried) == len(self.endpoints):
+                    raise
+                LOGGER.debug("Failing over from %s: %s", endpoint.base_url, err)
+            else:
+                endpoint.record_success(time.monotonic() - start, streaming=False)
+                return result
+        raise RuntimeError("No endpoints configured")
+
+    async def async_create_stream(self, model_args: dict[str, Any]) -> PrimedStream:
+        """Start a streaming response, hedging slow endpoints if enabled."""
+        tried: list[Endpoint] = []
+        while (endpoint := self.pick(tried)) is not None:
+            tried.append(endpoint)
+            try:
+                if self.hedging and len(self.endpoints) > 1:
+                    return await self._async_create_hedged_stream(
+                        endpoint, model_args, tried
+                    )
+                return await self._async_create_stream(endpoint, model_args)
+            except self.failover_errors as err:
+                if len(tried) >= len(self.endpoints):
+                    raise
+                LOGGER.debug("Failing over from %s: %s", endpoint.base_url, err)
+        raise RuntimeError("No endpoints configured")
+
+    async def _async_create_stream(
+        self, endpoint: Endpoint, model_args: dict[str, Any]
+    ) -> PrimedStream:
+        """Start a streaming response and wait for its first event."""
+        start = time.monotonic()
+        try:
+            stream = await endpoint.client.responses.create(**model_args)
+        except self.failover_errors:
+            endpoint.record_failure()
+            raise
+        try:
+            first_event = await anext(aiter(stream), None)
+        except self.failover_errors:
+            endpoint.record_failure()
+            await stream.close()
+            raise
+        except BaseException:
+            await stream.close()
+            raise
+        endpoint.record_success(time.monotonic() - start)
+        return PrimedStream(stream, first_event)
+
+    async def _async_create_hedged_stream(
+        self, endpoint: Endpoint, model_args: dict[str, Any], tried: list[Endpoint]
+    ) -> PrimedStream:
+        """Start a streaming response, duplicating it when the first event is late.
+
+        The first endpoint to deliver an event wins, the other request is
+        cancelled and its connection closed.
+        """
+        tasks = {asyncio.create_task(self._async_create_stream(endpoint, model_args))}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=endpoint.hedge_deadline)
+            if done or (backup := self.pick(tried)) is None:
+                return await tasks.pop()
+
+            LOGGER.debug(
+                "No response from %s after %.2f seconds, hedging with %s",
+                endpoint.base_url,
+                endpoint.hedge_deadline,
+                backup.base_url,
+            )
+            tried.append(backup)
+            self.hedges += 1
+            backup_task = asyncio.create_task(
+                self._async_create_stream(backup, model_args)
+            )
+            tasks.add(backup_task)
+            error: BaseException | None = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                winners = [task for task in done if task.exception() is None]
+                if not winners:
+                    error = next(iter(done)).exception()
+                    continue
+                winner = winners[0]
+                for task in winners[1:]:
+                    await task.result().close()
+                if winner is backup_task:
+                    self.hedges_won += 1
+                return winner.result()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the pool state for diagnostics."""
+        return {
+            "hedging": self.hedging,
+            "hedges": self.hedges,
+            "hedges_won": self.hedges_won,
+            "endpoints": [endpoint.as_dict() for endpoint in self.endpoints],
+        }
@@ -0,0 +1,149 @@
+"""Content addressed store of generated images served by Home Assistant."""
+
+from __future__ import annotations
+
+import base64
+from functools import partial
+import hashlib
+from pathlib import Path
+import time
+from typing import Any
+
+from homeassistant.components.http import StaticPathConfig
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN, LOGGER
+
+DATA_IMAGE_CACHE: HassKey[ImageCache] = HassKey(f"{DOMAIN}_image_cache")
+URL_PATH = f"/{DOMAIN}/images"
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+# Total size of the stored images, least recently used ones are removed first
+MAX_CACHE_SIZE = 100 * 1024 * 1024
+
+
+class ImageCache:
+    """Map image requests to the files holding their images.
+
+    Files are named after the hash of their content, so requests producing
+    the same image share a file. The files are written to `www/` and served
+    below their own path. Home Assistant only serves `/local/` when `www/`
+    existed at startup, which it does not on a fresh install.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.directory = Path(hass.config.path("www", DOMAIN))
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.image_cache"
+        )
+        self._entries: dict[str, dict[str, Any]] = {}
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    async def async_load(self) -> None:
+        """Serve the images and load the index, dropping removed files."""
+        await self.hass.async_add_executor_job(
+            partial(self.directory.mkdir, parents=True, exist_ok=True)
+        )
+        # Files are named after their content, so they never change
+        await self.hass.http.async_register_static_paths(
+            [StaticPathConfig(URL_PATH, str(self.directory), cache_headers=True)]
+        )
+        if (data := await self._store.async_load()) is None:
+            return
+        existing = await self.hass.async_add_executor_job(
+            self._existing_files, {entry["file"] for entry in data.values()}
+        )
+        self._entries = {
+            key: entry for key, entry in data.items() if entry["file"] in existing
+        }
+
+    def _existing_files(self, files: set[str]) -> set[str]:
+        return {file for file in files if (self.directory / file).exists()}
+
+    def _data_to_save(self) -> dict[str, dict[str, Any]]:
+        return self._entries
+
+    @staticmethod
+    def url(entry: dict[str, Any]) -> str:
+        """Return the local URL of a cached image."""
+        return f"{URL_PATH}/{entry['file']}"
+
+    @callback
+    def async_get(self, key: str) -> dict[str, Any] | None:
+        """Return the cached image of a request, if any."""
+        if (entry := self._entries.get(key)) is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        entry["last_used"] = time.time()
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return entry
+
+    def _write(self, b64_json: str) -> tuple[str, int]:
+        """Decode the image and write it, named after its content."""
+        image = base64.b64decode(b64_json)
+        file = f"{hashlib.sha256(image).hexdigest()[:32]}.png"
+        path = self.directory / file
+        if not path.exists():
+            path.write_bytes(image)
+        return file, len(image)
+
+    def _remove(self, files: list[str]) -> None:
+        for file in files:
+            (self.directory / file).unlink(missing_ok=True)
+
+    async def async_add(
+        self, key: str, b64_json: str, revised_prompt: str | None
+    ) -> dict[str, Any]:
+        """Store the image of a request and return its entry."""
+        file, size = await self.hass.async_add_executor_job(self._write, b64_json)
+        entry = self._entries[key] = {
+            "file": file,
+            "size": size,
+            "revised_prompt": revised_prompt,
+            "last_used": time.time(),
+        }
+        if evicted := self._evict(key):
+            await self.hass.async_add_executor_job(self._remove, evicted)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return entry
+
+    def _evict(self, keep: str) -> list[str]:
+        """Drop the least recently used images until the cache fits its size."""
+        sizes = {entry["file"]: entry["size"] for entry in self._entries.values()}
+        total = sum(sizes.values())
+        evicted: list[str] = []
+        for key, entry in sorted(
+            self._entries.items(), key=lambda item: item[1]["last_used"]
+        ):
+            if total <= MAX_CACHE_SIZE:
+                break
+            if key == keep:
+                continue
+            del self._entries[key]
+            self.stats["evictions"] += 1
+            file = entry["file"]
+            if file in sizes and all(
+                other["file"] != file for other in self._entries.values()
+            ):
+                total -= sizes.pop(file)
+                evicted.append(file)
+        if evicted:
+            LOGGER.debug("Removed %d images from the image cache", len(evicted))
+        return evicted
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the cache statistics for diagnostics."""
+        sizes = {entry["file"]: entry["size"] for entry in self._entries.values()}
+        return {
+            "entries": len(self._entries),
+            "files": len(sizes),
+            "size": sum(sizes.values()),
+            "max_size": MAX_CACHE_SIZE,
+            **self.stats,
+        }
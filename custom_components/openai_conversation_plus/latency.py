@@ -0,0 +1,190 @@
+"""Adaptive request settings keeping voice turns within a latency target."""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import asdict, dataclass
+import statistics
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import LOGGER
+
+# Turns the latency percentile is computed over
+LATENCY_WINDOW = 20
+LATENCY_PERCENTILE = 90
+# Turns needed before the first adjustment and between two adjustments
+MIN_TURNS = 5
+# Step down when the percentile is above this share of the target
+DEGRADE_THRESHOLD = 0.9
+# Step back up when it is below this share of the target
+RESTORE_THRESHOLD = 0.6
+# Lowest output cap set to keep within the target
+MIN_OUTPUT_TOKENS = 50
+AUDIT_LOG_SIZE = 50
+
+SETTING_REASONING_EFFORT = "reasoning_effort"
+SETTING_SEARCH_CONTEXT_SIZE = "search_context_size"
+SETTING_MAX_OUTPUT_TOKENS = "max_output_tokens"
+
+LEVELS = ("low", "medium", "high")
+
+
+@dataclass(slots=True)
+class Adjustment:
+    """A change of the request settings, kept for auditing."""
+
+    time: str
+    direction: str
+    step: int
+    setting: str
+    value: Any
+    latency_p90: float
+    ttft_p90: float | None
+    tokens_per_second: float | None
+
+
+def _lower_levels(level: str) -> list[str]:
+    """Return the levels below the given one, highest first."""
+    if level not in LEVELS:
+        return []
+    return list(reversed(LEVELS[: LEVELS.index(level)]))
+
+
+class LatencyController:
+    """Step request settings down when turns get slow and back up when they recover.
+
+    The configured settings are step zero. Each further step lowers the
+    reasoning effort, then the web search context size, one level at a time,
+    and finally caps the output tokens to what the observed token rate can
+    stream within the target after the first token. The output is not capped
+    for reasoning models, their reasoning counts against the cap.
+    """
+
+    def __init__(
+        self,
+        target: float,
+        reasoning_effort: str | None,
+        search_context_size: str | None,
+        max_output_tokens: int | None,
+    ) -> None:
+        """Initialize the controller."""
+        self.target = target
+        self.max_output_tokens = max_output_tokens or 0
+        self._steps: list[tuple[str, Any]] = [
+            (SETTING_REASONING_EFFORT, level)
+            for level in _lower_levels(reasoning_effort or "")
+        ]
+        self._steps.extend(
+            (SETTING_SEARCH_CONTEXT_SIZE, level)
+            for level in _lower_levels(search_context_size or "")
+        )
+        if max_output_tokens is not None:
+            self._steps.append((SETTING_MAX_OUTPUT_TOKENS, None))
+        self.step = 0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._ttfts: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._token_rates: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self.audit_log: deque[Adjustment] = deque(maxlen=AUDIT_LOG_SIZE)
+        self.failed_turns = 0
+
+    def _percentile(self, values: deque[float]) -> float | None:
+        if len(values) < 2:
+            return values[0] if values else None
+        return statistics.quantiles(values, n=100)[LATENCY_PERCENTILE - 1]
+
+    def _tokens_per_second(self) -> float | None:
+        if not self._token_rates:
+            return None
+        return statistics.median(self._token_rates)
+
+    def _output_cap(self) -> int:
+        """Return the output tokens that can be streamed within the target."""
+        ttft = self._percentile(self._ttfts)
+        rate = self._tokens_per_second()
+        if ttft is None or rate is None:
+            return self.max_output_tokens
+        budget = max(self.target - ttft, 0.0)
+        return max(MIN_OUTPUT_TOKENS, min(self.max_output_tokens, int(budget * rate)))
+
+    def overrides(self) -> dict[str, Any]:
+        """Return the settings replacing the configured ones."""
+        overrides: dict[str, Any] = {}
+        for setting, value in self._steps[: self.step]:
+            overrides[setting] = (
+                self._output_cap() if setting == SETTING_MAX_OUTPUT_TOKENS else value
+            )
+        return overrides
+
+    def record_turn(
+        self,
+        duration: float,
+        time_to_first_token: float | None,
+        output_tokens: int,
+        failed: bool = False,
+    ) -> None:
+        """Record a finished or failed turn and adjust the settings if needed."""
+        self._latencies.append(duration)
+        if failed:
+            self.failed_turns += 1
+        if time_to_first_token is not None:
+            self._ttfts.append(time_to_first_token)
+            # The output of a failed turn says nothing about the token rate
+            if not failed and output_tokens and duration > time_to_first_token:
+                self._token_rates.append(
+                    output_tokens / (duration - time_to_first_token)
+                )
+        if len(self._latencies) < MIN_TURNS:
+            return
+
+        latency = self._percentile(self._latencies)
+        assert latency is not None
+        if latency > self.target * DEGRADE_THRESHOLD and self.step < len(self._steps):
+            self._adjust(1, latency)
+        elif latency < self.target * RESTORE_THRESHOLD and self.step > 0:
+            self._adjust(-1, latency)
+
+    def _adjust(self, delta: int, latency: float) -> None:
+        setting, _ = self._steps[self.step if delta > 0 else self.step - 1]
+        self.step += delta
+        direction = "degrade" if delta > 0 else "restore"
+        # None when the setting is back to its configured value
+        value = self.overrides().get(setting)
+
+        # Judge the new settings on turns made with them only
+        self._latencies.clear()
+        adjustment = Adjustment(
+            time=dt_util.utcnow().isoformat(),
+            direction=direction,
+            step=self.step,
+            setting=setting,
+            value=value,
+            latency_p90=round(latency, 3),
+            ttft_p90=self._percentile(self._ttfts),
+            tokens_per_second=self._tokens_per_second(),
+        )
+        self.audit_log.append(adjustment)
+        LOGGER.info(
+            "Voice turns take %.2f seconds at p%d for a target of %.2f, %s %s to %s",
+            latency,
+            LATENCY_PERCENTILE,
+            self.target,
+            "lowering" if direction == "degrade" else "restoring",
+            setting,
+            "configured value" if value is None else value,
+        )
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the controller state for diagnostics."""
+        return {
+            "target": self.target,
+            "step": self.step,
+            "steps": len(self._steps),
+            "failed_turns": self.failed_turns,
+            "overrides": self.overrides(),
+            "latency_p90": self._percentile(self._latencies),
+            "ttft_p90": self._percentile(self._ttfts),
+            "tokens_per_second": self._tokens_per_second(),
+            "audit_log": [asdict(adjustment) for adjustment in self.audit_log],
+        }
@@ -0,0 +1,306 @@
+"""Compact encoding of the home state sent with each conversation turn."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+import json
+from typing import Any
+
+import yaml
+
+from homeassistant.components import conversation
+from homeassistant.core import callback
+from homeassistant.helpers.chat_session import ChatSession
+
+from .const import LOGGER
+
+_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+TABLE_HEADER = "names|domain|areas|state|attributes"
+# Tool returning the entity states in Home Assistant 2025.4 and later
+LIVE_CONTEXT_TOOL = "GetLiveContext"
+
+type _Key = tuple[str, str, str]
+
+
+def _cell(value: Any) -> str:
+    if isinstance(value, list):
+        value = ", ".join(str(item) for item in value)
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+def _row(entity: dict[str, Any]) -> tuple[_Key, str]:
+    """Return the key and the table row of an entity."""
+    key = (
+        _cell(entity.get("names", "")),
+        _cell(entity.get("domain", "")),
+        _cell(entity.get("areas", "")),
+    )
+    # Other details, like the description of a script, go with the attributes
+    attributes = {
+        name: value
+        for name, value in entity.items()
+        if name not in ("names", "domain", "areas", "state", "attributes")
+    }
+    attributes.update(entity.get("attributes") or {})
+    cells = [
+        *key,
+        _cell(entity.get("state", "")),
+        ";".join(f"{name}={_cell(value)}" for name, value in attributes.items()),
+    ]
+    return key, "|".join(cells)
+
+
+def parse_entities(context: str) -> tuple[list[str], dict[_Key, str]] | None:
+    """Split the home state into its text lines and its entities as table rows.
+
+    Returns None when the entities are not the YAML list written by the
+    Assist API, or when entities cannot be told apart by their names, domain
+    and areas. The context is then sent as is.
+    """
+    lines: list[str] = []
+    entity_lines: list[str] = []
+    in_entities = False
+    for line in context.splitlines():
+        if in_entities and (line.startswith(("- ", "  ")) or not line.strip()):
+            entity_lines.append(line)
+            continue
+        # The entities are listed after an introduction ending with a colon
+        in_entities = line.rstrip().endswith(":")
+        lines.append(line)
+    if not entity_lines:
+        return None
+    try:
+        entities = yaml.load("\n".join(entity_lines), Loader=_LOADER)  # noqa: S506
+    except yaml.YAMLError:
+        return None
+    if not isinstance(entities, list) or not all(
+        isinstance(entity, dict) for entity in entities
+    ):
+        return None
+    rows = dict(_row(entity) for entity in entities)
+    if len(rows) != len(entities):
+        # Their changes could not be told apart in a delta
+        LOGGER.debug("Entities with the same names, domain and areas exposed")
+        return None
+    return lines, rows
+
+
+def _table(lines: list[str], rows: dict[_Key, str]) -> str:
+    return "\n".join([*lines, TABLE_HEADER, *rows.values()])
+
+
+def _delta(
+    lines: list[str], previous: dict[_Key, str], rows: dict[_Key, str], since: str
+) -> str:
+    """Return the rows that changed since the previous state."""
+    changed = [row for key, row in rows.items() if previous.get(key) != row]
+    removed = [key[0] for key in previous if key not in rows]
+    delta = [*lines]
+    if changed:
+        delta.extend([f"Changed since the {since}:", TABLE_HEADER])
+        delta.extend(changed)
+    if removed:
+        delta.append(f"No longer available: {', '.join(removed)}")
+    if not changed and not removed:
+        delta.append(f"Nothing changed since the {since}.")
+    return "\n".join(delta)
+
+
+@dataclass(slots=True)
+class _Snapshot:
+    """The home state as last sent in a conversation."""
+
+    rows: dict[_Key, str]
+    # Context messages sent so far, each before the user message it came with
+    messages: list[tuple[conversation.UserContent, str]] = field(default_factory=list)
+    full_size: int = 0
+    delta_size: int = 0
+
+
+@dataclass(slots=True)
+class _ToolResult:
+    """A GetLiveContext result as sent to the model."""
+
+    output: str
+    rows: dict[_Key, str]
+    # Tool call of the result the output lists the changes since, None if full
+    base: str | None
+    # Size of the changes sent since the last full result
+    delta_size: int
+
+
+class LiveContextEncoder:
+    """Send the home state in full once per conversation, then only changes.
+
+    Home Assistant 2025.3 lists the entity states in the system prompt. They
+    are sent as a table with one row per entity, before the user message of
+    the turn. Later turns send the rows of entities that changed since the
+    previous turn, and earlier context messages are kept in the history so
+    the model can follow the changes.
+
+    Later versions return the states from the GetLiveContext tool. The first
+    result of a conversation is sent as a table, later results as the rows
+    that changed since the previous result.
+
+    The full table is sent again when the changes add up to more than the
+    table itself, or when the history no longer holds the messages the
+    changes build upon.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the encoder."""
+        self._snapshots: dict[str, _Snapshot] = {}
+        # GetLiveContext results sent, by conversation and tool call
+        self._tool_results: dict[str, dict[str, _ToolResult]] = {}
+        self._tracked: set[str] = set()
+        self.full_refreshes = 0
+        self.deltas = 0
+        # Characters not sent thanks to the deltas
+        self.saved_size = 0
+
+    @callback
+    def async_track(self, session: ChatSession) -> None:
+        """Forget the state sent in a chat session when it is cleaned up."""
+        if session.conversation_id in self._tracked:
+            return
+        self._tracked.add(session.conversation_id)
+
+        @callback
+        def forget() -> None:
+            self._tracked.discard(session.conversation_id)
+            self._snapshots.pop(session.conversation_id, None)
+            self._tool_results.pop(session.conversation_id, None)
+
+        session.async_on_cleanup(forget)
+
+    def _full(
+        self,
+        conversation_id: str,
+        anchor: conversation.UserContent,
+        lines: list[str],
+        rows: dict[_Key, str],
+    ) -> _Snapshot:
+        text = _table(lines, rows)
+        snapshot = self._snapshots[conversation_id] = _Snapshot(
+            rows, [(anchor, text)], full_size=len(text)
+        )
+        self.full_refreshes += 1
+        return snapshot
+
+    @callback
+    def async_encode(
+        self,
+        conversation_id: str,
+        context: str,
+        history: Sequence[conversation.Content],
+    ) -> list[tuple[conversation.UserContent, str]] | None:
+        """Return the context messages to send before the user messages.
+
+        Returns None when the context cannot be encoded.
+        """
+        anchors = [
+            content
+            for content in history
+            if isinstance(content, conversation.UserContent)
+        ]
+        if not anchors or (parsed := parse_entities(context)) is None:
+            self._snapshots.pop(conversation_id, None)
+            return None
+        anchor = anchors[-1]
+        lines, rows = parsed
+
+        snapshot = self._snapshots.get(conversation_id)
+        if snapshot is None or not all(
+            any(sent is user for user in anchors) for sent, _ in snapshot.messages
+        ):
+            return self._full(conversation_id, anchor, lines, rows).messages
+        if snapshot.messages[-1][0] is anchor:
+            # Encoded already for this turn
+            return snapshot.messages
+
+        text = _delta(lines, snapshot.rows, rows, "previous message")
+        if snapshot.delta_size + len(text) > snapshot.full_size:
+            LOGGER.debug("Sending the full home state to %s again", conversation_id)
+            return self._full(conversation_id, anchor, lines, rows).messages
+        full_size = len(_table(lines, rows))
+        snapshot.rows = rows
+        snapshot.delta_size += len(text)
+        self.saved_size += max(full_size - len(text), 0)
+        snapshot.messages.append((anchor, text))
+        self.deltas += 1
+        return snapshot.messages
+
+    @callback
+    def async_encode_tool_results(
+        self, conversation_id: str, history: Sequence[conversation.Content]
+    ) -> dict[str, str]:
+        """Return the outputs to send for the GetLiveContext results, by call.
+
+        Results already sent keep their output, so the history sent stays the
+        same from one request to the next. Results that cannot be encoded are
+        left out and sent as is.
+        """
+        sent = self._tool_results.get(conversation_id, {})
+        results: dict[str, _ToolResult] = {}
+        previous: str | None = None
+        for content in history:
+            if (
+                not isinstance(content, conversation.ToolResultContent)
+                or content.tool_name != LIVE_CONTEXT_TOOL
+            ):
+                continue
+            result = sent.get(content.tool_call_id)
+            if result is None or result.base not in (None, previous):
+                result = self._encode_tool_result(
+                    content.tool_result,
+                    None if previous is None else (previous, results[previous]),
+                )
+                if result is None:
+                    continue
+            results[content.tool_call_id] = result
+            previous = content.tool_call_id
+        if results:
+            self._tool_results[conversation_id] = results
+        else:
+            self._tool_results.pop(conversation_id, None)
+        return {call_id: result.output for call_id, result in results.items()}
+
+    def _encode_tool_result(
+        self,
+        tool_result: dict[str, Any],
+        previous: tuple[str, _ToolResult] | None,
+    ) -> _ToolResult | None:
+        """Encode a result in full, or as the changes since the previous one."""
+        if not tool_result.get("success") or not isinstance(
+            text := tool_result.get("result"), str
+        ):
+            return None
+        if (parsed := parse_entities(text)) is None:
+            return None
+        lines, rows = parsed
+        full = _table(lines, rows)
+        if previous is not None:
+            base, base_result = previous
+            delta = _delta(lines, base_result.rows, rows, "previous result")
+            if base_result.delta_size + len(delta) <= len(full):
+                self.deltas += 1
+                self.saved_size += max(len(full) - len(delta), 0)
+                return _ToolResult(
+                    json.dumps({**tool_result, "result": delta}),
+                    rows,
+                    base,
+                    base_result.delta_size + len(delta),
+                )
+        self.full_refreshes += 1
+        return _ToolResult(json.dumps({**tool_result, "result": full}), rows, None, 0)
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the encoder statistics for diagnostics."""
+        return {
+            "conversations": len(self._snapshots.keys() | self._tool_results.keys()),
+            "full_refreshes": self.full_refreshes,
+            "deltas": self.deltas,
+            "saved_size": self.saved_size,
+        }
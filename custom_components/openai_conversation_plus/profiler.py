@@ -0,0 +1,163 @@
+"""On demand profiling of conversation turns."""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+from pathlib import Path
+import pstats
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.util import dt as dt_util
+from homeassistant.util.hass_dict import HassKey
+
+from .const import DOMAIN, LOGGER
+
+DATA_PROFILER: HassKey[Profiler] = HassKey(f"{DOMAIN}_profiler")
+
+# Functions listed in the service response, the file holds all of them
+TOP_FUNCTIONS = 20
+
+
+class TurnTimings:
+    """Wall clock time spent in the phases of a conversation turn."""
+
+    __slots__ = ("_last", "phases", "started")
+
+    def __init__(self) -> None:
+        """Initialize the timings."""
+        self.started = self._last = time.perf_counter()
+        self.phases: dict[str, float] = {}
+
+    def mark(self, phase: str) -> None:
+        """Record the end of a phase, which started at the previous mark."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+
+class Profiler:
+    """Profile the event loop until enough turns finished or time ran out.
+
+    cProfile traces the thread it was enabled in, so everything running on the
+    event loop during the capture is profiled, not only conversation turns.
+    """
+
+    def __init__(self, turns: int) -> None:
+        """Initialize the profiler."""
+        self.turns = turns
+        self.finished: list[tuple[float, dict[str, float]]] = []
+        self._profile = cProfile.Profile()
+        self._done = asyncio.Event()
+        self._started = 0.0
+        self.duration = 0.0
+
+    def start(self) -> None:
+        """Start profiling the calling thread."""
+        self._profile.enable()
+        self._started = time.monotonic()
+
+    def stop(self) -> None:
+        """Stop profiling."""
+        self._profile.disable()
+        self.duration = time.monotonic() - self._started
+
+    @callback
+    def async_finish_turn(self, timings: TurnTimings) -> None:
+        """Record the timings of a finished turn."""
+        self.finished.append((time.perf_counter() - timings.started, timings.phases))
+        if len(self.finished) >= self.turns:
+            self._done.set()
+
+    async def async_wait(self, timeout: float) -> None:
+        """Wait until enough turns finished or the timeout passed."""
+        try:
+            async with asyncio.timeout(timeout):
+                await self._done.wait()
+        except TimeoutError:
+            LOGGER.debug("Profiling window ended after %d turns", len(self.finished))
+
+    def phase_summary(self) -> dict[str, dict[str, float]]:
+        """Return the total and mean time spent per phase of the turns."""
+        totals: dict[str, float] = {}
+        for total, phases in self.finished:
+            totals["turn"] = totals.get("turn", 0.0) + total
+            for phase, elapsed in phases.items():
+                totals[phase] = totals.get(phase, 0.0) + elapsed
+        return {
+            phase: {"total": total, "mean": total / len(self.finished)}
+            for phase, total in totals.items()
+        }
+
+    def write(self, path: Path, top: int) -> list[dict[str, Any]]:
+        """Write the profile in pstats format and return the slowest functions."""
+        stats = pstats.Stats(self._profile)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(path)
+        functions = sorted(
+            stats.stats.items(),  # type: ignore[attr-defined]
+            key=lambda item: item[1][3],
+            reverse=True,
+        )
+        return [
+            {
+                "function": f"{filename}:{line}({name})",
+                "calls": calls,
+                "total_time": round(total_time, 6),
+                "cumulative_time": round(cumulative_time, 6),
+            }
+            for (filename, line, name), (
+                _,
+                calls,
+                total_time,
+                cumulative_time,
+                _,
+            ) in functions[:top]
+        ]
+
+
+@callback
+def async_get_profiler(hass: HomeAssistant) -> Profiler | None:
+    """Return the active profiler, if any."""
+    return hass.data.get(DATA_PROFILER)
+
+
+async def async_profile(
+    hass: HomeAssistant, turns: int, duration: float
+) -> dict[str, Any]:
+    """Profile the next turns or time window and return a summary."""
+    if DATA_PROFILER in hass.data:
+        raise ServiceValidationError(
+            translation_domain=DOMAIN, translation_key="profile_in_progress"
+        )
+
+    profiler = Profiler(turns)
+    try:
+        profiler.start()
+    except ValueError as err:
+        # Another profiler, like the one of the profiler integration, is active
+        raise HomeAssistantError(f"Cannot start profiling: {err}") from err
+    hass.data[DATA_PROFILER] = profiler
+    try:
+        await profiler.async_wait(duration)
+    finally:
+        profiler.stop()
+        del hass.data[DATA_PROFILER]
+
+    path = Path(
+        hass.config.path(DOMAIN, f"profile_{dt_util.utcnow():%Y%m%d_%H%M%S}.prof")
+    )
+    top_functions = await hass.async_add_executor_job(
+        profiler.write, path, TOP_FUNCTIONS
+    )
+    LOGGER.info("Profile of %d turns written to %s", len(profiler.finished), path)
+    return {
+        "file": str(path),
+        "turns": len(profiler.finished),
+        "duration": round(profiler.duration, 3),
+        "phases": profiler.phase_summary(),
+        "top_functions": top_functions,
+    }
@@ -0,0 +1,130 @@
+"""Persistent stale-while-revalidate cache of generated content."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import hashlib
+import json
+import time
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, LOGGER
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 10
+MAX_ENTRIES = 200
+
+type Fetch = Callable[[], Awaitable[dict[str, Any]]]
+
+
+def cache_key(request: dict[str, Any]) -> str:
+    """Return the cache key of a request, including any attached file contents."""
+    return hashlib.sha256(
+        json.dumps(request, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+class PromptCache:
+    """Cache responses, serving stale ones while they are refreshed.
+
+    Concurrent requests for the same key share a single in-flight request.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._store: Store[dict[str, dict[str, Any]]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.prompt_cache.{entry_id}"
+        )
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._inflight: dict[str, asyncio.Task[dict[str, Any]]] = {}
+        self.stats = {"fresh": 0, "stale": 0, "miss": 0, "shared": 0, "refresh": 0}
+
+    async def async_load(self) -> None:
+        """Load the cached responses from storage."""
+        if (data := await self._store.async_load()) is not None:
+            now = time.time()
+            self._entries = {
+                key: entry for key, entry in data.items() if entry["expires"] > now
+            }
+
+    def _data_to_save(self) -> dict[str, dict[str, Any]]:
+        now = time.time()
+        return {
+            key: entry for key, entry in self._entries.items() if entry["expires"] > now
+        }
+
+    async def async_get(
+        self, key: str, cache_ttl: float, stale_ttl: float, fetch: Fetch
+    ) -> dict[str, Any]:
+        """Return the cached response, fetching or refreshing it as needed."""
+        if (entry := self._entries.get(key)) is not None:
+            age = time.time() - entry["created"]
+            if age < cache_ttl:
+                self.stats["fresh"] += 1
+                return entry["response"]
+            if age < cache_ttl + stale_ttl:
+                self.stats["stale"] += 1
+                if key not in self._inflight:
+                    self.stats["refresh"] += 1
+                    self.hass.async_create_background_task(
+                        self._async_refresh(key, cache_ttl, stale_ttl, fetch),
+                        f"{DOMAIN} refresh cached prompt",
+                    )
+                return entry["response"]
+
+        self.stats["miss"] += 1
+        return await self._async_fetch(key, cache_ttl, stale_ttl, fetch)
+
+    async def _async_refresh(
+        self, key: str, cache_ttl: float, stale_ttl: float, fetch: Fetch
+    ) -> None:
+        try:
+            await self._async_fetch(key, cache_ttl, stale_ttl, fetch)
+        except HomeAssistantError as err:
+            LOGGER.warning("Error refreshing cached content: %s", err)
+
+    async def _async_fetch(
+        self, key: str, cache_ttl: float, stale_ttl: float, fetch: Fetch
+    ) -> dict[str, Any]:
+        """Fetch the response, sharing the request with concurrent callers."""
+        if (task := self._inflight.get(key)) is not None:
+            self.stats["shared"] += 1
+        else:
+            task = self._inflight[key] = self.hass.async_create_task(
+                self._async_fetch_and_store(key, cache_ttl, stale_ttl, fetch),
+                eager_start=True,
+            )
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # A caller giving up must not cancel the request of the others
+        return await asyncio.shield(task)
+
+    async def _async_fetch_and_store(
+        self, key: str, cache_ttl: float, stale_ttl: float, fetch: Fetch
+    ) -> dict[str, Any]:
+        response = await fetch()
+        now = time.time()
+        self._entries.pop(key, None)
+        self._entries[key] = {
+            "created": now,
+            "expires": now + cache_ttl + stale_ttl,
+            "response": response,
+        }
+        while len(self._entries) > MAX_ENTRIES:
+            # Entries are kept in insertion order, drop the oldest
+            del self._entries[next(iter(self._entries))]
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return response
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the cache statistics for diagnostics."""
+        return {
+            "entries": len(self._entries),
+            "in_flight": len(self._inflight),
+            **self.stats,
+        }
@@ -0,0 +1,434 @@
+"""Realtime API transport keeping a WebSocket session per conversation."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator, Callable
+import json
+import time
+from typing import TYPE_CHECKING, Any
+
+import aiohttp
+from yarl import URL
+
+from homeassistant.components import conversation
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import llm
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .const import LOGGER
+from .tool_arguments import ToolArgumentsParser
+
+if TYPE_CHECKING:
+    from .conversation import TurnUsage
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+# Sessions without a turn for this long are closed
+REALTIME_IDLE_TIMEOUT = 300.0
+CONNECT_TIMEOUT = 10.0
+# Longest wait for the next event of a response
+RECEIVE_TIMEOUT = 30.0
+# The Realtime API rejects temperatures outside of this range
+TEMPERATURE_RANGE = (0.6, 1.2)
+
+
+def is_realtime_model(model: str) -> bool:
+    """Return whether the model is only available through the Realtime API."""
+    return "realtime" in model
+
+
+def session_config(
+    chat_log: conversation.ChatLog,
+    tools: list[Any] | None,
+    temperature: float,
+    max_output_tokens: int,
+) -> dict[str, Any]:
+    """Return the Realtime API session configuration of a conversation turn."""
+    instructions = ""
+    if chat_log.content and isinstance(chat_log.content[0], conversation.SystemContent):
+        instructions = chat_log.content[0].content
+    return {
+        "modalities": ["text"],
+        "instructions": instructions,
+        # Built-in tools like web search are not available in realtime sessions
+        "tools": [
+            {
+                "type": "function",
+                "name": tool["name"],
+                "description": tool.get("description") or "",
+                "parameters": tool["parameters"],
+            }
+            for tool in tools or ()
+            if tool["type"] == "function"
+        ],
+        "tool_choice": "auto",
+        "temperature": min(
+            max(temperature, TEMPERATURE_RANGE[0]), TEMPERATURE_RANGE[1]
+        ),
+        "max_response_output_tokens": max_output_tokens,
+    }
+
+
+def _convert_content_to_items(content: conversation.Content) -> list[dict[str, Any]]:
+    """Convert a chat log entry to Realtime API conversation items."""
+    if isinstance(content, conversation.ToolResultContent):
+        return [
+            {
+                "type": "function_call_output",
+                "call_id": content.tool_call_id,
+                "output": json.dumps(content.tool_result),
+            }
+        ]
+    if isinstance(content, conversation.UserContent):
+        return [
+            {
+                "type": "message",
+                "role": "user",
+                "content": [{"type": "input_text", "text": content.content}],
+            }
+        ]
+    if not isinstance(content, conversation.AssistantContent):
+        # The system prompt is sent as the session instructions
+        return []
+
+    items: list[dict[str, Any]] = []
+    if content.content:
+        items.append(
+            {
+                "type": "message",
+                "role": "assistant",
+                "content": [{"type": "text", "text": content.content}],
+            }
+        )
+    items.extend(
+        {
+            "type": "function_call",
+            "call_id": tool_call.id,
+            "name": tool_call.tool_name,
+            "arguments": json.dumps(tool_call.tool_args),
+        }
+        for tool_call in content.tool_calls or ()
+    )
+    return items
+
+
+class RealtimeSession:
+    """A Realtime API WebSocket session mirroring a conversation.
+
+    The server keeps the conversation items, so every request only sends the
+    chat log entries added since the previous one. When the connection is
+    lost, a new one is opened and the whole chat log is sent again.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        url: URL,
+        api_key: str,
+        conversation_id: str,
+        on_close: Callable[[RealtimeSession], None],
+    ) -> None:
+        """Initialize the session."""
+        self.hass = hass
+        self.url = url
+        self.api_key = api_key
+        self.conversation_id = conversation_id
+        self._on_close = on_close
+        self._ws: aiohttp.ClientWebSocketResponse | None = None
+        self._session_config: dict[str, Any] | None = None
+        # Chat log entries known to the server
+        self._synced = 0
+        self._anchor: conversation.Content | None = None
+        self._produced: list[conversation.Content] = []
+        self._idle_handle: asyncio.TimerHandle | None = None
+        self.connects = 0
+        self.responses = 0
+
+    @property
+    def connected(self) -> bool:
+        """Return whether the WebSocket is open."""
+        return self._ws is not None and not self._ws.closed
+
+    async def _async_connect(self) -> None:
+        """Open the WebSocket, the server starts with an empty conversation."""
+        await self._async_disconnect()
+        LOGGER.debug("Opening realtime session for %s", self.conversation_id)
+        try:
+            async with asyncio.timeout(CONNECT_TIMEOUT):
+                self._ws = await async_get_clientsession(self.hass).ws_connect(
+                    self.url,
+                    headers={
+                        "Authorization": f"Bearer {self.api_key}",
+                        "OpenAI-Beta": "realtime=v1",
+                    },
+                    heartbeat=30,
+                )
+        except (aiohttp.ClientError, TimeoutError) as err:
+            raise HomeAssistantError(f"Error connecting to OpenAI: {err}") from err
+        self.connects += 1
+        self._session_config = None
+        self._synced = 0
+        self._anchor = None
+        self._produced.clear()
+
+    async def _async_disconnect(self) -> None:
+        if self._ws is not None:
+            ws, self._ws = self._ws, None
+            await ws.close()
+
+    async def async_close(self) -> None:
+        """Close the session."""
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+            self._idle_handle = None
+        await self._async_disconnect()
+        self._on_close(self)
+
+    async def _async_send(self, event: dict[str, Any]) -> None:
+        assert self._ws is not None
+        await self._ws.send_str(json.dumps(event))
+
+    async def _async_receive(self) -> dict[str, Any]:
+        assert self._ws is not None
+        try:
+            async with asyncio.timeout(RECEIVE_TIMEOUT):
+                message = await self._ws.receive()
+        except TimeoutError as err:
+            await self._async_disconnect()
+            raise RealtimeTimeoutError(
+                f"No event from OpenAI in {RECEIVE_TIMEOUT:.0f} seconds"
+            ) from err
+        if message.type is not aiohttp.WSMsgType.TEXT:
+            await self._async_disconnect()
+            raise HomeAssistantError(
+                f"OpenAI realtime session closed unexpectedly: {message.type.name}"
+            )
+        return json.loads(message.data)
+
+    def _pending_items(
+        self, chat_log: conversation.ChatLog
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Return the chat log entries the server does not know yet.
+
+        Also returns the number of entries the server knows once they were
+        sent and the response to them succeeded.
+        """
+        contents = chat_log.content
+        anchor = contents[1] if len(contents) > 1 else None
+        if self._anchor is not None and (
+            anchor is not self._anchor or len(contents) < self._synced
+        ):
+            raise _HistoryChangedError
+        self._anchor = anchor
+
+        items = [
+            item
+            for content in contents[self._synced :]
+            if not any(content is produced for produced in self._produced)
+            for item in _convert_content_to_items(content)
+        ]
+        self._produced.clear()
+        return items, len(contents)
+
+    async def _async_start_response(
+        self, chat_log: conversation.ChatLog, session_config: dict[str, Any]
+    ) -> int:
+        """Send the new conversation items and request a response."""
+        if not self.connected:
+            await self._async_connect()
+        try:
+            items, synced = self._pending_items(chat_log)
+        except _HistoryChangedError:
+            # The chat log was replaced, start over with a clean conversation
+            await self._async_connect()
+            items, synced = self._pending_items(chat_log)
+
+        if session_config != self._session_config:
+            await self._async_send(
+                {"type": "session.update", "session": session_config}
+            )
+            self._session_config = session_config
+        for item in items:
+            await self._async_send({"type": "conversation.item.create", "item": item})
+        await self._async_send(
+            {"type": "response.create", "response": {"modalities": ["text"]}}
+        )
+        return synced
+
+    async def async_respond(
+        self,
+        chat_log: conversation.ChatLog,
+        session_config: dict[str, Any],
+        turn_usage: TurnUsage | None = None,
+    ) -> AsyncGenerator[conversation.AssistantContentDeltaDict]:
+        """Request a response and stream it in HA format."""
+        self._touch()
+        try:
+            synced = await self._async_start_response(chat_log, session_config)
+        except (aiohttp.ClientError, ConnectionError):
+            # The connection dropped between turns, replay the conversation
+            LOGGER.debug(
+                "Realtime session of %s lost, reconnecting", self.conversation_id
+            )
+            await self._async_connect()
+            synced = await self._async_start_response(chat_log, session_config)
+
+        self.responses += 1
+        done = False
+        tool_names: dict[str, str] = {}
+        tool_schemas = {
+            tool["name"]: tool["parameters"] for tool in session_config["tools"]
+        }
+        try:
+            while not done:
+                event = await self._async_receive()
+                if event["type"] == "response.done":
+                    self._handle_response_done(event["response"], turn_usage)
+                    done = True
+                    self._synced = synced
+                elif (
+                    delta := self._handle_event(
+                        event, tool_names, tool_schemas, turn_usage
+                    )
+                ) is not None:
+                    yield delta
+        finally:
+            if not done:
+                # The server holds the items of the failed or abandoned
+                # response, and the next turn would read the rest of its
+                # events. Drop the connection, the next turn replays the
+                # conversation from the chat log
+                await self._async_disconnect()
+
+    def _handle_event(  # noqa: C901
+        self,
+        event: dict[str, Any],
+        tool_names: dict[str, str],
+        tool_schemas: dict[str, dict[str, Any]],
+        turn_usage: TurnUsage | None,
+    ) -> conversation.AssistantContentDeltaDict | None:
+        """Transform a server event of a response into HA format."""
+        event_type = event["type"]
+        if event_type == "response.output_item.added":
+            item = event["item"]
+            if item["type"] == "message":
+                return {"role": "assistant"}
+            if item["type"] == "function_call":
+                tool_names[item["call_id"]] = item["name"]
+        elif event_type == "response.text.delta":
+            if turn_usage is not None:
+                turn_usage.partial_output_tokens += 1
+                if turn_usage.time_to_first_token is None:
+                    turn_usage.time_to_first_token = (
+                        time.monotonic() - turn_usage.started
+                    )
+            return {"content": event["delta"]}
+        elif event_type == "response.function_call_arguments.delta":
+            if turn_usage is not None:
+                turn_usage.partial_output_tokens += 1
+        elif event_type == "response.function_call_arguments.done":
+            tool_name = tool_names[event["call_id"]]
+            parser = ToolArgumentsParser(tool_name, tool_schemas.get(tool_name))
+            parser.feed(event["arguments"])
+            tool_args = parser.finish()
+            if turn_usage is not None:
+                turn_usage.tool_arguments_parse_time += parser.parse_time
+            return {
+                "tool_calls": [
+                    llm.ToolInput(
+                        id=event["call_id"], tool_name=tool_name, tool_args=tool_args
+                    )
+                ]
+            }
+        elif event_type == "error":
+            raise HomeAssistantError(
+                f"OpenAI response error: {event['error'].get('message')}"
+            )
+        return None
+
+    def _handle_response_done(
+        self, response: dict[str, Any], turn_usage: TurnUsage | None
+    ) -> None:
+        if (usage := response.get("usage")) and turn_usage is not None:
+            turn_usage.add(
+                usage.get("input_tokens", 0),
+                (usage.get("input_token_details") or {}).get("cached_tokens", 0),
+                usage.get("output_tokens", 0),
+            )
+        if (status := response.get("status")) in ("failed", "incomplete", "cancelled"):
+            details = response.get("status_details") or {}
+            reason = (details.get("error") or {}).get("message") or details.get(
+                "reason", "unknown reason"
+            )
+            raise HomeAssistantError(f"OpenAI response {status}: {reason}")
+
+    @callback
+    def async_mark_produced(self, content: conversation.Content) -> None:
+        """Mark a chat log entry as produced by the server."""
+        if isinstance(content, conversation.AssistantContent):
+            self._produced.append(content)
+
+    def _touch(self) -> None:
+        if self._idle_handle is not None:
+            self._idle_handle.cancel()
+        self._idle_handle = self.hass.loop.call_later(
+            REALTIME_IDLE_TIMEOUT,
+            lambda: self.hass.async_create_background_task(
+                self.async_close(), f"Close realtime session {self.conversation_id}"
+            ),
+        )
+
+
+class RealtimeTimeoutError(HomeAssistantError):
+    """Error to indicate the realtime session stopped sending events."""
+
+
+class _HistoryChangedError(Exception):
+    """Error to indicate the chat log no longer matches the server conversation."""
+
+
+class RealtimeSessions:
+    """Realtime sessions of the active conversations of a config entry."""
+
+    def __init__(self, hass: HomeAssistant, base_url: str | None, api_key: str) -> None:
+        """Initialize the sessions."""
+        self.hass = hass
+        url = URL(base_url or DEFAULT_BASE_URL)
+        self.url = url.with_scheme("wss" if url.scheme == "https" else "ws")
+        self.api_key = api_key
+        self._sessions: dict[str, RealtimeSession] = {}
+
+    @callback
+    def async_get(self, conversation_id: str, model: str) -> RealtimeSession:
+        """Return the session of a conversation, creating it if needed."""
+        if (session := self._sessions.get(conversation_id)) is None:
+            session = self._sessions[conversation_id] = RealtimeSession(
+                self.hass,
+                (self.url / "realtime").with_query(model=model),
+                self.api_key,
+                conversation_id,
+                self._async_remove,
+            )
+        return session
+
+    @callback
+    def _async_remove(self, session: RealtimeSession) -> None:
+        if self._sessions.get(session.conversation_id) is session:
+            del self._sessions[session.conversation_id]
+
+    async def async_close(self) -> None:
+        """Close all sessions."""
+        await asyncio.gather(
+            *(session.async_close() for session in list(self._sessions.values()))
+        )
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the sessions for diagnostics."""
+        return {
+            "url": str(self.url),
+            "sessions": len(self._sessions),
+            "connected": sum(session.connected for session in self._sessions.values()),
+            "connects": sum(session.connects for session in self._sessions.values()),
+            "responses": sum(session.responses for session in self._sessions.values()),
+        }
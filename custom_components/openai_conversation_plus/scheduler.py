@@ -0,0 +1,244 @@
+"""Scheduling of concurrent OpenAI requests."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Coroutine
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from enum import IntEnum
+import heapq
+import itertools
+import time
+from typing import Any
+
+from homeassistant.core import callback
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import LOGGER, RECOMMENDED_MAX_IN_FLIGHT
+
+
+class TurnSupersededError(HomeAssistantError):
+    """Error to indicate a turn was replaced by a newer turn."""
+
+
+class Priority(IntEnum):
+    """Priority class of a request, lower is more urgent."""
+
+    VOICE = 0
+    CHAT = 1
+    AUTOMATION = 2
+
+
+# Waiting requests are ordered by their arrival time plus this delay, so a
+# request of a lower class is served once it has waited long enough
+PRIORITY_DELAY = {
+    Priority.VOICE: 0.0,
+    Priority.CHAT: 2.0,
+    Priority.AUTOMATION: 10.0,
+}
+
+
+@dataclass(slots=True)
+class QueueStats:
+    """Queue wait statistics of a priority class."""
+
+    granted: int = 0
+    waited: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+    # Granted while a request of a more urgent class was still waiting
+    promoted: int = 0
+
+    def record(self, wait: float) -> None:
+        """Record the queue wait of a granted request."""
+        self.granted += 1
+        if wait > 0:
+            self.waited += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics as a dictionary."""
+        return {
+            "granted": self.granted,
+            "waited": self.waited,
+            "average_wait": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait": self.max_wait,
+            "promoted": self.promoted,
+        }
+
+
+@dataclass(slots=True)
+class _Waiter:
+    priority: Priority
+    enqueued: float
+    future: asyncio.Future[None]
+
+
+class RequestScheduler:
+    """Limit the number of requests in flight and serialize conversations.
+
+    Requests waiting for a slot are served in order of their arrival time plus
+    a delay depending on their priority class. Interactive voice turns are
+    served first, but automations cannot be starved by a busy household.
+
+    A slot is held for a single request, not for the tools it asks to call, as
+    a tool may send requests of its own.
+    """
+
+    def __init__(self, max_in_flight: int = RECOMMENDED_MAX_IN_FLIGHT) -> None:
+        """Initialize the scheduler."""
+        self.max_in_flight = max_in_flight
+        self._in_flight = 0
+        self._queue: list[tuple[float, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._stats = {priority: QueueStats() for priority in Priority}
+        self._conversation_locks: dict[str, asyncio.Lock] = {}
+        self._conversation_users: dict[str, int] = {}
+        self._conversation_stats = QueueStats()
+        self._turns: dict[str, asyncio.Task[Any]] = {}
+        self._turn_generations: dict[str, int] = {}
+        self._superseded_turns: set[asyncio.Task[Any]] = set()
+        self._cancelled_turns = {"superseded": 0, "abandoned": 0}
+        self._wasted_tokens = {"input": 0, "output": 0}
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority) -> AsyncIterator[None]:
+        """Hold one of the in-flight request slots."""
+        enqueued = time.monotonic()
+        if self._in_flight < self.max_in_flight and not self._queue:
+            self._in_flight += 1
+            self._stats[priority].record(0.0)
+        else:
+            waiter = _Waiter(
+                priority, enqueued, asyncio.get_running_loop().create_future()
+            )
+            heapq.heappush(
+                self._queue,
+                (enqueued + PRIORITY_DELAY[priority], next(self._sequence), waiter),
+            )
+            try:
+                await waiter.future
+            except asyncio.CancelledError:
+                if waiter.future.done() and not waiter.future.cancelled():
+                    # The slot was granted while we were being cancelled
+                    self._release()
+                raise
+        try:
+            yield
+        finally:
+            self._release()
+
+    @asynccontextmanager
+    async def conversation(self, conversation_id: str | None) -> AsyncIterator[None]:
+        """Run one turn of a conversation at a time."""
+        if conversation_id is None:
+            yield
+            return
+
+        lock = self._conversation_locks.setdefault(conversation_id, asyncio.Lock())
+        self._conversation_users[conversation_id] = (
+            self._conversation_users.get(conversation_id, 0) + 1
+        )
+        try:
+            start = time.monotonic()
+            async with lock:
+                self._conversation_stats.record(time.monotonic() - start)
+                yield
+        finally:
+            self._conversation_users[conversation_id] -= 1
+            if not self._conversation_users[conversation_id]:
+                del self._conversation_users[conversation_id]
+                del self._conversation_locks[conversation_id]
+
+    async def async_run_turn[_T](
+        self,
+        conversation_id: str | None,
+        job: Callable[[], Coroutine[Any, Any, _T]],
+    ) -> _T:
+        """Run a conversation turn, superseding older turns of the conversation.
+
+        A turn still running or waiting for the same conversation is cancelled,
+        nobody is interested in its reply anymore. The turn is run in its own
+        task so a superseded turn raises TurnSupersededError to its caller,
+        while cancelling the caller cancels the turn.
+        """
+        if conversation_id is None:
+            return await job()
+
+        generation = self._turn_generations.get(conversation_id, 0) + 1
+        self._turn_generations[conversation_id] = generation
+        if (running := self._turns.get(conversation_id)) is not None:
+            LOGGER.debug("Superseding running turn of %s", conversation_id)
+            self._superseded_turns.add(running)
+            running.cancel()
+
+        async with self.conversation(conversation_id):
+            if self._turn_generations.get(conversation_id) != generation:
+                # Superseded while waiting for the previous turn
+                self._cancelled_turns["superseded"] += 1
+                raise TurnSupersededError
+            task = asyncio.create_task(job())
+            self._turns[conversation_id] = task
+            try:
+                return await task
+            except asyncio.CancelledError:
+                current_task = asyncio.current_task()
+                if task in self._superseded_turns and not (
+                    current_task and current_task.cancelling()
+                ):
+                    self._cancelled_turns["superseded"] += 1
+                    raise TurnSupersededError from None
+                self._cancelled_turns["abandoned"] += 1
+                raise
+            finally:
+                self._superseded_turns.discard(task)
+                if self._turns.get(conversation_id) is task:
+                    del self._turns[conversation_id]
+                if self._turn_generations.get(conversation_id) == generation:
+                    del self._turn_generations[conversation_id]
+
+    @callback
+    def async_record_wasted_tokens(self, input_tokens: int, output_tokens: int) -> None:
+        """Record the tokens spent on a turn that was cancelled."""
+        self._wasted_tokens["input"] += input_tokens
+        self._wasted_tokens["output"] += output_tokens
+
+    def _release(self) -> None:
+        """Release a slot and hand it to the next waiting request."""
+        self._in_flight -= 1
+        while self._queue and self._in_flight < self.max_in_flight:
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.future.done():
+                # Cancelled while waiting
+                continue
+            stats = self._stats[waiter.priority]
+            if any(
+                other.priority < waiter.priority and not other.future.done()
+                for _, _, other in self._queue
+            ):
+                stats.promoted += 1
+            stats.record(time.monotonic() - waiter.enqueued)
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the scheduler metrics."""
+        queued = {priority.name.lower(): 0 for priority in Priority}
+        for _, _, waiter in self._queue:
+            if not waiter.future.done():
+                queued[waiter.priority.name.lower()] += 1
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self._in_flight,
+            "queued": queued,
+            "priorities": {
+                priority.name.lower(): stats.as_dict()
+                for priority, stats in self._stats.items()
+            },
+            "active_conversations": len(self._conversation_locks),
+            "conversation_wait": self._conversation_stats.as_dict(),
+            "cancelled_turns": dict(self._cancelled_turns),
+            "wasted_tokens": dict(self._wasted_tokens),
+        }
@@ -0,0 +1,113 @@
+"""Usage sensors of OpenAI Conversation Plus."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
+
+from . import OpenAIPlusConfigEntry
+from .const import DOMAIN
+from .usage import UsageLedger, tokens
+
+
+@dataclass(frozen=True, kw_only=True)
+class OpenAIPlusSensorEntityDescription(SensorEntityDescription):
+    """Describes a usage sensor."""
+
+    value_fn: Callable[[UsageLedger], int]
+    # Value of a set of counters, broken down per user and service
+    breakdown_fn: Callable[[dict[str, int]], int] | None = None
+
+
+SENSORS: tuple[OpenAIPlusSensorEntityDescription, ...] = (
+    OpenAIPlusSensorEntityDescription(
+        key="tokens_today",
+        translation_key="tokens_today",
+        native_unit_of_measurement="tokens",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda ledger: tokens(ledger.today),
+        breakdown_fn=tokens,
+    ),
+    OpenAIPlusSensorEntityDescription(
+        key="requests_today",
+        translation_key="requests_today",
+        native_unit_of_measurement="requests",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda ledger: ledger.today["requests"],
+        breakdown_fn=lambda counters: counters["requests"],
+    ),
+    OpenAIPlusSensorEntityDescription(
+        key="images_today",
+        translation_key="images_today",
+        native_unit_of_measurement="images",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda ledger: ledger.today["images"],
+        breakdown_fn=lambda counters: counters["images"],
+    ),
+    OpenAIPlusSensorEntityDescription(
+        key="total_tokens",
+        translation_key="total_tokens",
+        native_unit_of_measurement="tokens",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda ledger: tokens(ledger.total),
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: OpenAIPlusConfigEntry,
+    async_add_entities: AddConfigEntryEntitiesCallback,
+) -> None:
+    """Set up usage sensors."""
+    async_add_entities(
+        OpenAIPlusUsageSensor(config_entry, description) for description in SENSORS
+    )
+
+
+class OpenAIPlusUsageSensor(SensorEntity):
+    """Usage of the OpenAI API by a config entry."""
+
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    entity_description: OpenAIPlusSensorEntityDescription
+
+    def __init__(
+        self,
+        entry: OpenAIPlusConfigEntry,
+        description: OpenAIPlusSensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self.ledger = entry.runtime_data.usage
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+        self._attr_device_info = dr.DeviceInfo(
+            identifiers={(DOMAIN, entry.entry_id)},
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Update the state when the usage changes."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.ledger.async_add_listener(self.async_write_ha_state))
+
+    @property
+    def native_value(self) -> int:
+        """Return the usage."""
+        return self.entity_description.value_fn(self.ledger)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return the usage of today per user and service."""
+        if (breakdown_fn := self.entity_description.breakdown_fn) is None:
+            return None
+        return self.ledger.breakdown(breakdown_fn)
@@ -0,0 +1,178 @@
+"""Memory accounting and caps of the chat sessions of a conversation agent."""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass, replace
+import json
+import time
+from typing import Any
+
+from homeassistant.components import conversation
+from homeassistant.core import callback
+from homeassistant.helpers.chat_session import ChatSession
+
+from .const import LOGGER
+
+# Sessions listed in the diagnostics
+LARGEST_SESSIONS = 10
+# Replaces the result of a tool call compacted away
+COMPACTED_TOOL_RESULT = {"result": "removed from the history to save memory"}
+
+
+@dataclass(slots=True)
+class SessionUsage:
+    """Memory held by the chat log of a conversation."""
+
+    messages: int = 0
+    size: int = 0
+    tool_result_size: int = 0
+    compacted_tool_results: int = 0
+    evicted_messages: int = 0
+    updated: float = 0.0
+
+
+def _json_size(value: Any) -> int:
+    return len(json.dumps(value, default=str).encode())
+
+
+def _content_size(content: conversation.Content) -> tuple[int, int]:
+    """Return the serialized size of a message and of its tool result."""
+    if isinstance(content, conversation.ToolResultContent):
+        size = _json_size(content.tool_result)
+        return size, size
+    size = len(content.content.encode()) if content.content else 0
+    if isinstance(content, conversation.AssistantContent) and content.tool_calls:
+        size += sum(_json_size(tool_call.tool_args) for tool_call in content.tool_calls)
+    return size, 0
+
+
+class SessionBudget:
+    """Keep the chat logs within a message count and a serialized size.
+
+    Over the size, the results of the oldest tool calls are compacted first
+    as they are usually the largest messages. Over either cap, the oldest
+    turns are then evicted. The system prompt and the turn in progress are always kept.
+    """
+
+    def __init__(self, max_messages: int, max_size: int) -> None:
+        """Initialize the budget, a cap of 0 disables it."""
+        self.max_messages = max_messages
+        self.max_size = max_size
+        self.sessions: dict[str, SessionUsage] = {}
+
+    @callback
+    def async_track(self, session: ChatSession) -> None:
+        """Track a chat session until it is cleaned up."""
+        if session.conversation_id in self.sessions:
+            return
+        self.sessions[session.conversation_id] = SessionUsage()
+
+        @callback
+        def forget() -> None:
+            self.sessions.pop(session.conversation_id, None)
+
+        session.async_on_cleanup(forget)
+
+    def _over(self, messages: int, size: int) -> bool:
+        return bool(
+            (self.max_messages and messages > self.max_messages)
+            or (self.max_size and size > self.max_size)
+        )
+
+    @callback
+    def async_enforce(self, chat_log: conversation.ChatLog) -> SessionUsage:
+        """Compact and evict messages of the chat log until it is within the caps."""
+        usage = self.sessions.setdefault(chat_log.conversation_id, SessionUsage())
+        removed = usage.compacted_tool_results + usage.evicted_messages
+        content = chat_log.content
+        sizes = [_content_size(message) for message in content]
+        size = sum(total for total, _ in sizes)
+        # The turn in progress starts at the last user message
+        current = max(
+            (
+                index
+                for index, message in enumerate(content)
+                if isinstance(message, conversation.UserContent)
+            ),
+            default=len(content),
+        )
+
+        # Compacting only helps with the size, not with the number of messages
+        if self.max_size and size > self.max_size:
+            compacted_size = _json_size(COMPACTED_TOOL_RESULT)
+            for index in range(current):
+                message = content[index]
+                if (
+                    not isinstance(message, conversation.ToolResultContent)
+                    or sizes[index][0] <= compacted_size
+                ):
+                    continue
+                content[index] = replace(message, tool_result=COMPACTED_TOOL_RESULT)
+                size -= sizes[index][0] - compacted_size
+                sizes[index] = (compacted_size, compacted_size)
+                usage.compacted_tool_results += 1
+                if size <= self.max_size:
+                    break
+
+        while self._over(len(content), size):
+            # Evict the oldest turn, from its user message up to the next one
+            turns = [
+                index
+                for index, message in enumerate(content)
+                if isinstance(message, conversation.UserContent)
+            ]
+            if len(turns) < 2:
+                break
+            start = 1 if isinstance(content[0], conversation.SystemContent) else 0
+            end = turns[1]
+            size -= sum(total for total, _ in sizes[start:end])
+            usage.evicted_messages += end - start
+            del content[start:end]
+            del sizes[start:end]
+
+        if usage.compacted_tool_results + usage.evicted_messages > removed:
+            LOGGER.debug(
+                "Conversation %s holds %d messages of %d bytes, %d tool results "
+                "compacted and %d messages evicted so far",
+                chat_log.conversation_id,
+                len(content),
+                size,
+                usage.compacted_tool_results,
+                usage.evicted_messages,
+            )
+        self._record(usage, len(content), sizes)
+        return usage
+
+    @callback
+    def async_account(self, chat_log: conversation.ChatLog) -> None:
+        """Record the memory held by the chat log after a turn."""
+        usage = self.sessions.setdefault(chat_log.conversation_id, SessionUsage())
+        self._record(
+            usage,
+            len(chat_log.content),
+            [_content_size(message) for message in chat_log.content],
+        )
+
+    def _record(
+        self, usage: SessionUsage, messages: int, sizes: list[tuple[int, int]]
+    ) -> None:
+        usage.messages = messages
+        usage.size = sum(total for total, _ in sizes)
+        usage.tool_result_size = sum(tool_result for _, tool_result in sizes)
+        usage.updated = time.time()
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the totals and the largest sessions for diagnostics."""
+        largest = sorted(
+            self.sessions.items(), key=lambda item: item[1].size, reverse=True
+        )[:LARGEST_SESSIONS]
+        return {
+            "max_messages": self.max_messages,
+            "max_size": self.max_size,
+            "sessions": len(self.sessions),
+            "size": sum(usage.size for usage in self.sessions.values()),
+            "largest": [
+                {"conversation_id": conversation_id, **asdict(usage)}
+                for conversation_id, usage in largest
+            ],
+        }
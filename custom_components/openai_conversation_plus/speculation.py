@@ -0,0 +1,239 @@
+"""Conversation turns started on partial speech transcripts."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from functools import partial
+import json
+import re
+import time
+from typing import Any
+
+from homeassistant.components import conversation
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+from .const import LOGGER
+
+# A speculation is dropped when no transcript arrived for this long
+SPECULATION_TIMEOUT = 10.0
+# Rough size of a token, the API does not report the usage of a response
+# closed before it completed
+CHARS_PER_TOKEN = 4
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+type WarmCallback = Callable[
+    [conversation.ConversationInput], Coroutine[Any, Any, None]
+]
+type StartCallback = Callable[
+    [conversation.ConversationInput, asyncio.Future[conversation.ConversationInput]],
+    Coroutine[Any, Any, conversation.ConversationResult],
+]
+
+
+def estimate_input_tokens(model_args: dict[str, Any]) -> int:
+    """Return about how many input tokens a request is billed for."""
+    request = [model_args["input"], model_args.get("tools")]
+    return len(json.dumps(request, default=str)) // CHARS_PER_TOKEN
+
+
+def normalize(text: str) -> str:
+    """Return a transcript without the case and punctuation STT tends to change."""
+    return " ".join(_PUNCTUATION_RE.sub(" ", text).lower().split())
+
+
+@dataclass(slots=True)
+class _Speculation:
+    """What was prepared for an utterance still being spoken."""
+
+    user_input: conversation.ConversationInput
+    # Latest partial transcript, normalized
+    partial: str
+    cancel_timeout: CALLBACK_TYPE
+    task: asyncio.Task[conversation.ConversationResult] | None = None
+    # Resolved with the final input when the turn may consume its response
+    commit: asyncio.Future[conversation.ConversationInput] | None = None
+    started: float = 0.0
+
+    def matches(self, user_input: conversation.ConversationInput) -> bool:
+        """Return whether the turn was started for this input."""
+        return (
+            normalize(self.user_input.text) == normalize(user_input.text)
+            and self.user_input.device_id == user_input.device_id
+            and self.user_input.language == user_input.language
+        )
+
+
+class Speculator:
+    """Prepare conversation turns while the user is still speaking.
+
+    Speech to text engines streaming partial transcripts pass them to the
+    speculate action. The first partial of an utterance warms the agent, the
+    tools are formatted and the connection to OpenAI is opened. With
+    speculative requests enabled, a turn is started once the same partial
+    transcript was received twice in a row. The request is sent, but its
+    response is only consumed and tools only called when the final transcript
+    matches. Otherwise the turn is cancelled and counted as wasted.
+    """
+
+    def __init__(self, hass: HomeAssistant, start_requests: bool) -> None:
+        """Initialize the speculator."""
+        self.hass = hass
+        self.start_requests = start_requests
+        self._warm: WarmCallback | None = None
+        self._start: StartCallback | None = None
+        # Keyed by conversation ID, None for a new conversation
+        self._speculations: dict[str | None, _Speculation] = {}
+        self.warmed = 0
+        self.started = 0
+        self.committed = 0
+        self.wasted = 0
+        self.wasted_input_tokens = 0
+        self.wasted_output_tokens = 0
+        # Time between starting the committed turns and their final transcript
+        self.head_start = 0.0
+
+    @callback
+    def async_register(self, warm: WarmCallback, start: StartCallback) -> CALLBACK_TYPE:
+        """Register the agent preparing the turns, return a callback to stop."""
+        self._warm = warm
+        self._start = start
+
+        @callback
+        def unregister() -> None:
+            self._warm = self._start = None
+            for key in list(self._speculations):
+                self._discard(key)
+
+        return unregister
+
+    @callback
+    def async_partial(self, user_input: conversation.ConversationInput) -> None:
+        """Handle a partial transcript of an utterance."""
+        if self._warm is None or self._start is None:
+            return
+        key = user_input.conversation_id
+        text = normalize(user_input.text)
+        speculation = self._speculations.get(key)
+        if speculation is not None and (
+            speculation.user_input.device_id != user_input.device_id
+            or speculation.user_input.language != user_input.language
+        ):
+            self._discard(key)
+            speculation = None
+
+        if speculation is None:
+            self._speculations[key] = _Speculation(
+                user_input,
+                text,
+                async_call_later(
+                    self.hass, SPECULATION_TIMEOUT, partial(self._async_expire, key)
+                ),
+            )
+            self.warmed += 1
+            self.hass.async_create_background_task(
+                self._warm(user_input), f"{key} speculation warm up"
+            )
+            return
+
+        speculation.cancel_timeout()
+        speculation.cancel_timeout = async_call_later(
+            self.hass, SPECULATION_TIMEOUT, partial(self._async_expire, key)
+        )
+        stable = text == speculation.partial
+        speculation.partial = text
+        if speculation.task is not None:
+            if not speculation.matches(user_input):
+                self._cancel(speculation)
+            return
+        if not self.start_requests or not stable:
+            return
+
+        speculation.user_input = user_input
+        speculation.commit = self.hass.loop.create_future()
+        speculation.started = time.monotonic()
+        speculation.task = self.hass.async_create_background_task(
+            self._start(user_input, speculation.commit), f"{key} speculative turn"
+        )
+        self.started += 1
+
+    @callback
+    def async_claim(
+        self, user_input: conversation.ConversationInput
+    ) -> asyncio.Task[conversation.ConversationResult] | None:
+        """Commit the turn started for the final transcript, if any.
+
+        Returns the task of the turn, or None when the turn has to be
+        processed from scratch.
+        """
+        speculation = self._speculations.pop(user_input.conversation_id, None)
+        if speculation is None:
+            return None
+        speculation.cancel_timeout()
+        if speculation.task is None or speculation.commit is None:
+            return None
+        if not speculation.matches(user_input):
+            LOGGER.debug(
+                "Final transcript %s does not match the speculation %s",
+                user_input.text,
+                speculation.user_input.text,
+            )
+            self._cancel(speculation)
+            return None
+
+        self.committed += 1
+        self.head_start += time.monotonic() - speculation.started
+        if not speculation.commit.done():
+            speculation.commit.set_result(user_input)
+        return speculation.task
+
+    @callback
+    def async_record_wasted_tokens(self, input_tokens: int, output_tokens: int) -> None:
+        """Record the tokens spent on a speculative turn that was thrown away."""
+        self.wasted_input_tokens += input_tokens
+        self.wasted_output_tokens += output_tokens
+
+    @callback
+    def _async_expire(self, key: str | None, _now: Any) -> None:
+        LOGGER.debug("Speculation for %s expired", key)
+        self._discard(key)
+
+    def _discard(self, key: str | None) -> None:
+        if (speculation := self._speculations.pop(key, None)) is None:
+            return
+        speculation.cancel_timeout()
+        self._cancel(speculation)
+
+    def _cancel(self, speculation: _Speculation) -> None:
+        """Throw away the turn started for an utterance."""
+        if (task := speculation.task) is None:
+            return
+        self.wasted += 1
+        speculation.task = speculation.commit = None
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            # Retrieved so it is not logged as unhandled
+            task.exception()
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the speculation statistics for diagnostics."""
+        return {
+            "start_requests": self.start_requests,
+            "pending": len(self._speculations),
+            "warmed": self.warmed,
+            "started": self.started,
+            "committed": self.committed,
+            "wasted": self.wasted,
+            "wasted_rate": self.wasted / self.started if self.started else None,
+            "wasted_tokens": {
+                "input": self.wasted_input_tokens,
+                "output": self.wasted_output_tokens,
+            },
+            "average_head_start": (
+                self.head_start / self.committed if self.committed else None
+            ),
+        }
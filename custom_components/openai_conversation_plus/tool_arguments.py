@@ -0,0 +1,265 @@
+"""Incremental parsing and validation of streamed tool call arguments."""
+
+from __future__ import annotations
+
+import json
+import re
+import time
+from typing import Any
+
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import LOGGER
+
+# Characters changing the structure of a JSON document, everything else is
+# skipped without looking at it
+_STRUCTURAL_RE = re.compile(r'[\\"{}\[\],]')
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_CLOSING = {"}": "{", "]": "["}
+
+_JSON_TYPES: dict[str, tuple[type, ...]] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+}
+
+
+_TYPE_NAMES = {
+    "string": "a string",
+    "integer": "an integer",
+    "number": "a number",
+    "boolean": "a boolean",
+    "array": "an array",
+    "object": "an object",
+}
+
+
+class ToolArgumentsError(HomeAssistantError):
+    """Error to indicate the model produced unusable tool arguments."""
+
+
+def _coerce(value: Any, expected: str) -> Any:
+    """Return the value converted to the expected JSON type, or raise ValueError."""
+    # A boolean sent for a string is a mismatch, not the string "True"
+    if (
+        expected == "string"
+        and isinstance(value, (int, float))
+        and not isinstance(value, bool)
+    ):
+        return str(value)
+    if expected == "integer" and isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        if expected == "integer":
+            return int(value)
+        if expected == "number":
+            return float(value)
+        if expected == "boolean" and value.lower() in ("true", "false"):
+            return value.lower() == "true"
+    raise ValueError(value)
+
+
+class ToolArgumentsParser:
+    """Accumulate the arguments of a tool call while they are streamed.
+
+    Chunks are kept in a list and joined once. Each chunk is scanned for
+    structural characters as it arrives, so that arguments which can never
+    become a JSON object fail the turn right away instead of after the rest
+    of the response was generated. Once complete, the arguments are checked
+    against the parameter schema of the tool and repaired where possible.
+    What cannot be repaired is left for the tool to reject, so the model
+    gets the error back and can correct its call.
+    """
+
+    __slots__ = (
+        "_chunks",
+        "_closed",
+        "_escaped",
+        "_in_string",
+        "_key_parts",
+        "_key_start",
+        "_last",
+        "_stack",
+        "errors",
+        "parse_time",
+        "repaired",
+        "schema",
+        "tool_name",
+        "unknown_keys",
+    )
+
+    def __init__(self, tool_name: str, schema: dict[str, Any] | None) -> None:
+        """Initialize the parser."""
+        self.tool_name = tool_name
+        self.schema = schema
+        self._chunks: list[str] = []
+        self._stack: list[str] = []
+        self._in_string = False
+        # Position in the next chunk of a character escaped by a backslash
+        self._escaped = -1
+        self._closed = False
+        # Last structural character outside of a string
+        self._last = ""
+        # Parts of the top level key being streamed, None outside of a key
+        self._key_parts: list[str] | None = None
+        self._key_start = 0
+        self.unknown_keys: list[str] = []
+        # Schema violations that could not be repaired
+        self.errors: list[str] = []
+        self.parse_time = 0.0
+        self.repaired = False
+
+    def _fail(self, reason: str) -> ToolArgumentsError:
+        return ToolArgumentsError(
+            f"Invalid arguments for tool {self.tool_name}: {reason}"
+        )
+
+    def feed(self, chunk: str) -> None:  # noqa: C901
+        """Add a chunk of the arguments, failing if they became invalid."""
+        start = time.perf_counter()
+        position = 0
+        escaped = self._escaped
+        self._escaped = -1
+        for match in _STRUCTURAL_RE.finditer(chunk):
+            index = match.start()
+            char = match.group()
+            if not self._in_string:
+                if (self._closed or not self._stack) and chunk[position:index].strip():
+                    raise self._fail("not a JSON object")
+                position = index + 1
+            if self._in_string:
+                if index == escaped:
+                    continue
+                if char == "\\":
+                    escaped = index + 1
+                elif char == '"':
+                    self._in_string = False
+                    self._last = char
+                    if self._key_parts is not None:
+                        self._key_parts.append(chunk[self._key_start : index])
+                        self._check_key("".join(self._key_parts))
+                        self._key_parts = None
+                continue
+            if self._closed:
+                raise self._fail("content after the end of the object")
+            if char == '"':
+                if not self._stack:
+                    raise self._fail("not a JSON object")
+                self._in_string = True
+                if self._stack == ["{"] and self._last in ("{", ","):
+                    self._key_parts = []
+                    self._key_start = index + 1
+                continue
+            self._last = char
+            if char in "{[":
+                if not self._stack and char != "{":
+                    raise self._fail("not a JSON object")
+                self._stack.append(char)
+            elif char in "}]":
+                if not self._stack or self._stack.pop() != _CLOSING[char]:
+                    raise self._fail(f"unexpected {char}")
+                self._closed = not self._stack
+            elif char == "\\":
+                raise self._fail("unexpected \\")
+        if not self._in_string and (self._closed or not self._stack):
+            if chunk[position:].strip():
+                raise self._fail("not a JSON object")
+        if self._key_parts is not None:
+            self._key_parts.append(chunk[self._key_start :])
+            self._key_start = 0
+        if escaped == len(chunk):
+            self._escaped = 0
+        self._chunks.append(chunk)
+        self.parse_time += time.perf_counter() - start
+
+    def _check_key(self, key: str) -> None:
+        """Note a top level key the tool does not take."""
+        if self.schema is None or self.schema.get("additionalProperties"):
+            return
+        if key not in self.schema.get("properties", {}):
+            LOGGER.debug("Tool %s has no parameter %s", self.tool_name, key)
+            self.unknown_keys.append(key)
+
+    @property
+    def text(self) -> str:
+        """Return the arguments received so far."""
+        return "".join(self._chunks)
+
+    def _repair(self, text: str) -> str:
+        """Close what the model left open and drop trailing commas."""
+        if self._in_string:
+            text += '"'
+        text += "".join("}" if char == "{" else "]" for char in reversed(self._stack))
+        return _TRAILING_COMMA_RE.sub(r"\1", text)
+
+    def finish(self) -> dict[str, Any]:
+        """Return the parsed arguments, repaired and checked against the schema."""
+        start = time.perf_counter()
+        try:
+            return self._finish()
+        finally:
+            self.parse_time += time.perf_counter() - start
+
+    def _finish(self) -> dict[str, Any]:
+        text = self.text
+        if not text.strip():
+            arguments: Any = {}
+        else:
+            try:
+                arguments = json.loads(text)
+            except ValueError:
+                try:
+                    arguments = json.loads(self._repair(text))
+                except ValueError as err:
+                    raise self._fail(str(err)) from err
+                self.repaired = True
+        if not isinstance(arguments, dict):
+            raise self._fail("not a JSON object")
+        if self.schema is not None:
+            self._validate(arguments)
+        if self.repaired:
+            LOGGER.debug("Repaired arguments of tool %s: %s", self.tool_name, text)
+        if self.errors:
+            LOGGER.debug(
+                "Invalid arguments for tool %s: %s",
+                self.tool_name,
+                ", ".join(self.errors),
+            )
+        return arguments
+
+    def _validate(self, arguments: dict[str, Any]) -> None:
+        """Check the arguments against the schema, coercing what is convertible."""
+        assert self.schema is not None
+        properties: dict[str, Any] = self.schema.get("properties", {})
+        required = self.schema.get("required", ())
+        # Unknown keys, and null sent for optional parameters left unset
+        dropped = [
+            key
+            for key, value in arguments.items()
+            if key in self.unknown_keys or (value is None and key not in required)
+        ]
+        for key in dropped:
+            del arguments[key]
+            self.repaired = True
+        if missing := [key for key in required if key not in arguments]:
+            self.errors.append(f"missing {', '.join(missing)}")
+        for key, value in arguments.items():
+            schema = properties.get(key, {})
+            expected = schema.get("type")
+            if isinstance(expected, str) and expected in _JSON_TYPES:
+                types = _JSON_TYPES[expected]
+                # bool is an int in Python, but not in JSON
+                if not isinstance(value, types) or (
+                    isinstance(value, bool) and bool not in types
+                ):
+                    try:
+                        arguments[key] = value = _coerce(value, expected)
+                    except ValueError:
+                        self.errors.append(f"{key} is not {_TYPE_NAMES[expected]}")
+                        continue
+                    self.repaired = True
+            if "enum" in schema and value not in schema["enum"]:
+                self.errors.append(f"{key} is not one of {schema['enum']}")
@@ -0,0 +1,150 @@
+"""Relevance ranking of LLM tools against the user utterance."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+import math
+import re
+
+from homeassistant.helpers import llm
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Tool names carry more signal than free-form descriptions
+NAME_WEIGHT = 3
+# Score of a single term found in the name or description of a few tools.
+# When the best match scores lower, the utterance does not say which tools
+# it needs and all of them are sent
+MIN_TOP_SCORE = 1.0
+
+_CAMEL_CASE_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_STOP_WORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "be",
+        "can",
+        "do",
+        "for",
+        "from",
+        "how",
+        "i",
+        "in",
+        "is",
+        "it",
+        "me",
+        "my",
+        "of",
+        "on",
+        "or",
+        "please",
+        "the",
+        "this",
+        "to",
+        "use",
+        "what",
+        "with",
+        "you",
+    }
+)
+# Utterances that ask for information Home Assistant cannot know about
+_WEB_SEARCH_RE = re.compile(
+    r"\b("
+    r"news|headlines?|latest|recent(ly)?|search|google|look (it )?up|internet|"
+    r"online|web|who (won|is|was)|price|stocks?|scores?|released?|election|"
+    r"happening|trending"
+    r")\b",
+    re.IGNORECASE,
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Split text into lowercase search terms."""
+    terms = []
+    for token in _TOKEN_RE.findall(_CAMEL_CASE_RE.sub(" ", text)):
+        term = token.lower()
+        if term in _STOP_WORDS:
+            continue
+        if len(term) > 3 and term.endswith("s") and not term.endswith("ss"):
+            term = term[:-1]
+        terms.append(term)
+    return terms
+
+
+def needs_web_search(text: str) -> bool:
+    """Return whether the utterance asks for fresh external information."""
+    return _WEB_SEARCH_RE.search(text) is not None
+
+
+def _tool_terms(tool: llm.Tool) -> list[str]:
+    """Return the search terms describing a tool."""
+    terms = tokenize(tool.name) * NAME_WEIGHT
+    if tool.description:
+        terms.extend(tokenize(tool.description))
+    for key in getattr(tool.parameters, "schema", {}):
+        terms.extend(tokenize(str(key)))
+    return terms
+
+
+class ToolIndex:
+    """BM25 index over tool names, descriptions and parameter names."""
+
+    def __init__(self, tools: Iterable[llm.Tool]) -> None:
+        """Build the index."""
+        self.tools = list(tools)
+        self.signature = tool_signature(self.tools)
+        self._term_freqs = [Counter(_tool_terms(tool)) for tool in self.tools]
+        self._lengths = [sum(freqs.values()) for freqs in self._term_freqs]
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self.tools else 0
+        doc_freqs: Counter[str] = Counter()
+        for freqs in self._term_freqs:
+            doc_freqs.update(freqs.keys())
+        count = len(self.tools)
+        self._idf = {
+            term: math.log(1 + (count - freq + 0.5) / (freq + 0.5))
+            for term, freq in doc_freqs.items()
+        }
+
+    def rank(self, query: str) -> list[tuple[float, llm.Tool]]:
+        """Return the tools matching the query, best match first."""
+        terms = set(tokenize(query))
+        scored = []
+        for tool, freqs, length in zip(
+            self.tools, self._term_freqs, self._lengths, strict=True
+        ):
+            score = 0.0
+            for term in terms:
+                if (freq := freqs.get(term)) is None:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self._avg_length)
+                score += self._idf[term] * freq * (BM25_K1 + 1) / (freq + norm)
+            if score > 0:
+                scored.append((score, tool))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return scored
+
+    def select(
+        self, query: str, top_k: int, always_include: Iterable[str] = ()
+    ) -> list[llm.Tool] | None:
+        """Return the top-k tools for the query plus the always included ones.
+
+        Returns None when no tool matches the query well enough, like "make
+        it cosier in here", all tools have to be sent then. The original tool
+        order is kept so the request layout stays stable.
+        """
+        ranked = self.rank(query)
+        if not ranked or ranked[0][0] < MIN_TOP_SCORE:
+            return None
+        selected = set(always_include)
+        selected.update(tool.name for _, tool in ranked[:top_k])
+        return [tool for tool in self.tools if tool.name in selected]
+
+
+def tool_signature(tools: Iterable[llm.Tool]) -> tuple[tuple[str, str | None], ...]:
+    """Return a value identifying a tool set, used to detect index staleness."""
+    return tuple((tool.name, tool.description) for tool in tools)
@@ -0,0 +1,181 @@
+"""Persistent ledger of the API usage, with daily token quotas."""
+
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime
+from typing import Any
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.event import async_track_time_change
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER
+
+STORAGE_VERSION = 1
+# Usage is written at most this often, never while a turn waits for it
+SAVE_DELAY = 30
+
+# Ledger key of requests made without a user, by automations and satellites
+NO_USER = "none"
+
+COUNTERS = ("input_tokens", "output_tokens", "requests", "images")
+
+
+class QuotaExceededError(HomeAssistantError):
+    """Error to indicate the daily token quota was used up."""
+
+
+def _counters() -> dict[str, int]:
+    return dict.fromkeys(COUNTERS, 0)
+
+
+def _add(counters: dict[str, int], usage: dict[str, int]) -> None:
+    for counter, value in usage.items():
+        counters[counter] += value
+
+
+def tokens(counters: dict[str, int]) -> int:
+    """Return the input and output tokens of a set of counters."""
+    return counters["input_tokens"] + counters["output_tokens"]
+
+
+class UsageLedger:
+    """Count the tokens, requests and images of a config entry.
+
+    Usage is kept for the current day per user, conversation and service,
+    and as running totals. The day is rolled over at local midnight.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        user_quota: int,
+        no_user_quota: int,
+    ) -> None:
+        """Initialize the ledger, a quota of 0 disables it."""
+        self.hass = hass
+        self.user_quota = user_quota
+        self.no_user_quota = no_user_quota
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.usage.{entry_id}"
+        )
+        self.day = dt_util.now().date().isoformat()
+        self.total = _counters()
+        self.today = _counters()
+        self.users: dict[str, dict[str, int]] = {}
+        self.conversations: dict[str, dict[str, int]] = {}
+        self.services: dict[str, dict[str, int]] = {}
+        self._listeners: list[CALLBACK_TYPE] = []
+
+    async def async_load(self) -> None:
+        """Load the ledger from storage."""
+        if (data := await self._store.async_load()) is None:
+            return
+        self.total = data["total"]
+        if data["day"] == self.day:
+            self.today = data["today"]
+            self.users = data["users"]
+            self.conversations = data["conversations"]
+            self.services = data["services"]
+
+    @callback
+    def async_setup(self) -> CALLBACK_TYPE:
+        """Roll the day over at midnight, return a callback to stop."""
+        return async_track_time_change(
+            self.hass, self._async_midnight, hour=0, minute=0, second=0
+        )
+
+    @callback
+    def _async_midnight(self, now: datetime) -> None:
+        self._roll(now.date().isoformat())
+        self._async_changed()
+
+    def _roll(self, day: str) -> None:
+        if day == self.day:
+            return
+        LOGGER.debug("Usage of %s: %s", self.day, self.today)
+        self.day = day
+        self.today = _counters()
+        self.users = {}
+        self.conversations = {}
+        self.services = {}
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "day": self.day,
+            "total": self.total,
+            "today": self.today,
+            "users": self.users,
+            "conversations": self.conversations,
+            "services": self.services,
+        }
+
+    @callback
+    def async_add_listener(self, update_callback: CALLBACK_TYPE) -> CALLBACK_TYPE:
+        """Listen for usage changes, return a callback to stop."""
+        self._listeners.append(update_callback)
+        return lambda: self._listeners.remove(update_callback)
+
+    @callback
+    def _async_changed(self) -> None:
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        for update_callback in list(self._listeners):
+            update_callback()
+
+    @callback
+    def async_check(self, user_id: str | None) -> None:
+        """Raise if the user used up the tokens of the day."""
+        self._roll(dt_util.now().date().isoformat())
+        quota = self.user_quota if user_id is not None else self.no_user_quota
+        if not quota:
+            return
+        used = self.users.get(user_id or NO_USER)
+        if used is not None and tokens(used) >= quota:
+            raise QuotaExceededError(
+                translation_domain=DOMAIN,
+                translation_key="quota_exceeded",
+                translation_placeholders={"quota": str(quota)},
+            )
+
+    @callback
+    def async_record(
+        self,
+        service: str,
+        user_id: str | None,
+        conversation_id: str | None = None,
+        **usage: int,
+    ) -> None:
+        """Record the usage of requests made for a user."""
+        if not any(usage.values()):
+            return
+        self._roll(dt_util.now().date().isoformat())
+        _add(self.total, usage)
+        _add(self.today, usage)
+        _add(self.users.setdefault(user_id or NO_USER, _counters()), usage)
+        _add(self.services.setdefault(service, _counters()), usage)
+        if conversation_id is not None:
+            _add(self.conversations.setdefault(conversation_id, _counters()), usage)
+        self._async_changed()
+
+    def breakdown(
+        self, value: Callable[[dict[str, int]], int]
+    ) -> dict[str, dict[str, int]]:
+        """Return a value of the usage of today per user and service."""
+        return {
+            "users": {user: value(counters) for user, counters in self.users.items()},
+            "services": {
+                service: value(counters) for service, counters in self.services.items()
+            },
+        }
+
+    def metrics(self) -> dict[str, Any]:
+        """Return the ledger for diagnostics."""
+        return {
+            "user_quota": self.user_quota,
+            "no_user_quota": self.no_user_quota,
+            **self._data_to_save(),
+        }
@@ -0,0 +1 @@
+"""Tests for the OpenAI Conversation Plus integration."""
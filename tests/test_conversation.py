@@ -0,0 +1,70 @@
+"""Tests for the OpenAI Conversation Plus agent."""
+
+from __future__ import annotations
+
+import voluptuous as vol
+
+from custom_components.openai_conversation_plus.conversation import (
+    _schema_key,
+    _split_system_prompt,
+)
+
+
+def test_schema_key() -> None:
+    """Test converted tools are reused only while their schema is unchanged."""
+
+    def schema(*calendars: str, **field: str) -> vol.Schema:
+        return vol.Schema(
+            {
+                vol.Required("calendar"): vol.In(list(calendars)),
+                vol.Optional("range", **field): str,
+            }
+        )
+
+    key = _schema_key(schema("Work", "Family"))
+
+    assert _schema_key(schema("Work", "Family")) == key
+    assert _schema_key(schema("Work")) != key
+    assert _schema_key(schema("Work", "Family", description="Range")) != key
+    assert _schema_key(schema("Work", "Family", default="today")) != key
+
+
+def test_split_system_prompt() -> None:
+    """Test the time and the entity states are split from the instructions."""
+    stable, volatile = _split_system_prompt(
+        "Current time is 10:15:00. Today's date is 2025-03-20.\n"
+        "You are a voice assistant.\n"
+        "When controlling Home Assistant always call the intent tools.\n"
+        "An overview of the areas and the devices in this smart home:\n"
+        "- names: Lamp\n"
+        "  domain: light\n"
+        "  state: 'on'\n"
+        "\n"
+        "Answer in plain text."
+    )
+
+    assert stable == (
+        "You are a voice assistant.\n"
+        "When controlling Home Assistant always call the intent tools.\n"
+        "Answer in plain text."
+    )
+    assert volatile == (
+        "Current time is 10:15:00. Today's date is 2025-03-20.\n"
+        "An overview of the areas and the devices in this smart home:\n"
+        "- names: Lamp\n"
+        "  domain: light\n"
+        "  state: 'on'"
+    )
+
+
+def test_split_system_prompt_static_context() -> None:
+    """Test the entities listed without their state stay in the stable part."""
+    prompt = (
+        "You are a voice assistant.\n"
+        "Static Context: An overview of the areas and the devices in this smart"
+        " home:\n"
+        "- names: Lamp\n"
+        "  domain: light"
+    )
+
+    assert _split_system_prompt(prompt) == (prompt, "")
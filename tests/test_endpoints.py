@@ -0,0 +1,74 @@
+"""Tests for the load balancing across OpenAI compatible endpoints."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from custom_components.openai_conversation_plus.endpoints import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    HEDGE_DEFAULT_DEADLINE,
+    HEDGE_MIN_SAMPLES,
+    Endpoint,
+    EndpointPool,
+)
+
+
+def _endpoint(base_url: str | None = None) -> Endpoint:
+    return Endpoint(base_url=base_url, weight=1.0, client=MagicMock())
+
+
+def test_hedge_deadline() -> None:
+    """Test the hedging deadline follows the first event latency."""
+    endpoint = _endpoint()
+    for _ in range(HEDGE_MIN_SAMPLES - 1):
+        endpoint.record_success(0.5)
+    assert endpoint.hedge_deadline == HEDGE_DEFAULT_DEADLINE
+
+    endpoint.record_success(0.5)
+    assert endpoint.hedge_deadline == pytest.approx(0.5)
+
+
+def test_circuit_breaker() -> None:
+    """Test an endpoint is taken out of rotation after repeated failures."""
+    endpoint = _endpoint()
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD - 1):
+        endpoint.record_failure()
+    assert endpoint.available(endpoint.open_until)
+    endpoint.record_failure()
+    assert not endpoint.available(endpoint.open_until - 1)
+
+    endpoint.record_success(0.5)
+    assert endpoint.available(0)
+
+
+async def test_call_duration_not_used_for_hedging() -> None:
+    """Test non-streaming requests do not count as first event latencies."""
+    endpoint = _endpoint()
+    endpoint.record_success(0.5)
+    pool = EndpointPool([endpoint])
+
+    async def request(client: MagicMock) -> str:
+        await asyncio.sleep(0.05)
+        return "image"
+
+    assert await pool.async_call(request) == "image"
+    assert endpoint.requests == 2
+    assert list(endpoint.latencies) == [0.5]
+    assert endpoint.latency_ewma == 0.5
+    assert endpoint.duration_ewma == pytest.approx(0.05, abs=0.05)
+
+
+def test_pick_skips_unavailable() -> None:
+    """Test requests go to the endpoints still in rotation."""
+    healthy = _endpoint("http://healthy")
+    failing = _endpoint("http://failing")
+    for _ in range(CIRCUIT_FAILURE_THRESHOLD):
+        failing.record_failure()
+    pool = EndpointPool([failing, healthy])
+
+    assert pool.pick() is healthy
+    assert pool.pick([healthy]) is failing
+    assert pool.pick([healthy, failing]) is None
@@ -0,0 +1,67 @@
+"""Tests for the adaptive request settings of voice turns."""
+
+from __future__ import annotations
+
+from custom_components.openai_conversation_plus.latency import (
+    MIN_TURNS,
+    SETTING_MAX_OUTPUT_TOKENS,
+    SETTING_REASONING_EFFORT,
+    SETTING_SEARCH_CONTEXT_SIZE,
+    LatencyController,
+)
+
+
+def _record(controller: LatencyController, duration: float, turns: int) -> None:
+    for _ in range(turns):
+        controller.record_turn(duration, 1.0, 100)
+
+
+def test_degrade_and_restore() -> None:
+    """Test settings are lowered one step at a time and restored."""
+    controller = LatencyController(3.0, "high", "medium", 500)
+
+    _record(controller, 5.0, MIN_TURNS - 1)
+    assert controller.overrides() == {}
+
+    _record(controller, 5.0, 1)
+    assert controller.overrides() == {SETTING_REASONING_EFFORT: "medium"}
+
+    _record(controller, 5.0, 3 * MIN_TURNS)
+    assert controller.overrides() == {
+        SETTING_REASONING_EFFORT: "low",
+        SETTING_SEARCH_CONTEXT_SIZE: "low",
+        # 25 tokens per second within the 2 seconds left after the first one
+        SETTING_MAX_OUTPUT_TOKENS: 50,
+    }
+    assert controller.step == controller.metrics()["steps"] == 4
+
+    _record(controller, 1.0, MIN_TURNS)
+    assert controller.step == 3
+    assert [adjustment.direction for adjustment in controller.audit_log] == [
+        "degrade",
+        "degrade",
+        "degrade",
+        "degrade",
+        "restore",
+    ]
+
+
+def test_output_cap() -> None:
+    """Test the output is capped to what streams within the target."""
+    controller = LatencyController(10.0, None, None, 500)
+
+    for _ in range(MIN_TURNS):
+        controller.record_turn(11.0, 1.0, 200)
+
+    # 20 tokens per second within the 9 seconds left after the first one
+    assert controller.overrides() == {SETTING_MAX_OUTPUT_TOKENS: 180}
+
+
+def test_failed_turns() -> None:
+    """Test failed turns count for the latency but not for the token rate."""
+    controller = LatencyController(10.0, None, None, 500)
+
+    controller.record_turn(2.0, 1.0, 10, failed=True)
+
+    assert controller.metrics()["failed_turns"] == 1
+    assert controller.metrics()["tokens_per_second"] is None
@@ -0,0 +1,203 @@
+"""Tests for the compact encoding of the home state."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from custom_components.openai_conversation_plus.conversation import _split_system_prompt
+from custom_components.openai_conversation_plus.live_context import (
+    LIVE_CONTEXT_TOOL,
+    TABLE_HEADER,
+    LiveContextEncoder,
+    parse_entities,
+)
+from homeassistant.components import conversation
+from homeassistant.components.homeassistant.exposed_entities import async_expose_entity
+from homeassistant.core import Context, HomeAssistant
+from homeassistant.helpers import llm
+from homeassistant.setup import async_setup_component
+from homeassistant.util import yaml as yaml_util
+
+LIVE_CONTEXT_HEADER = (
+    "Live Context: An overview of the areas and the devices in this smart home:"
+)
+
+
+def _entities(**states: str) -> list[dict[str, Any]]:
+    return [
+        {
+            "names": name,
+            "domain": "light",
+            "state": state,
+            "areas": "Kitchen",
+            "attributes": {"brightness": "255"},
+        }
+        for name, state in states.items()
+    ]
+
+
+def _live_context(
+    call_id: str, entities: list[dict[str, Any]]
+) -> conversation.ToolResultContent:
+    """Return a GetLiveContext result as Home Assistant 2025.4 returns it."""
+    return conversation.ToolResultContent(
+        agent_id="conversation.openai",
+        tool_call_id=call_id,
+        tool_name=LIVE_CONTEXT_TOOL,
+        tool_result={
+            "success": True,
+            "result": f"{LIVE_CONTEXT_HEADER}\n{yaml_util.dump(entities)}",
+        },
+    )
+
+
+def _sent(outputs: dict[str, str], call_id: str) -> str:
+    return json.loads(outputs[call_id])["result"]
+
+
+def test_parse_entities() -> None:
+    """Test the entities are turned into table rows."""
+    entities = [
+        *_entities(Lamp="on"),
+        {"names": "Wake up", "domain": "script", "description": "Open the blinds"},
+    ]
+
+    parsed = parse_entities(f"{LIVE_CONTEXT_HEADER}\n{yaml_util.dump(entities)}")
+
+    assert parsed is not None
+    lines, rows = parsed
+    assert lines == [LIVE_CONTEXT_HEADER]
+    assert list(rows.values()) == [
+        "Lamp|light|Kitchen|on|brightness=255",
+        "Wake up|script|||description=Open the blinds",
+    ]
+
+
+def test_parse_entities_not_encodable() -> None:
+    """Test the context is sent as is when it cannot be encoded."""
+    assert parse_entities("No entities are exposed.") is None
+    # Rows of entities sharing names, domain and areas cannot be told apart
+    entities = _entities(Lamp="on") + _entities(Lamp="off")
+    assert parse_entities(f"{LIVE_CONTEXT_HEADER}\n{yaml_util.dump(entities)}") is None
+
+
+def test_tool_results() -> None:
+    """Test later GetLiveContext results are sent as the changes."""
+    encoder = LiveContextEncoder()
+    lamps = {f"Lamp {index}": "off" for index in range(10)}
+    history: list[conversation.Content] = [
+        conversation.UserContent("What is on?"),
+        _live_context("call_1", _entities(**lamps)),
+    ]
+
+    outputs = encoder.async_encode_tool_results("conversation", history)
+    full = _sent(outputs, "call_1")
+    assert full.startswith(f"{LIVE_CONTEXT_HEADER}\n{TABLE_HEADER}\n")
+    assert "Lamp 3|light|Kitchen|off|brightness=255" in full
+
+    lamps["Lamp 3"] = "on"
+    history.append(_live_context("call_2", _entities(**lamps)))
+    outputs = encoder.async_encode_tool_results("conversation", history)
+    assert _sent(outputs, "call_1") == full
+    assert _sent(outputs, "call_2") == (
+        f"{LIVE_CONTEXT_HEADER}\n"
+        "Changed since the previous result:\n"
+        f"{TABLE_HEADER}\n"
+        "Lamp 3|light|Kitchen|on|brightness=255"
+    )
+
+    history.append(_live_context("call_3", _entities(**lamps)))
+    outputs = encoder.async_encode_tool_results("conversation", history)
+    assert _sent(outputs, "call_3").endswith(
+        "Nothing changed since the previous result."
+    )
+    assert encoder.metrics()["deltas"] == 2
+
+    # The changes are sent in full once the result they build upon is gone
+    del history[:2]
+    outputs = encoder.async_encode_tool_results("conversation", history)
+    assert "call_1" not in outputs
+    assert "Lamp 0|light|Kitchen|off|brightness=255" in _sent(outputs, "call_2")
+    assert _sent(outputs, "call_3").endswith(
+        "Nothing changed since the previous result."
+    )
+
+
+def test_tool_result_failed() -> None:
+    """Test failed GetLiveContext results are sent as is."""
+    encoder = LiveContextEncoder()
+    history: list[conversation.Content] = [
+        conversation.ToolResultContent(
+            agent_id="conversation.openai",
+            tool_call_id="call_1",
+            tool_name=LIVE_CONTEXT_TOOL,
+            tool_result={"success": False, "error": "No entities exposed"},
+        )
+    ]
+
+    assert encoder.async_encode_tool_results("conversation", history) == {}
+
+
+async def test_assist_api(hass: HomeAssistant) -> None:
+    """Test the entity states rendered by the Assist API are encoded.
+
+    Home Assistant 2025.3 lists the states in the system prompt, later
+    versions return them from the GetLiveContext tool.
+    """
+    assert await async_setup_component(hass, "homeassistant", {})
+    assert await async_setup_component(hass, "intent", {})
+    for index in range(10):
+        hass.states.async_set(
+            f"light.light_{index}", "off", {"friendly_name": f"Light {index}"}
+        )
+        async_expose_entity(hass, conversation.DOMAIN, f"light.light_{index}", True)
+    llm_context = llm.LLMContext(
+        platform="openai_conversation_plus",
+        context=Context(),
+        user_prompt=None,
+        language="en",
+        assistant=conversation.DOMAIN,
+        device_id=None,
+    )
+    encoder = LiveContextEncoder()
+    history: list[conversation.Content] = []
+
+    async def async_encode() -> str:
+        """Return the home state sent with the next turn."""
+        api = await llm.async_get_api(hass, llm.LLM_API_ASSIST, llm_context)
+        history.append(conversation.UserContent("What is on?"))
+        if not any(tool.name == LIVE_CONTEXT_TOOL for tool in api.tools):
+            stable, volatile = _split_system_prompt(api.api_prompt)
+            assert "Light 0" not in stable
+            context = encoder.async_encode("conversation", volatile, history)
+            assert context is not None
+            return context[-1][1]
+
+        stable, _ = _split_system_prompt(api.api_prompt)
+        assert "Light 0" in stable
+        tool_input = llm.ToolInput(LIVE_CONTEXT_TOOL, {})
+        history.append(
+            conversation.AssistantContent(
+                agent_id="conversation.openai", tool_calls=[tool_input]
+            )
+        )
+        history.append(
+            conversation.ToolResultContent(
+                agent_id="conversation.openai",
+                tool_call_id=tool_input.id,
+                tool_name=LIVE_CONTEXT_TOOL,
+                tool_result=await api.async_call_tool(tool_input),
+            )
+        )
+        outputs = encoder.async_encode_tool_results("conversation", history)
+        return _sent(outputs, tool_input.id)
+
+    full = await async_encode()
+    assert "Light 0|light||off|" in full
+    assert "Light 3|light||off|" in full
+
+    hass.states.async_set("light.light_3", "on", {"friendly_name": "Light 3"})
+    delta = await async_encode()
+    assert "Light 3|light||on|" in delta
+    assert "Light 0" not in delta
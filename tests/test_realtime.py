@@ -0,0 +1,57 @@
+"""Tests for the Realtime API transport."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from yarl import URL
+
+from custom_components.openai_conversation_plus import realtime
+from custom_components.openai_conversation_plus.realtime import (
+    RealtimeSession,
+    RealtimeTimeoutError,
+    session_config,
+)
+from homeassistant.components import conversation
+
+
+async def test_receive_timeout(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test a session that stops sending events is disconnected."""
+
+    async def receive() -> None:
+        await asyncio.sleep(10)
+
+    ws = MagicMock(closed=False, receive=receive, send_str=AsyncMock())
+    ws.close = AsyncMock()
+    client_session = MagicMock(ws_connect=AsyncMock(return_value=ws))
+    monkeypatch.setattr(
+        realtime, "async_get_clientsession", lambda hass: client_session
+    )
+    monkeypatch.setattr(realtime, "RECEIVE_TIMEOUT", 0.01)
+    hass = MagicMock(loop=asyncio.get_running_loop())
+    session = RealtimeSession(
+        hass,
+        URL("wss://api.openai.com/v1/realtime"),
+        "key",
+        "conversation",
+        MagicMock(),
+    )
+    chat_log = SimpleNamespace(
+        content=[
+            conversation.SystemContent("Be brief"),
+            conversation.UserContent("Hello"),
+        ]
+    )
+
+    with pytest.raises(RealtimeTimeoutError):
+        async for _ in session.async_respond(
+            chat_log, session_config(chat_log, None, 1.0, 150)
+        ):
+            pass
+
+    assert not session.connected
+    ws.close.assert_awaited_once()
+    await session.async_close()
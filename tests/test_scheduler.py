@@ -0,0 +1,86 @@
+"""Tests for the scheduling of concurrent OpenAI requests."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.openai_conversation_plus.scheduler import (
+    Priority,
+    RequestScheduler,
+    TurnSupersededError,
+)
+
+
+async def test_slot_limit() -> None:
+    """Test requests wait for a slot, the most urgent ones first."""
+    scheduler = RequestScheduler(2)
+    order: list[Priority] = []
+    release = asyncio.Event()
+
+    async def request(priority: Priority) -> None:
+        async with scheduler.slot(priority):
+            order.append(priority)
+            await release.wait()
+
+    tasks = [
+        asyncio.create_task(request(priority))
+        for priority in (
+            Priority.AUTOMATION,
+            Priority.AUTOMATION,
+            Priority.AUTOMATION,
+            Priority.VOICE,
+        )
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.metrics()["in_flight"] == 2
+    assert scheduler.metrics()["queued"] == {"voice": 1, "chat": 0, "automation": 1}
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert order == [
+        Priority.AUTOMATION,
+        Priority.AUTOMATION,
+        Priority.VOICE,
+        Priority.AUTOMATION,
+    ]
+    assert scheduler.metrics()["in_flight"] == 0
+    assert scheduler.metrics()["priorities"]["automation"]["promoted"] == 0
+
+
+async def test_slot_cancelled_while_waiting() -> None:
+    """Test a request cancelled while waiting does not keep a slot."""
+    scheduler = RequestScheduler(1)
+    async with scheduler.slot(Priority.CHAT):
+        waiting = asyncio.create_task(scheduler.slot(Priority.CHAT).__aenter__())
+        await asyncio.sleep(0)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+    assert scheduler.metrics()["in_flight"] == 0
+    async with scheduler.slot(Priority.CHAT):
+        assert scheduler.metrics()["in_flight"] == 1
+
+
+async def test_turn_superseded() -> None:
+    """Test a newer turn of a conversation cancels the running one."""
+    scheduler = RequestScheduler()
+    started = asyncio.Event()
+
+    async def slow_turn() -> str:
+        started.set()
+        await asyncio.sleep(10)
+        return "slow"
+
+    async def fast_turn() -> str:
+        return "fast"
+
+    first = asyncio.create_task(scheduler.async_run_turn("conversation", slow_turn))
+    await started.wait()
+    assert await scheduler.async_run_turn("conversation", fast_turn) == "fast"
+    with pytest.raises(TurnSupersededError):
+        await first
+    assert scheduler.metrics()["cancelled_turns"]["superseded"] == 1
+    assert scheduler.metrics()["active_conversations"] == 0
@@ -0,0 +1,79 @@
+"""Tests for the memory caps of the chat sessions."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+from custom_components.openai_conversation_plus.const import (
+    RECOMMENDED_SESSION_MAX_MESSAGES,
+    RECOMMENDED_SESSION_MAX_SIZE,
+)
+from custom_components.openai_conversation_plus.session_budget import (
+    COMPACTED_TOOL_RESULT,
+    SessionBudget,
+)
+from homeassistant.components import conversation
+
+
+def _chat_log(turns: int) -> SimpleNamespace:
+    """Return a chat log of turns that each called a tool."""
+    content: list[conversation.Content] = [conversation.SystemContent("Be brief")]
+    for turn in range(turns):
+        content.extend(
+            [
+                conversation.UserContent(f"Question {turn}"),
+                conversation.ToolResultContent(
+                    agent_id="conversation.openai",
+                    tool_call_id=f"call_{turn}",
+                    tool_name="GetLiveContext",
+                    tool_result={"result": "x" * 1000},
+                ),
+                conversation.AssistantContent(
+                    agent_id="conversation.openai", content=f"Answer {turn}"
+                ),
+            ]
+        )
+    return SimpleNamespace(conversation_id="conversation", content=content)
+
+
+def test_disabled_by_default() -> None:
+    """Test nothing is removed unless a cap is configured."""
+    budget = SessionBudget(
+        RECOMMENDED_SESSION_MAX_MESSAGES, RECOMMENDED_SESSION_MAX_SIZE * 1000
+    )
+    chat_log = _chat_log(100)
+
+    usage = budget.async_enforce(chat_log)
+
+    assert len(chat_log.content) == 301
+    assert usage.compacted_tool_results == usage.evicted_messages == 0
+    assert usage.messages == 301
+
+
+def test_compact_tool_results() -> None:
+    """Test the oldest tool results are compacted to get within the size."""
+    budget = SessionBudget(0, 2500)
+    chat_log = _chat_log(3)
+
+    usage = budget.async_enforce(chat_log)
+
+    assert usage.compacted_tool_results == 1
+    assert usage.evicted_messages == 0
+    assert chat_log.content[2].tool_result == COMPACTED_TOOL_RESULT
+    # The turn in progress is kept as is
+    assert chat_log.content[8].tool_result != COMPACTED_TOOL_RESULT
+
+
+def test_evict_turns() -> None:
+    """Test the oldest turns are evicted, keeping the system prompt."""
+    budget = SessionBudget(7, 0)
+    chat_log = _chat_log(3)
+
+    usage = budget.async_enforce(chat_log)
+
+    assert usage.evicted_messages == 3
+    assert [message.content for message in chat_log.content[::3]] == [
+        "Be brief",
+        "Answer 1",
+        "Answer 2",
+    ]
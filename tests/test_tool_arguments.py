@@ -0,0 +1,116 @@
+"""Tests for the parsing of streamed tool call arguments."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+
+from custom_components.openai_conversation_plus.tool_arguments import (
+    ToolArgumentsError,
+    ToolArgumentsParser,
+)
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "brightness": {"type": "integer"},
+        "color": {"type": "string", "enum": ["red", "green"]},
+        "transition": {"type": "number"},
+        "on": {"type": "boolean"},
+    },
+    "required": ["name"],
+}
+
+
+def _parse(*chunks: str, schema: dict[str, Any] | None = SCHEMA) -> ToolArgumentsParser:
+    parser = ToolArgumentsParser("HassLightSet", schema)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser
+
+
+def test_streamed_arguments() -> None:
+    """Test arguments split anywhere, even in escapes, are parsed."""
+    parser = _parse(
+        '{"na', 'me": "Kitchen \\', '"main\\" ', 'light", "brightness": 80}'
+    )
+
+    assert parser.finish() == {"name": 'Kitchen "main" light', "brightness": 80}
+    assert not parser.repaired
+    assert not parser.errors
+
+
+@pytest.mark.parametrize(
+    "chunks",
+    [
+        ("[1, 2]",),
+        ("Sure, ", '{"name": "Lamp"}'),
+        ('{"name": "Lamp"}', ', {"name": "Desk"}'),
+        ('{"name": "Lamp"]',),
+    ],
+)
+def test_not_an_object(chunks: tuple[str, ...]) -> None:
+    """Test arguments which cannot become an object fail while streaming."""
+    with pytest.raises(ToolArgumentsError):
+        _parse(*chunks)
+
+
+def test_repair_truncated() -> None:
+    """Test arguments cut off by the output limit are closed."""
+    parser = _parse('{"name": "Lamp", "color": "gre')
+
+    assert parser.finish() == {"name": "Lamp", "color": "gre"}
+    assert parser.repaired
+    assert parser.errors == ["color is not one of ['red', 'green']"]
+
+
+def test_coerce_types() -> None:
+    """Test values of the wrong type are converted when possible."""
+    parser = _parse(
+        '{"name": 42, "brightness": "80", "transition": "1.5", "on": "True",'
+        ' "off": null}'
+    )
+
+    assert parser.finish() == {
+        "name": "42",
+        "brightness": 80,
+        "transition": 1.5,
+        "on": True,
+    }
+    assert parser.unknown_keys == ["off"]
+    assert parser.repaired
+    assert not parser.errors
+
+
+def test_schema_errors_left_to_the_tool() -> None:
+    """Test what cannot be repaired is passed on for the tool to reject."""
+    parser = _parse('{"brightness": "bright"}')
+
+    assert parser.finish() == {"brightness": "bright"}
+    assert parser.errors == ["missing name", "brightness is not an integer"]
+
+
+def test_without_schema() -> None:
+    """Test arguments of tools without a schema are only parsed."""
+    parser = _parse("", schema=None)
+
+    assert parser.finish() == {}
+
+
+@pytest.mark.parametrize(
+    ("arguments", "error"),
+    [
+        ('{"name": true}', "name is not a string"),
+        ('{"name": "Lamp", "brightness": false}', "brightness is not an integer"),
+        ('{"name": "Lamp", "transition": true}', "transition is not a number"),
+    ],
+)
+def test_bool_not_coerced(arguments: str, error: str) -> None:
+    """Test booleans are rejected instead of converted for other types."""
+    parser = _parse(arguments)
+
+    assert parser.finish() == json.loads(arguments)
+    assert parser.errors == [error]
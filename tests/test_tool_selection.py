@@ -0,0 +1,71 @@
+"""Tests for the relevance ranking of LLM tools."""
+
+from __future__ import annotations
+
+import pytest
+
+from custom_components.openai_conversation_plus.tool_selection import (
+    ToolIndex,
+    needs_web_search,
+    tokenize,
+)
+from homeassistant.helpers import llm
+
+
+class _Tool(llm.Tool):
+    def __init__(self, name: str, description: str) -> None:
+        self.name = name
+        self.description = description
+
+
+TOOLS = [
+    _Tool("HassTurnOn", "Turns on/opens/presses a device or entity"),
+    _Tool("HassTurnOff", "Turns off/closes a device or entity"),
+    _Tool("HassLightSet", "Sets the brightness percentage or color of a light"),
+    _Tool("HassMediaPause", "Pauses a media player"),
+    _Tool("HassShoppingListAddItem", "Adds an item to the shopping list"),
+    _Tool("HassGetWeather", "Gets the current weather"),
+]
+
+
+def test_tokenize() -> None:
+    """Test names and plurals are split into search terms."""
+    assert tokenize("HassTurnOn the lights") == ["hass", "turn", "light"]
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("Dim the light to 20 percent", ["HassLightSet"]),
+        ("Put milk on the shopping list", ["HassShoppingListAddItem"]),
+        ("What's the weather like?", ["HassGetWeather"]),
+    ],
+)
+def test_select(query: str, expected: list[str]) -> None:
+    """Test the best matching tools are selected."""
+    selected = ToolIndex(TOOLS).select(query, 1)
+
+    assert selected is not None
+    assert [tool.name for tool in selected] == expected
+
+
+def test_select_keeps_order() -> None:
+    """Test the selected tools keep their order, with the included ones."""
+    selected = ToolIndex(TOOLS).select(
+        "Pause the music", 1, always_include=["HassTurnOn"]
+    )
+
+    assert selected is not None
+    assert [tool.name for tool in selected] == ["HassTurnOn", "HassMediaPause"]
+
+
+@pytest.mark.parametrize("query", ["Make it cosier in here", ""])
+def test_select_no_match(query: str) -> None:
+    """Test all tools are sent when the request does not name any."""
+    assert ToolIndex(TOOLS).select(query, 2) is None
+
+
+def test_needs_web_search() -> None:
+    """Test requests for external information are recognized."""
+    assert needs_web_search("What are the latest news?")
+    assert not needs_web_search("Turn on the kitchen light")